@@ -12,5 +12,26 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Servidor ASGI: sin conexiones persistentes por defecto (ver DB_CONN_MAX_AGE)
+os.environ.setdefault('DJANGO_ASGI', 'True')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from core.recaptcha import aclose_client  # noqa: E402 (requiere Django configurado)
+
+
+async def application(scope, receive, send):
+    """
+    Aplicación de Django más el protocolo lifespan: al apagar el worker cierra
+    el cliente httpx de reCAPTCHA (Django solo atiende conexiones HTTP).
+    """
+    if scope['type'] != 'lifespan':
+        return await django_application(scope, receive, send)
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await aclose_client()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
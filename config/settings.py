@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 from decouple import config, Csv
+from django.core.exceptions import ImproperlyConfigured
 import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -65,8 +66,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.timing.ServerTimingMiddleware',  # Server-Timing y logs de rendimiento (muestreo)
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.wizard_state.WizardStateMiddleware',  # estado del wizard (sesión o cookie firmada)
     'django.middleware.locale.LocaleMiddleware',  # i18n support
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -79,7 +82,7 @@ ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'core' / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -104,6 +107,12 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Por defecto usa SQLite, pero puede usar PostgreSQL con variables de entorno
 DB_ENGINE = config('DB_ENGINE', default='sqlite')
 
+# Conexiones persistentes (segundos). Bajo ASGI (config/asgi.py define DJANGO_ASGI)
+# el código síncrono corre en hilos distintos y cada uno dejaría abierta su propia
+# conexión: ahí el valor por defecto es 0 y para reutilizar conexiones se usa DB_POOL
+DJANGO_ASGI = config('DJANGO_ASGI', default=False, cast=bool)
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=0 if DJANGO_ASGI else 60, cast=int)
+
 if DB_ENGINE == 'postgresql':
     DATABASES = {
         'default': {
@@ -113,17 +122,140 @@ if DB_ENGINE == 'postgresql':
             'PASSWORD': config('DB_PASSWORD', default=''),
             'HOST': config('DB_HOST', default='localhost'),
             'PORT': config('DB_PORT', default='5432'),
+            # Conexiones persistentes entre solicitudes, verificadas antes de reutilizarse
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
         }
     }
+    # Pool de conexiones de psycopg 3 (pip install -r requirements-pool.txt),
+    # recomendado con ASGI; reemplaza a las conexiones persistentes
+    if config('DB_POOL', default=False, cast=bool):
+        try:
+            import psycopg  # noqa: F401
+            import psycopg_pool  # noqa: F401
+        except ImportError:
+            raise ImproperlyConfigured(
+                "DB_POOL=True requiere psycopg 3 con el pool (requirements.txt instala "
+                "psycopg2): pip install -r requirements-pool.txt"
+            )
+        DATABASES['default']['OPTIONS'] = {
+            'pool': {
+                'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+                'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+                'timeout': config('DB_POOL_TIMEOUT', default=10, cast=float),
+            },
+        }
+        DATABASES['default']['CONN_MAX_AGE'] = 0
 else:
-    # SQLite por defecto (desarrollo)
+    # SQLite por defecto (desarrollo y sitios pequeños)
+    # Pragmas aplicados a cada conexión nueva: WAL (lectores y un escritor en
+    # paralelo), synchronous=NORMAL (seguro con WAL, sin fsync por transacción)
+    # y lecturas con mmap. Ante un bloqueo se espera hasta SQLITE_BUSY_TIMEOUT
+    # segundos y las transacciones empiezan con BEGIN IMMEDIATE: un escritor
+    # espera el bloqueo al empezar en vez de fallar con "database is locked" al
+    # pasar de lectura a escritura.
+    SQLITE_PRAGMAS = {
+        'journal_mode': config('SQLITE_JOURNAL_MODE', default='WAL'),
+        'synchronous': config('SQLITE_SYNCHRONOUS', default='NORMAL'),
+        'mmap_size': config('SQLITE_MMAP_SIZE', default=268435456, cast=int),  # bytes (256 MiB)
+    }
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
-            'NAME': BASE_DIR / 'db.sqlite3',
+            'NAME': config('SQLITE_PATH', default=str(BASE_DIR / 'db.sqlite3')),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+                # busy timeout de sqlite3.connect (segundos)
+                'timeout': config('SQLITE_BUSY_TIMEOUT', default=5, cast=float),
+                'transaction_mode': config('SQLITE_TRANSACTION_MODE', default='IMMEDIATE') or None,
+            },
         }
     }
 
+# Identificadores públicos de declaraciones y firmantes (core/identifiers.py)
+# IDENTIFIER_KEY define la permutación de los IDs y no debe cambiar nunca. Es
+# obligatoria con DEBUG=False: derivarla de SECRET_KEY haría que rotar esa clave
+# cambiara en silencio los IDs nuevos (y podría repetir IDs ya asignados).
+# En desarrollo, si no se define, se usa SECRET_KEY.
+IDENTIFIER_KEY = config('IDENTIFIER_KEY', default=SECRET_KEY if DEBUG else '')
+if not IDENTIFIER_KEY:
+    raise ImproperlyConfigured(
+        "IDENTIFIER_KEY es obligatoria con DEBUG=False. En una instalación existente "
+        "usa el valor actual de SECRET_KEY para conservar la numeración de los IDs."
+    )
+# Valores del contador que reserva cada proceso por UPDATE
+IDENTIFIER_BLOCK_SIZE = config('IDENTIFIER_BLOCK_SIZE', default=100, cast=int)
+
+# Estado del wizard de declaraciones (core/wizard_state.py)
+# 'session': en la sesión de Django (una escritura en la base por paso)
+# 'signed': cookie firmada y comprimida; si supera WIZARD_STATE_MAX_BYTES se usa la sesión
+WIZARD_STATE_STORAGE = config('WIZARD_STATE_STORAGE', default='session')
+WIZARD_STATE_COOKIE_NAME = 'wizard_state'
+WIZARD_STATE_MAX_BYTES = config('WIZARD_STATE_MAX_BYTES', default=3800, cast=int)
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# Caché de declaraciones renderizadas (texto/JSON) para búsqueda y verificación
+# DECLARATION_CACHE_BACKEND: 'locmem' (por proceso) o 'file' (compartido entre workers)
+DECLARATION_CACHE_ALIAS = 'declarations'
+DECLARATION_CACHE_BACKEND = config('DECLARATION_CACHE_BACKEND', default='locmem')
+DECLARATION_CACHE_MAX_ENTRIES = config('DECLARATION_CACHE_MAX_ENTRIES', default=2000, cast=int)
+# None = sin expiración; el tamaño se limita con MAX_ENTRIES (desalojo LRU;
+# aproximado por proceso en el backend file, ver core/cache_backends.py)
+DECLARATION_CACHE_TIMEOUT = None
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+if DECLARATION_CACHE_BACKEND == 'file':
+    CACHES[DECLARATION_CACHE_ALIAS] = {
+        'BACKEND': 'core.cache_backends.LRUFileBasedCache',
+        'LOCATION': config('DECLARATION_CACHE_LOCATION', default=str(BASE_DIR / 'cache' / 'declarations')),
+        'TIMEOUT': DECLARATION_CACHE_TIMEOUT,
+        'OPTIONS': {'MAX_ENTRIES': DECLARATION_CACHE_MAX_ENTRIES},
+    }
+else:
+    CACHES[DECLARATION_CACHE_ALIAS] = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'declarations',
+        'TIMEOUT': DECLARATION_CACHE_TIMEOUT,
+        'OPTIONS': {'MAX_ENTRIES': DECLARATION_CACHE_MAX_ENTRIES},
+    }
+
+# Sesiones (core/sessions.py): solo se escriben si cambian, con caché de lectura
+# SESSION_CACHE_BACKEND: 'locmem' (un solo proceso; por defecto con DEBUG),
+# 'none' (siempre desde la base de datos; por defecto sin DEBUG, donde hay varios
+# workers y una caché por proceso serviría sesiones desactualizadas) o 'file'
+# (opcional: compartida entre los workers de un servidor, en disco)
+SESSION_ENGINE = 'core.sessions'
+SESSION_CACHE_ALIAS = 'sessions'
+SESSION_CACHE_BACKEND = config('SESSION_CACHE_BACKEND', default='locmem' if DEBUG else 'none')
+# Segundos que un cambio espera en la caché antes de escribirse en la base (0 = inmediato)
+SESSION_WRITE_BEHIND_DELAY = config('SESSION_WRITE_BEHIND_DELAY', default=0, cast=float)
+
+if SESSION_CACHE_BACKEND == 'file':
+    CACHES[SESSION_CACHE_ALIAS] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('SESSION_CACHE_LOCATION', default=str(BASE_DIR / 'cache' / 'sessions')),
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    }
+elif SESSION_CACHE_BACKEND == 'locmem':
+    CACHES[SESSION_CACHE_ALIAS] = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sessions',
+    }
+else:
+    CACHES[SESSION_CACHE_ALIAS] = {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -180,6 +312,57 @@ SITE_DOMAIN = config('SITE_DOMAIN', default=None)
 RECAPTCHA_SITE_KEY = config('RECAPTCHA_SITE_KEY', default='')
 RECAPTCHA_SECRET_KEY = config('RECAPTCHA_SECRET_KEY', default='')
 RECAPTCHA_ENABLED = config('RECAPTCHA_ENABLED', default=True, cast=bool)
+# Cliente de verificación (core/recaptcha.py)
+RECAPTCHA_VERIFY_URL = config('RECAPTCHA_VERIFY_URL', default='https://www.google.com/recaptcha/api/siteverify')
+RECAPTCHA_CONNECT_TIMEOUT = config('RECAPTCHA_CONNECT_TIMEOUT', default=1.0, cast=float)
+RECAPTCHA_READ_TIMEOUT = config('RECAPTCHA_READ_TIMEOUT', default=2.0, cast=float)
+RECAPTCHA_POOL_SIZE = config('RECAPTCHA_POOL_SIZE', default=10, cast=int)
+# Segundos que un token verificado se acepta de nuevo sin consultar a Google (0 = sin caché)
+RECAPTCHA_TOKEN_TTL = config('RECAPTCHA_TOKEN_TTL', default=120, cast=int)
+# Si la API no responde: 'closed' rechaza la verificación, 'open' la deja pasar
+RECAPTCHA_FAILURE_POLICY = config('RECAPTCHA_FAILURE_POLICY', default='closed')
+# Fallos consecutivos que abren el circuito y segundos antes de reintentar
+RECAPTCHA_BREAKER_THRESHOLD = config('RECAPTCHA_BREAKER_THRESHOLD', default=5, cast=int)
+RECAPTCHA_BREAKER_COOLDOWN = config('RECAPTCHA_BREAKER_COOLDOWN', default=30, cast=float)
+
+# Instrumentación de rendimiento (core/timing.py)
+# Fracción de solicitudes medidas (0 = desactivado, 1 = todas)
+SERVER_TIMING_SAMPLE_RATE = config('SERVER_TIMING_SAMPLE_RATE', default=0.0, cast=float)
+# Fracción máxima del tiempo de respuesta dedicada a medir; si se supera baja el muestreo
+SERVER_TIMING_OVERHEAD_BUDGET = config('SERVER_TIMING_OVERHEAD_BUDGET', default=0.02, cast=float)
+# Enviar la cabecera Server-Timing en las solicitudes medidas (si no, solo el log)
+SERVER_TIMING_HEADER = config('SERVER_TIMING_HEADER', default=True, cast=bool)
+
+# Métricas de Prometheus en /metrics (core/metrics.py), agregadas entre workers
+METRICS_ENABLED = config('METRICS_ENABLED', default=False, cast=bool)
+# Directorio compartido donde cada worker escribe sus métricas (vacío = solo el proceso que responde)
+METRICS_DIR = config('METRICS_DIR', default=str(BASE_DIR / 'cache' / 'metrics'))
+# Segundos entre escrituras de las métricas de cada worker (solo si cambiaron)
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=5.0, cast=float)
+# Si se define, /metrics exige la cabecera "Authorization: Bearer <token>"
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Logging: las mediciones se escriben como JSON en el logger core.timing (una línea por solicitud)
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'timing_console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'core.timing': {
+            'handlers': ['timing_console'],
+            'level': config('SERVER_TIMING_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+    },
+}
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
@@ -26,13 +26,21 @@ from core.views import (
     # Search
     search_declaration, view_declaration,
     # Signers
-    signer_register, signer_create, signer_verify, signers_list,
+    signer_register, signer_create, signer_verify, signers_list, signer_search,
     # Utils
     load_preset, preview_declaration, save_declaration, privacy_policy,
+    # Exports
+    export_data,
+    # Metrics
+    prometheus_metrics,
 )
 
 # Non-translatable URLs (admin, language switcher)
 urlpatterns = [
+    # Exportación masiva en streaming (solo personal del admin)
+    path('exportar/<str:kind>/', export_data, name='export_data'),
+    # Métricas de Prometheus (METRICS_ENABLED)
+    path('metrics', prometheus_metrics, name='metrics'),
     path('admin/', admin.site.urls),
     path('i18n/setlang/', set_language, name='set_language'),
 ]
@@ -58,6 +66,7 @@ urlpatterns += i18n_patterns(
     path('api/guardar/', save_declaration, name='save_declaration'),
     # Módulo de firmantes
     path('firmantes/', signers_list, name='signers_list'),
+    path('api/firmantes/buscar/', signer_search, name='signer_search'),
     path('firmar/', signer_register, name='signer_register'),
     path('api/firmar/', signer_create, name='signer_create'),
     path('v/<str:hash_short>/', signer_verify, name='signer_verify'),
@@ -1,5 +1,9 @@
 from django.contrib import admin
-from .models import Declaration, Signer
+from django.db.models import Q
+from django.db.models.functions import Lower, Trim, Upper
+
+from .fulltext import filter_declarations, filter_signers
+from .models import Declaration, Signer, normalize_lookup
 
 
 @admin.register(Declaration)
@@ -10,6 +14,15 @@ class DeclarationAdmin(admin.ModelAdmin):
     readonly_fields = ('declaration_id', 'validation_hash', 'created_at', 'updated_at')
     date_hierarchy = 'created_at'
 
+    def get_search_results(self, request, queryset, search_term):
+        """Búsqueda por ID/hash exacto o por el índice de texto completo (sin escaneos icontains)"""
+        if not search_term.strip():
+            return queryset, False
+        lookup = normalize_lookup(search_term)
+        matches = filter_declarations(queryset, search_term)
+        exact = queryset.filter(Q(id_lookup=lookup) | Q(hash_lookup=lookup))
+        return matches | exact, False
+
 
 @admin.register(Signer)
 class SignerAdmin(admin.ModelAdmin):
@@ -19,6 +32,19 @@ class SignerAdmin(admin.ModelAdmin):
     readonly_fields = ('signer_id', 'validation_hash', 'hash_short', 'created_at', 'updated_at')
     date_hierarchy = 'created_at'
 
+    def get_search_results(self, request, queryset, search_term):
+        """Búsqueda por email/ORCID exacto o por el índice de nombre, afiliación y disciplina"""
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        matches = filter_signers(queryset, term)
+        # Mismas expresiones que las restricciones únicas: usan sus índices
+        exact = queryset.alias(
+            email_key=Lower(Trim('email')),
+            orcid_key=Upper(Trim('orcid')),
+        ).filter(Q(email_key=term.lower()) | Q(orcid_key=term.upper()))
+        return matches | exact, False
+
     fieldsets = (
         ('Identificación', {
             'fields': ('signer_id', 'validation_hash', 'hash_short')
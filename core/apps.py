@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # Precompilar los catálogos de etiquetas traducidas por idioma
+        from .catalogs import build_catalogs
+        build_catalogs()
+
+        # Registrar señales (invalidación de caché de declaraciones)
+        from . import signals  # noqa: F401
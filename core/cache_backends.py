@@ -0,0 +1,75 @@
+"""
+Backends de caché propios
+"""
+import random
+import threading
+from collections import OrderedDict
+
+from django.core.cache.backends.filebased import FileBasedCache
+
+# Orden de uso de los archivos por directorio de caché (los objetos de caché de
+# Django son uno por hilo; el orden se comparte entre los hilos del proceso)
+_recency = {}
+_recency_lock = threading.Lock()
+
+
+class LRUFileBasedCache(FileBasedCache):
+    """
+    FileBasedCache con desalojo LRU aproximado.
+
+    El backend de Django elimina entradas al azar al llegar a MAX_ENTRIES.
+    Aquí cada proceso recuerda en memoria el orden en que usó (leyó o escribió)
+    los archivos, sin tocar el disco en las lecturas, y la limpieza elimina
+    primero los archivos que este proceso no usó (en orden aleatorio, como
+    Django) y después los usados hace más tiempo, sin consultar el mtime de
+    cada archivo.
+    """
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        with _recency_lock:
+            self._recency = _recency.setdefault(self._dir, OrderedDict())
+
+    def _touch(self, fname):
+        with _recency_lock:
+            self._recency[fname] = None
+            self._recency.move_to_end(fname)
+            while len(self._recency) > self._max_entries:
+                self._recency.popitem(last=False)
+
+    def get(self, key, default=None, version=None):
+        sentinel = object()
+        value = super().get(key, sentinel, version)
+        if value is sentinel:
+            return default
+        self._touch(self._key_to_file(key, version))
+        return value
+
+    def set(self, key, value, timeout=None, version=None):
+        super().set(key, value, timeout, version)
+        self._touch(self._key_to_file(key, version))
+
+    def _delete(self, fname):
+        with _recency_lock:
+            self._recency.pop(fname, None)
+        return super()._delete(fname)
+
+    def clear(self):
+        super().clear()
+        with _recency_lock:
+            self._recency.clear()
+
+    def _cull(self):
+        filelist = self._list_cache_files()
+        num_entries = len(filelist)
+        if num_entries < self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            return self.clear()
+
+        with _recency_lock:
+            rank = {fname: position for position, fname in enumerate(self._recency, 1)}
+        random.shuffle(filelist)
+        filelist.sort(key=lambda fname: rank.get(fname, 0))
+        for fname in filelist[:int(num_entries / self._cull_frequency)]:
+            self._delete(fname)
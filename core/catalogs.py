@@ -0,0 +1,118 @@
+"""
+Precompiled per-language label catalogs
+Immutable lookup tables built once per language at startup (CoreConfig.ready)
+so renderers and wizard views don't rebuild translated lists on every request
+"""
+from types import MappingProxyType
+
+from django.conf import settings
+
+from .constants import CONTENT_USE_MODES, CC_LICENSES
+from .translations import (
+    TRANSLATIONS,
+    get_translation,
+    get_translated_usage_types,
+    get_translated_steps_labels,
+    get_translated_checklist,
+    get_translated_content_modes,
+    get_translated_review_levels,
+    get_translated_glossary,
+)
+
+
+def _freeze(value):
+    """Recursively convert dicts/lists into read-only mappings/tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class LabelCatalog:
+    """Read-only translated labels for a single language with O(1) lookups"""
+
+    __slots__ = (
+        'lang',
+        # Lists in display order (wizard templates)
+        'usage_types', 'steps_labels', 'checklist', 'content_modes',
+        'review_levels', 'licenses', 'glossary',
+        # Lookup tables (renderers)
+        'usage_labels', 'mode_labels', 'other_modes', 'review_levels_by_level',
+        'checklist_questions', 'license_labels',
+    )
+
+    def __init__(self, lang):
+        self.lang = lang
+
+        self.usage_types = _freeze(get_translated_usage_types(lang))
+        self.steps_labels = _freeze(get_translated_steps_labels(lang))
+        self.checklist = _freeze(get_translated_checklist(lang))
+        self.content_modes = _freeze(get_translated_content_modes(lang))
+        self.licenses = _freeze(CC_LICENSES)
+        self.glossary = _freeze(get_translated_glossary(lang))
+
+        review_levels = []
+        for level in get_translated_review_levels(lang):
+            label_parts = level['label'].split(':', 1)
+            level['short_label'] = label_parts[1].strip() if len(label_parts) > 1 else level['label']
+            review_levels.append(level)
+        self.review_levels = _freeze(review_levels)
+
+        self.usage_labels = MappingProxyType({ut['value']: ut['label'] for ut in self.usage_types})
+        # Stored modes may be Spanish (canonical) or already translated; the
+        # last entry of CONTENT_USE_MODES/content_modes is always "Other"
+        self.mode_labels = MappingProxyType(dict(zip(CONTENT_USE_MODES[:-1], self.content_modes[:-1])))
+        self.other_modes = frozenset((CONTENT_USE_MODES[-1], self.content_modes[-1]))
+        self.review_levels_by_level = MappingProxyType({rl['level']: rl for rl in self.review_levels})
+        self.checklist_questions = MappingProxyType({item['id']: item['q'] for item in self.checklist})
+        self.license_labels = MappingProxyType({lic['value']: lic['label'] for lic in self.licenses})
+
+    def usage_label(self, usage_type, custom_usage_type=''):
+        """Get label for a usage type"""
+        if usage_type == 'other':
+            return custom_usage_type or self.usage_labels['other']
+        label = self.usage_labels.get(usage_type)
+        if label is None:
+            return get_translation(f'usage_{usage_type}', self.lang)
+        return label
+
+    def content_mode_label(self, mode, custom_content_use_mode=''):
+        """Translate a stored content use mode (Spanish or already translated)"""
+        if mode in self.other_modes:
+            return custom_content_use_mode or self.content_modes[-1]
+        return self.mode_labels.get(mode, mode)
+
+    def review_level(self, level):
+        """Get review level information or None"""
+        return self.review_levels_by_level.get(level)
+
+    def checklist_question(self, item_id):
+        """Get the translated checklist question or None"""
+        return self.checklist_questions.get(item_id)
+
+    def license_label(self, license_value):
+        """Get license label (licenses are the same across languages)"""
+        return self.license_labels.get(license_value, license_value)
+
+
+_CATALOGS = {}
+
+
+def build_catalogs(languages=None):
+    """Build catalogs for the given languages (defaults to settings.LANGUAGES)"""
+    if languages is None:
+        languages = [code for code, _ in settings.LANGUAGES]
+    for lang in languages:
+        _CATALOGS[lang] = LabelCatalog(lang)
+    return _CATALOGS
+
+
+def get_catalog(lang='es'):
+    """Get the catalog for a language, falling back to Spanish like get_translation"""
+    if lang not in TRANSLATIONS:
+        lang = 'es'
+    catalog = _CATALOGS.get(lang)
+    if catalog is None:
+        catalog = _CATALOGS[lang] = LabelCatalog(lang)
+    return catalog
@@ -0,0 +1,180 @@
+"""
+Exportación masiva en streaming de declaraciones y firmantes
+Genera filas JSONL o CSV a partir de QuerySet.iterator(), de modo que la
+memoria se mantiene constante sin importar el tamaño de la tabla. Lo usan
+el comando `manage.py export_data` y la vista protegida `export_data`.
+"""
+import csv
+import json
+import zlib
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from .models import Declaration, Signer
+from .utils import build_declaration_payload
+
+EXPORT_KINDS = ('declarations', 'signers')
+EXPORT_FORMATS = ('jsonl', 'csv')
+EXPORT_CHUNK_SIZE = 2000
+
+DECLARATION_CSV_HEADER = [
+    'ID', 'Hash', 'Fecha', 'Borrador', 'Tipos de uso', 'Herramienta', 'Versión',
+    'Proveedor', 'Fecha herramienta', 'Propósito', 'Nivel de revisión', 'Licencia',
+]
+
+SIGNER_CSV_HEADER = [
+    'Nombre', 'Email', 'ORCID', 'Afiliación', 'Disciplina',
+    'País', 'Hash', 'Verificado', 'Público', 'Fecha',
+]
+
+
+class _LineBuffer:
+    """Destino para csv.writer que retorna la línea escrita en lugar de guardarla"""
+
+    def write(self, value):
+        return value
+
+
+def _start_of_day(day):
+    """Inicio del día `day` en la zona horaria actual (aware)"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def filter_queryset(queryset, since=None, until=None, min_id=None, max_id=None):
+    """
+    Aplica filtros de rango de fechas (created_at, días inclusivos en la zona
+    horaria actual) y de id (pk). Las fechas se comparan como rango de
+    datetimes sobre la columna, sin convertirla a fecha, para usar su índice.
+    """
+    if since:
+        queryset = queryset.filter(created_at__gte=_start_of_day(since))
+    if until:
+        queryset = queryset.filter(created_at__lt=_start_of_day(until + timedelta(days=1)))
+    if min_id is not None:
+        queryset = queryset.filter(pk__gte=min_id)
+    if max_id is not None:
+        queryset = queryset.filter(pk__lte=max_id)
+    # Orden por pk: recorrido por índice sin ordenar toda la tabla
+    return queryset.order_by('pk')
+
+
+def get_export_queryset(kind, **filters):
+    """QuerySet filtrado para el tipo de exportación"""
+    model = Declaration if kind == 'declarations' else Signer
+    return filter_queryset(model.objects.all(), **filters)
+
+
+def _declaration_jsonl(declaration, lang):
+    payload = build_declaration_payload(declaration, declaration.validation_hash, lang)
+    return json.dumps(payload, ensure_ascii=False) + '\n'
+
+
+def _declaration_csv(declaration):
+    return [
+        declaration.declaration_id,
+        declaration.validation_hash,
+        declaration.created_at.isoformat(),
+        'Sí' if declaration.is_draft else 'No',
+        ';'.join(declaration.usage_types),
+        declaration.ai_tool_name,
+        declaration.ai_tool_version,
+        declaration.ai_tool_provider,
+        f"{declaration.ai_tool_date_year}-{str(declaration.ai_tool_date_month).zfill(2)}",
+        declaration.specific_purpose,
+        declaration.human_review_level,
+        declaration.license,
+    ]
+
+
+def _signer_jsonl(signer):
+    payload = {
+        'id': signer.signer_id,
+        'hashShort': signer.hash_short,
+        'validationHash': signer.validation_hash,
+        'fullName': signer.full_name,
+        'email': signer.email,
+        'orcid': signer.orcid,
+        'orcidVerified': signer.orcid_verified,
+        'affiliation': signer.affiliation,
+        'affiliationRorId': signer.affiliation_ror_id or None,
+        'discipline': signer.discipline,
+        'country': signer.country or None,
+        'publicListing': signer.public_listing,
+        'timestamp': signer.created_at.isoformat(),
+    }
+    return json.dumps(payload, ensure_ascii=False) + '\n'
+
+
+def _signer_csv(signer):
+    return [
+        signer.full_name,
+        signer.email,
+        signer.orcid,
+        signer.affiliation,
+        signer.discipline,
+        signer.country or '',
+        signer.hash_short,
+        'Sí' if signer.orcid_verified else 'No',
+        'Sí' if signer.public_listing else 'No',
+        signer.created_at.strftime('%d/%m/%Y %H:%M'),
+    ]
+
+
+def iter_export_rows(kind, queryset, fmt='jsonl', lang='es', chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Genera las líneas (str) de la exportación, una por registro.
+
+    Args:
+        kind: 'declarations' o 'signers'
+        queryset: QuerySet del modelo correspondiente (ver get_export_queryset)
+        fmt: 'jsonl' o 'csv'
+        lang: Idioma de las etiquetas del JSON de declaraciones
+        chunk_size: Registros por lote leídos de la base de datos
+    """
+    rows = queryset.iterator(chunk_size=chunk_size)
+
+    if fmt == 'jsonl':
+        if kind == 'declarations':
+            for declaration in rows:
+                yield _declaration_jsonl(declaration, lang)
+        else:
+            for signer in rows:
+                yield _signer_jsonl(signer)
+        return
+
+    writer = csv.writer(_LineBuffer())
+    if kind == 'declarations':
+        yield writer.writerow(DECLARATION_CSV_HEADER)
+        for declaration in rows:
+            yield writer.writerow(_declaration_csv(declaration))
+    else:
+        yield writer.writerow(SIGNER_CSV_HEADER)
+        for signer in rows:
+            yield writer.writerow(_signer_csv(signer))
+
+
+def iter_encoded(lines, compress=False, flush_bytes=64 * 1024):
+    """
+    Codifica las líneas en UTF-8 y opcionalmente las comprime con gzip
+    de forma incremental, agrupando en bloques de ~flush_bytes.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    buffer = []
+    size = 0
+    for line in lines:
+        data = line.encode('utf-8')
+        buffer.append(data)
+        size += len(data)
+        if size >= flush_bytes:
+            block = b''.join(buffer)
+            buffer, size = [], 0
+            if compressor:
+                block = compressor.compress(block)
+            if block:
+                yield block
+    block = b''.join(buffer)
+    if compressor:
+        block = compressor.compress(block) + compressor.flush()
+    if block:
+        yield block
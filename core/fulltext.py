@@ -0,0 +1,497 @@
+"""
+Índices de texto completo de declaraciones y del directorio de firmantes
+
+Declaraciones (herramienta, propósito, prompts y contexto de uso del contenido):
+- SQLite: tabla virtual FTS5 `core_declaration_fts` (rowid = pk de la declaración),
+  ordenada por bm25.
+- PostgreSQL: tabla `core_declaration_search` con un tsvector ponderado e índice
+  GIN, ordenada por ts_rank.
+
+Firmantes (nombre, afiliación y disciplina, sin distinguir acentos):
+- SQLite: tabla virtual FTS5 `core_signer_fts` con índice de prefijos para
+  búsquedas mientras se escribe.
+- PostgreSQL: tabla `core_signer_search` con el texto normalizado (minúsculas,
+  sin acentos) e índice GIN de trigramas (pg_trgm).
+
+Los índices se actualizan al guardar/eliminar (core/signals.py). Las escrituras
+que no pasan por save() (bulk_create, QuerySet.update) deben llamar a
+rebuild_search_index()/rebuild_signer_index() o al comando
+`manage.py rebuild_search_index`. En otros motores se usa `icontains` como respaldo.
+"""
+import re
+import unicodedata
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_BATCH_SIZE = 2000
+
+SQLITE_TABLE = 'core_declaration_fts'
+POSTGRES_TABLE = 'core_declaration_search'
+
+# Pesos por columna (herramienta, propósito, prompts, contexto)
+SQLITE_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+POSTGRES_WEIGHTS = ('A', 'B', 'C', 'D')
+
+# Diccionario sin stemming: el contenido puede estar en cualquier idioma
+POSTGRES_CONFIG = 'simple'
+
+TERM_RE = re.compile(r'[^\W_]+')
+MAX_TERMS = 16
+
+
+def fold_text(value):
+    """Texto en minúsculas y sin acentos (José Muñoz -> jose munoz)"""
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def search_terms(query):
+    """Términos de búsqueda (palabras) del texto ingresado, en minúsculas y sin acentos"""
+    return TERM_RE.findall(fold_text(query))[:MAX_TERMS]
+
+
+def search_document(declaration):
+    """Columnas indexadas de una declaración: (herramienta, propósito, prompts, contexto)"""
+    tool = ' '.join(filter(None, [declaration.ai_tool_name, declaration.ai_tool_provider]))
+    prompts = '\n'.join(
+        p.get('description', '') for p in (declaration.prompts or []) if isinstance(p, dict)
+    )
+    return (
+        tool,
+        declaration.specific_purpose or '',
+        prompts,
+        declaration.content_use_context or '',
+    )
+
+
+def _sqlite_match(terms):
+    # Cada término entre comillas (sin sintaxis FTS5 del usuario) y como prefijo
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def _postgres_match(terms):
+    return ' & '.join(f'{term}:*' for term in terms)
+
+
+_POSTGRES_DOCUMENT = ' || '.join(
+    f"setweight(to_tsvector('{POSTGRES_CONFIG}', %s), '{weight}')" for weight in POSTGRES_WEIGHTS
+)
+
+
+def create_search_index(connection):
+    """Crea la tabla del índice para el motor de la conexión (idempotente)"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_TABLE} USING fts5("
+                "tool, purpose, prompts, context, tokenize='unicode61 remove_diacritics 2')"
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {POSTGRES_TABLE} ("
+                "declaration_id bigint PRIMARY KEY REFERENCES core_declaration (id) "
+                "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+                "document tsvector NOT NULL)"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {POSTGRES_TABLE}_document_gin "
+                f"ON {POSTGRES_TABLE} USING gin (document)"
+            )
+
+
+def drop_search_index(connection):
+    """Elimina la tabla del índice"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f"DROP TABLE IF EXISTS {SQLITE_TABLE}")
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f"DROP TABLE IF EXISTS {POSTGRES_TABLE}")
+
+
+def index_declarations(declarations, using='default'):
+    """Inserta o reemplaza las declaraciones en el índice"""
+    connection = connections[using]
+    rows = [(d.pk, *search_document(d)) for d in declarations]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.executemany(f"DELETE FROM {SQLITE_TABLE} WHERE rowid = %s", [(row[0],) for row in rows])
+            cursor.executemany(
+                f"INSERT INTO {SQLITE_TABLE} (rowid, tool, purpose, prompts, context) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                rows,
+            )
+        elif connection.vendor == 'postgresql':
+            # Sin acentos, igual que los términos de búsqueda (el diccionario 'simple' no los quita)
+            cursor.executemany(
+                f"INSERT INTO {POSTGRES_TABLE} (declaration_id, document) "
+                f"VALUES (%s, {_POSTGRES_DOCUMENT}) "
+                "ON CONFLICT (declaration_id) DO UPDATE SET document = EXCLUDED.document",
+                [(row[0], *map(fold_text, row[1:])) for row in rows],
+            )
+
+
+def index_declaration(declaration, using='default'):
+    """Actualiza una declaración en el índice (llamado en post_save)"""
+    index_declarations([declaration], using=using)
+
+
+def unindex_declaration(pk, using='default'):
+    """Quita una declaración del índice (en PostgreSQL lo hace ON DELETE CASCADE)"""
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SQLITE_TABLE} WHERE rowid = %s", [pk])
+
+
+def rebuild_search_index(queryset, using='default', batch_size=SEARCH_BATCH_SIZE):
+    """
+    Reconstruye el índice completo a partir del QuerySet de declaraciones.
+    Retorna el número de declaraciones indexadas.
+    """
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f"DELETE FROM {SQLITE_TABLE}")
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f"TRUNCATE {POSTGRES_TABLE}")
+
+    fields = ('pk', 'ai_tool_name', 'ai_tool_provider', 'specific_purpose', 'prompts', 'content_use_context')
+    total = 0
+    batch = []
+    for declaration in queryset.using(using).only(*fields).order_by('pk').iterator(chunk_size=batch_size):
+        batch.append(declaration)
+        if len(batch) >= batch_size:
+            index_declarations(batch, using=using)
+            total += len(batch)
+            batch = []
+    index_declarations(batch, using=using)
+    return total + len(batch)
+
+
+def matching_declarations_sql(query, using='default'):
+    """
+    Subconsulta (RawSQL) con los pk de las declaraciones que coinciden con el
+    texto, para usar en `pk__in`. Retorna None si el motor no tiene índice o si
+    el texto no tiene términos.
+    """
+    terms = search_terms(query)
+    vendor = connections[using].vendor
+    if not terms:
+        return None
+    if vendor == 'sqlite':
+        return RawSQL(
+            f"SELECT rowid FROM {SQLITE_TABLE} WHERE {SQLITE_TABLE} MATCH %s",
+            [_sqlite_match(terms)],
+        )
+    if vendor == 'postgresql':
+        return RawSQL(
+            f"SELECT declaration_id FROM {POSTGRES_TABLE} "
+            f"WHERE document @@ to_tsquery('{POSTGRES_CONFIG}', %s)",
+            [_postgres_match(terms)],
+        )
+    return None
+
+
+def filter_declarations(queryset, query):
+    """Filtra el QuerySet por texto completo (sin ordenar por relevancia)"""
+    subquery = matching_declarations_sql(query, using=queryset.db)
+    if subquery is not None:
+        return queryset.filter(pk__in=subquery)
+    return _fallback_filter(queryset, query)
+
+
+def _fallback_filter(queryset, query):
+    condition = Q()
+    for term in search_terms(query):
+        condition &= (
+            Q(ai_tool_name__icontains=term)
+            | Q(specific_purpose__icontains=term)
+            | Q(content_use_context__icontains=term)
+        )
+    return queryset.filter(condition)
+
+
+def _ranked_ids(connection, terms, include_drafts, limit, offset):
+    draft_filter = '' if include_drafts else ' AND NOT core_declaration.is_draft'
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            weights = ', '.join(str(w) for w in SQLITE_WEIGHTS)
+            cursor.execute(
+                f"SELECT {SQLITE_TABLE}.rowid FROM {SQLITE_TABLE} "
+                f"JOIN core_declaration ON core_declaration.id = {SQLITE_TABLE}.rowid "
+                f"WHERE {SQLITE_TABLE} MATCH %s{draft_filter} "
+                f"ORDER BY bm25({SQLITE_TABLE}, {weights}), {SQLITE_TABLE}.rowid DESC "
+                "LIMIT %s OFFSET %s",
+                [_sqlite_match(terms), limit, offset],
+            )
+        else:
+            cursor.execute(
+                f"SELECT s.declaration_id FROM {POSTGRES_TABLE} s "
+                "JOIN core_declaration ON core_declaration.id = s.declaration_id, "
+                f"to_tsquery('{POSTGRES_CONFIG}', %s) query "
+                f"WHERE s.document @@ query{draft_filter} "
+                "ORDER BY ts_rank(s.document, query) DESC, s.declaration_id DESC "
+                "LIMIT %s OFFSET %s",
+                [_postgres_match(terms), limit, offset],
+            )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_declarations(query, page=1, page_size=SEARCH_PAGE_SIZE, include_drafts=False, using='default'):
+    """
+    Búsqueda de texto completo ordenada por relevancia y paginada.
+
+    Returns:
+        dict con 'items' (declaraciones de la página, en orden de relevancia),
+        'page', 'has_next' y 'has_previous'. No se calcula el total de
+        coincidencias: se lee un registro extra para saber si hay página siguiente.
+    """
+    from .models import Declaration
+
+    page = max(1, page)
+    result = {'items': [], 'page': page, 'has_next': False, 'has_previous': page > 1}
+    terms = search_terms(query)
+    if not terms:
+        return result
+
+    connection = connections[using]
+    offset = (page - 1) * page_size
+    if connection.vendor in ('sqlite', 'postgresql'):
+        ids = _ranked_ids(connection, terms, include_drafts, page_size + 1, offset)
+        result['has_next'] = len(ids) > page_size
+        ids = ids[:page_size]
+        declarations = Declaration.objects.using(using).in_bulk(ids)
+        result['items'] = [declarations[pk] for pk in ids if pk in declarations]
+        return result
+
+    queryset = _fallback_filter(Declaration.objects.using(using), query)
+    if not include_drafts:
+        queryset = queryset.filter(is_draft=False)
+    items = list(queryset.order_by('-created_at', '-pk')[offset:offset + page_size + 1])
+    result['has_next'] = len(items) > page_size
+    result['items'] = items[:page_size]
+    return result
+
+
+# Directorio de firmantes
+
+SIGNER_SQLITE_TABLE = 'core_signer_fts'
+SIGNER_POSTGRES_TABLE = 'core_signer_search'
+SIGNER_SEARCH_PAGE_SIZE = 50
+
+
+def signer_document(signer):
+    """Columnas indexadas de un firmante: (nombre, afiliación, disciplina)"""
+    return (signer.full_name or '', signer.affiliation or '', signer.discipline or '')
+
+
+def create_signer_index(connection):
+    """Crea la tabla del índice de firmantes para el motor de la conexión (idempotente)"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {SIGNER_SQLITE_TABLE} USING fts5("
+                "full_name, affiliation, discipline, "
+                "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {SIGNER_POSTGRES_TABLE} ("
+                "signer_id bigint PRIMARY KEY REFERENCES core_signer (id) "
+                "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+                "document text NOT NULL)"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {SIGNER_POSTGRES_TABLE}_document_trgm "
+                f"ON {SIGNER_POSTGRES_TABLE} USING gin (document gin_trgm_ops)"
+            )
+
+
+def drop_signer_index(connection):
+    """Elimina la tabla del índice de firmantes"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f"DROP TABLE IF EXISTS {SIGNER_SQLITE_TABLE}")
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f"DROP TABLE IF EXISTS {SIGNER_POSTGRES_TABLE}")
+
+
+def index_signers(signers, using='default'):
+    """Inserta o reemplaza los firmantes en el índice"""
+    connection = connections[using]
+    rows = [(s.pk, *signer_document(s)) for s in signers]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.executemany(f"DELETE FROM {SIGNER_SQLITE_TABLE} WHERE rowid = %s", [(row[0],) for row in rows])
+            cursor.executemany(
+                f"INSERT INTO {SIGNER_SQLITE_TABLE} (rowid, full_name, affiliation, discipline) "
+                "VALUES (%s, %s, %s, %s)",
+                rows,
+            )
+        elif connection.vendor == 'postgresql':
+            # El texto se normaliza en Python: unaccent() no es IMMUTABLE y no sirve en índices.
+            # Los términos de menos de 3 caracteres no usan el índice de trigramas.
+            cursor.executemany(
+                f"INSERT INTO {SIGNER_POSTGRES_TABLE} (signer_id, document) VALUES (%s, %s) "
+                "ON CONFLICT (signer_id) DO UPDATE SET document = EXCLUDED.document",
+                [(row[0], fold_text(' '.join(row[1:]))) for row in rows],
+            )
+
+
+def index_signer(signer, using='default'):
+    """Actualiza un firmante en el índice (llamado en post_save)"""
+    index_signers([signer], using=using)
+
+
+def unindex_signer(pk, using='default'):
+    """Quita un firmante del índice (en PostgreSQL lo hace ON DELETE CASCADE)"""
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SIGNER_SQLITE_TABLE} WHERE rowid = %s", [pk])
+
+
+def rebuild_signer_index(queryset, using='default', batch_size=SEARCH_BATCH_SIZE):
+    """
+    Reconstruye el índice de firmantes a partir del QuerySet.
+    Retorna el número de firmantes indexados.
+    """
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f"DELETE FROM {SIGNER_SQLITE_TABLE}")
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f"TRUNCATE {SIGNER_POSTGRES_TABLE}")
+
+    fields = ('pk', 'full_name', 'affiliation', 'discipline')
+    total = 0
+    batch = []
+    for signer in queryset.using(using).only(*fields).order_by('pk').iterator(chunk_size=batch_size):
+        batch.append(signer)
+        if len(batch) >= batch_size:
+            index_signers(batch, using=using)
+            total += len(batch)
+            batch = []
+    index_signers(batch, using=using)
+    return total + len(batch)
+
+
+def matching_signers_sql(query, using='default'):
+    """Subconsulta (RawSQL) con los pk de los firmantes que coinciden, para `pk__in`"""
+    terms = search_terms(query)
+    vendor = connections[using].vendor
+    if not terms:
+        return None
+    if vendor == 'sqlite':
+        return RawSQL(
+            f"SELECT rowid FROM {SIGNER_SQLITE_TABLE} WHERE {SIGNER_SQLITE_TABLE} MATCH %s",
+            [_sqlite_match(terms)],
+        )
+    if vendor == 'postgresql':
+        return RawSQL(
+            f"SELECT signer_id FROM {SIGNER_POSTGRES_TABLE} WHERE "
+            + ' AND '.join(['document LIKE %s'] * len(terms)),
+            [f'%{term}%' for term in terms],
+        )
+    return None
+
+
+def filter_signers(queryset, query):
+    """Filtra el QuerySet de firmantes por nombre, afiliación o disciplina (sin ordenar)"""
+    subquery = matching_signers_sql(query, using=queryset.db)
+    if subquery is not None:
+        return queryset.filter(pk__in=subquery)
+    condition = Q()
+    for term in search_terms(query):
+        condition &= (
+            Q(full_name__icontains=term)
+            | Q(affiliation__icontains=term)
+            | Q(discipline__icontains=term)
+        )
+    return queryset.filter(condition)
+
+
+def _ranked_signer_ids(connection, terms, filters, limit, offset):
+    conditions = ['core_signer.public_listing = %s']
+    params = [True]
+    for column, value in filters.items():
+        conditions.append(f'core_signer.{column} = %s')
+        params.append(value)
+    where = ' AND '.join(conditions)
+
+    # Orden del directorio (más recientes primero, por pk): a diferencia de bm25 o
+    # similarity(), no exige puntuar todas las coincidencias y el LIMIT corta el
+    # recorrido del índice, lo que mantiene rápidos los prefijos cortos ("jo")
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                f"SELECT {SIGNER_SQLITE_TABLE}.rowid FROM {SIGNER_SQLITE_TABLE} "
+                f"JOIN core_signer ON core_signer.id = {SIGNER_SQLITE_TABLE}.rowid "
+                f"WHERE {SIGNER_SQLITE_TABLE} MATCH %s AND {where} "
+                f"ORDER BY {SIGNER_SQLITE_TABLE}.rowid DESC "
+                "LIMIT %s OFFSET %s",
+                [_sqlite_match(terms), *params, limit, offset],
+            )
+        else:
+            term_conditions = ' AND '.join(['s.document LIKE %s'] * len(terms))
+            cursor.execute(
+                f"SELECT s.signer_id FROM {SIGNER_POSTGRES_TABLE} s "
+                "JOIN core_signer ON core_signer.id = s.signer_id "
+                f"WHERE {term_conditions} AND {where} "
+                "ORDER BY s.signer_id DESC "
+                "LIMIT %s OFFSET %s",
+                [*(f'%{term}%' for term in terms), *params, limit, offset],
+            )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_signers(query, filters=None, page=1, page_size=SIGNER_SEARCH_PAGE_SIZE, fields=None, using='default'):
+    """
+    Búsqueda de firmantes públicos por nombre, afiliación o disciplina,
+    paginada y ordenada como el directorio (más recientes primero).
+
+    Args:
+        query: Texto ingresado (sin distinguir mayúsculas ni acentos)
+        filters: dict de igualdades sobre columnas de Signer
+                 ('country', 'discipline', 'orcid_verified')
+        fields: Columnas a cargar (None = todas)
+
+    Returns:
+        dict con 'items', 'page', 'has_next' y 'has_previous' (ver search_declarations)
+    """
+    from .models import Signer
+
+    filters = filters or {}
+    page = max(1, page)
+    result = {'items': [], 'page': page, 'has_next': False, 'has_previous': page > 1}
+    terms = search_terms(query)
+    if not terms:
+        return result
+
+    connection = connections[using]
+    offset = (page - 1) * page_size
+    queryset = Signer.objects.using(using)
+    if fields:
+        queryset = queryset.only(*fields)
+
+    if connection.vendor in ('sqlite', 'postgresql'):
+        ids = _ranked_signer_ids(connection, terms, filters, page_size + 1, offset)
+        result['has_next'] = len(ids) > page_size
+        ids = ids[:page_size]
+        signers = queryset.in_bulk(ids)
+        result['items'] = [signers[pk] for pk in ids if pk in signers]
+        return result
+
+    queryset = filter_signers(queryset.filter(public_listing=True, **filters), query)
+    items = list(queryset.order_by('-pk')[offset:offset + page_size + 1])
+    result['has_next'] = len(items) > page_size
+    result['items'] = items[:page_size]
+    return result
@@ -0,0 +1,166 @@
+"""
+Asignación de identificadores públicos (declaration_id, signer_id)
+
+Cada ID es el valor de un contador por tipo, pasado por una permutación con
+clave (red de Feistel sobre 35 bits) y escrito en base32 de Crockford (sin
+I, L, O ni U) con un carácter de control al final: 7 + 1 = 8 caracteres,
+únicos, no secuenciales y fáciles de dictar o copiar.
+
+El contador vive en la tabla `Counter` y cada proceso reserva bloques de
+IDENTIFIER_BLOCK_SIZE valores con un UPDATE atómico, por lo que la mayoría
+de las asignaciones no tocan la base de datos y los workers de gunicorn
+nunca reciben el mismo valor. La permutación es biyectiva: valores distintos
+del contador producen siempre IDs distintos.
+"""
+import hashlib
+import hmac
+import os
+import threading
+
+from django.conf import settings
+from django.db import connections
+
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+PAYLOAD_LENGTH = 7
+PAYLOAD_BITS = 5 * PAYLOAD_LENGTH
+
+# Red de Feistel balanceada sobre 36 bits; los valores fuera de 35 bits se
+# vuelven a cifrar (cycle walking) hasta caer en el dominio
+FEISTEL_HALF_BITS = (PAYLOAD_BITS + 1) // 2
+FEISTEL_HALF_MASK = (1 << FEISTEL_HALF_BITS) - 1
+FEISTEL_ROUNDS = 4
+
+# Tipos de identificador (namespace -> clave del contador en `Counter`)
+DECLARATION = 'declaration'
+SIGNER = 'signer'
+COUNTER_KEYS = {
+    DECLARATION: 'ids:declaration',
+    SIGNER: 'ids:signer',
+}
+
+
+def check_character(payload):
+    """Carácter de control Luhn mod 32 (detecta errores de un carácter y la mayoría de transposiciones)"""
+    total = 0
+    factor = 2
+    for char in reversed(payload):
+        addend = factor * ALPHABET.index(char)
+        total += addend // len(ALPHABET) + addend % len(ALPHABET)
+        factor = 1 if factor == 2 else 2
+    return ALPHABET[-total % len(ALPHABET)]
+
+
+def is_valid_identifier(value):
+    """True si `value` tiene el formato de un ID asignado por este módulo (incluido el control)"""
+    value = (value or '').strip().upper()
+    if len(value) != PAYLOAD_LENGTH + 1 or any(char not in ALPHABET for char in value):
+        return False
+    return check_character(value[:-1]) == value[-1]
+
+
+def encode(number):
+    """Número de 35 bits -> 7 caracteres base32 + carácter de control"""
+    chars = []
+    for _ in range(PAYLOAD_LENGTH):
+        number, digit = divmod(number, len(ALPHABET))
+        chars.append(ALPHABET[digit])
+    payload = ''.join(reversed(chars))
+    return payload + check_character(payload)
+
+
+class Permutation:
+    """Permutación con clave de [0, 2**35) (no secuencial pero sin colisiones)"""
+
+    def __init__(self, key, namespace):
+        # Subclave por tipo: declaraciones y firmantes no comparten secuencia
+        self._key = hmac.new(key, namespace.encode(), hashlib.sha256).digest()
+
+    def _round(self, number, half):
+        digest = hashlib.blake2b(bytes([number]) + half.to_bytes(3, 'big'), key=self._key, digest_size=4).digest()
+        return int.from_bytes(digest, 'big') & FEISTEL_HALF_MASK
+
+    def _feistel(self, value):
+        left, right = value >> FEISTEL_HALF_BITS, value & FEISTEL_HALF_MASK
+        for number in range(FEISTEL_ROUNDS):
+            left, right = right, left ^ self._round(number, right)
+        return (left << FEISTEL_HALF_BITS) | right
+
+    def __call__(self, value):
+        value = self._feistel(value)
+        while value >> PAYLOAD_BITS:
+            value = self._feistel(value)
+        return value
+
+
+class IdentifierAllocator:
+    """Reparte los valores de un bloque reservado del contador dentro del proceso"""
+
+    def __init__(self, namespace):
+        self.namespace = namespace
+        self.counter_key = COUNTER_KEYS[namespace]
+        self._lock = threading.Lock()
+        self._permutation = None
+        self._blocks = {}
+
+    def reset(self):
+        """Descarta los bloques reservados (tras un fork o al cambiar de base de datos)"""
+        self._lock = threading.Lock()
+        self._blocks = {}
+
+    def _reserve(self, size, using):
+        from .models import Counter
+        return Counter.reserve(self.counter_key, size, using=using)
+
+    def next_value(self, using='default'):
+        if connections[using].in_atomic_block:
+            # Dentro de una transacción el bloque podría revertirse y volver a
+            # reservarse: se toma un solo valor, que sigue la suerte de la transacción
+            return self._reserve(1, using)[0]
+        with self._lock:
+            start, end = self._blocks.get(using, (0, 0))
+            if start >= end:
+                start, end = self._reserve(settings.IDENTIFIER_BLOCK_SIZE, using)
+            self._blocks[using] = (start + 1, end)
+            return start
+
+    def identifier(self, value):
+        """ID de 8 caracteres correspondiente a un valor del contador"""
+        if self._permutation is None:
+            self._permutation = Permutation(settings.IDENTIFIER_KEY.encode(), self.namespace)
+        return encode(self._permutation(value % (1 << PAYLOAD_BITS)))
+
+    def allocate(self, using='default'):
+        """Nuevo ID de 8 caracteres"""
+        return self.identifier(self.next_value(using))
+
+
+_allocators = {namespace: IdentifierAllocator(namespace) for namespace in COUNTER_KEYS}
+
+
+def _reset_allocators():
+    for allocator in _allocators.values():
+        allocator.reset()
+
+
+# Un proceso hijo (gunicorn --preload, multiprocessing) no debe heredar el bloque del padre
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_allocators)
+
+
+def allocate_identifier(namespace, using='default'):
+    """Nuevo ID para `namespace` (DECLARATION o SIGNER) reservado en la base `using`"""
+    return _allocators[namespace].allocate(using)
+
+
+def reserve_identifiers(namespace, count, using='default'):
+    """
+    Reserva `count` valores consecutivos del contador de `namespace` para cargas
+    masivas (bulk_create); retorna el primero. Los IDs se obtienen con
+    `identifier_for(namespace, valor)` para cada valor del rango.
+    """
+    return _allocators[namespace]._reserve(count, using)[0]
+
+
+def identifier_for(namespace, value):
+    """ID de `namespace` correspondiente a un valor reservado del contador"""
+    return _allocators[namespace].identifier(value)
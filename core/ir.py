@@ -0,0 +1,87 @@
+"""
+Language-neutral intermediate representation of a declaration
+Built once per declaration and shared by every output format (text, JSON, ...)
+and every language, so the normalization work isn't repeated per render
+"""
+from .constants import CONTENT_USE_MODES
+
+# Canonical (Spanish) content use mode -> index in get_catalog(lang).content_modes
+_CANONICAL_MODE_INDEX = {mode: index for index, mode in enumerate(CONTENT_USE_MODES)}
+
+
+class DeclarationIR:
+    """
+    Normalized, immutable-by-convention view of a Declaration.
+
+    Content use modes are stored as the canonical index when the stored
+    value is one of CONTENT_USE_MODES, or as the raw string otherwise
+    (already-translated or free-form values are resolved per language).
+    """
+
+    __slots__ = (
+        'declaration_id', 'created_at', 'selected_checklist_ids',
+        'usage_types', 'custom_usage_type',
+        'ai_tool_name', 'ai_tool_version', 'ai_tool_provider',
+        'ai_tool_date_month', 'ai_tool_date_year', 'date_text', 'date_iso',
+        'specific_purpose', 'prompts',
+        'content_use_modes', 'custom_content_use_mode', 'content_use_context',
+        'human_review_level', 'reviewer_name', 'reviewer_role', 'license',
+    )
+
+    def __init__(self, declaration):
+        self.declaration_id = declaration.declaration_id
+        self.created_at = declaration.created_at
+        self.selected_checklist_ids = declaration.selected_checklist_ids
+
+        self.usage_types = declaration.usage_types
+        self.custom_usage_type = declaration.custom_usage_type
+
+        self.ai_tool_name = declaration.ai_tool_name
+        self.ai_tool_version = declaration.ai_tool_version
+        self.ai_tool_provider = declaration.ai_tool_provider
+        self.ai_tool_date_month = declaration.ai_tool_date_month
+        self.ai_tool_date_year = declaration.ai_tool_date_year
+        month = str(declaration.ai_tool_date_month).zfill(2)
+        self.date_text = f"{month}/{declaration.ai_tool_date_year}"
+        self.date_iso = f"{declaration.ai_tool_date_year}-{month}"
+
+        self.specific_purpose = declaration.specific_purpose
+        self.prompts = tuple(
+            p['description'] for p in declaration.prompts if p.get('description', '').strip()
+        )
+
+        self.content_use_modes = tuple(
+            _CANONICAL_MODE_INDEX.get(mode, mode) for mode in declaration.content_use_modes
+        )
+        self.custom_content_use_mode = declaration.custom_content_use_mode
+        self.content_use_context = declaration.content_use_context
+
+        self.human_review_level = declaration.human_review_level
+        self.reviewer_name = declaration.reviewer_name
+        self.reviewer_role = declaration.reviewer_role
+
+        self.license = declaration.license
+
+    def content_mode_labels(self, catalog):
+        """Resolve content use modes to labels in the catalog's language"""
+        labels = []
+        other_index = len(catalog.content_modes) - 1
+        for mode in self.content_use_modes:
+            if mode == other_index:
+                labels.append(self.custom_content_use_mode or catalog.content_modes[other_index])
+            elif isinstance(mode, int):
+                labels.append(catalog.content_modes[mode])
+            else:
+                labels.append(catalog.content_mode_label(mode, self.custom_content_use_mode))
+        return labels
+
+    def usage_labels(self, catalog):
+        """Resolve usage types to labels in the catalog's language"""
+        return [catalog.usage_label(ut, self.custom_usage_type) for ut in self.usage_types]
+
+
+def build_declaration_ir(declaration):
+    """Build the IR for a Declaration (returns it unchanged if already built)"""
+    if isinstance(declaration, DeclarationIR):
+        return declaration
+    return DeclarationIR(declaration)
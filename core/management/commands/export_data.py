@@ -0,0 +1,64 @@
+"""
+Exportación masiva en streaming de declaraciones o firmantes
+Uso: python manage.py export_data declarations --format jsonl --gzip -o declaraciones.jsonl.gz
+"""
+import sys
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.exports import (
+    EXPORT_KINDS,
+    EXPORT_FORMATS,
+    EXPORT_CHUNK_SIZE,
+    get_export_queryset,
+    iter_export_rows,
+    iter_encoded,
+)
+
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Fecha inválida (usa AAAA-MM-DD): {value}")
+
+
+class Command(BaseCommand):
+    help = 'Exporta declaraciones o firmantes en JSONL o CSV sin cargar la tabla en memoria'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=EXPORT_KINDS)
+        parser.add_argument('--format', dest='fmt', choices=EXPORT_FORMATS, default='jsonl')
+        parser.add_argument('--gzip', action='store_true', help='Comprimir la salida con gzip')
+        parser.add_argument('-o', '--output', help='Archivo de salida (por defecto stdout)')
+        parser.add_argument('--since', type=_parse_date, help='Fecha de creación mínima (AAAA-MM-DD)')
+        parser.add_argument('--until', type=_parse_date, help='Fecha de creación máxima (AAAA-MM-DD)')
+        parser.add_argument('--min-id', type=int, help='pk mínimo')
+        parser.add_argument('--max-id', type=int, help='pk máximo')
+        parser.add_argument('--lang', default='es', help='Idioma de las etiquetas del JSON de declaraciones')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        queryset = get_export_queryset(
+            options['kind'],
+            since=options['since'],
+            until=options['until'],
+            min_id=options['min_id'],
+            max_id=options['max_id'],
+        )
+        lines = iter_export_rows(
+            options['kind'], queryset, options['fmt'], options['lang'], options['chunk_size']
+        )
+        blocks = iter_encoded(lines, compress=options['gzip'])
+
+        if options['output']:
+            with open(options['output'], 'wb') as f:
+                for block in blocks:
+                    f.write(block)
+            self.stderr.write(self.style.SUCCESS(f"✓ Exportación escrita en: {options['output']}"))
+        else:
+            out = sys.stdout.buffer
+            for block in blocks:
+                out.write(block)
+            out.flush()
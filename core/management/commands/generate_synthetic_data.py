@@ -0,0 +1,106 @@
+"""
+Genera declaraciones y firmantes sintéticos para pruebas de carga y de escala
+Uso: python manage.py generate_synthetic_data --declarations 2000000 --signers 300000 --workers 8 --seed 42
+Con la misma semilla y --end-date, una base vacía queda con el mismo contenido.
+"""
+import multiprocessing
+import random
+import time
+from datetime import date, datetime, time as dt_time, timedelta
+
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+
+from core.identifiers import DECLARATION, SIGNER, reserve_identifiers
+from core.models import Counter
+from core.synthetic import assign_hash_shorts, generate_batch
+
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Fecha inválida (usa AAAA-MM-DD): {value}")
+
+
+def _init_worker():
+    # Con spawn el proceso hijo parte sin Django configurado
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = 'Genera declaraciones y firmantes sintéticos con bulk_create (en lotes y en paralelo)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--declarations', type=int, default=0, help='Declaraciones a generar')
+        parser.add_argument('--signers', type=int, default=0, help='Firmantes a generar')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--workers', type=int, default=1, help='Procesos en paralelo')
+        parser.add_argument('--seed', type=int, help='Semilla (por defecto, una al azar que se informa)')
+        parser.add_argument('--days', type=int, default=730, help='Días hacia atrás que abarcan las fechas de creación')
+        parser.add_argument('--end-date', type=_parse_date, help='Fecha de la última fila (por defecto hoy)')
+        parser.add_argument('--skip-index', action='store_true', help='No reconstruir los índices de búsqueda')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        using = options['database']
+        verbosity = options['verbosity']
+        batch_size = options['batch_size']
+        if batch_size < 1 or options['workers'] < 1 or options['days'] < 1:
+            raise CommandError('--batch-size, --workers y --days deben ser positivos')
+        seed = options['seed']
+        if seed is None:
+            seed = random.SystemRandom().randrange(2**32)
+            self.stdout.write(f"Semilla: {seed}")
+
+        end_date = options['end_date'] or timezone.localdate()
+        end = timezone.make_aware(datetime.combine(end_date, dt_time.min))
+        start = end - timedelta(days=options['days'])
+
+        tasks = []
+        for kind, total in ((SIGNER, options['signers']), (DECLARATION, options['declarations'])):
+            if total <= 0:
+                continue
+            # Rango del contador reservado de una vez: el lote b usa los valores
+            # first + b * batch_size en adelante, sin depender de otros procesos
+            first = reserve_identifiers(kind, total, using=using)
+            for batch_no, offset in enumerate(range(0, total, batch_size)):
+                count = min(batch_size, total - offset)
+                tasks.append((kind, batch_no, first + offset, count, offset, total, seed, start, end, using))
+        if not tasks:
+            raise CommandError('Indica --declarations y/o --signers')
+
+        started = time.perf_counter()
+        inserted = {SIGNER: 0, DECLARATION: 0}
+        for kind, rows in self._run(tasks, options['workers']):
+            inserted[kind] += rows
+            if verbosity > 1:
+                self.stdout.write(f"  {inserted[SIGNER]} firmantes, {inserted[DECLARATION]} declaraciones")
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ {inserted[DECLARATION]} declaraciones y {inserted[SIGNER]} firmantes en {elapsed:.1f} s"
+        ))
+
+        # bulk_create no pasa por save() ni dispara señales
+        if inserted[SIGNER]:
+            updated = assign_hash_shorts(using=using, batch_size=batch_size)
+            total = Counter.recount_public_signers(using=using)
+            self.stdout.write(self.style.SUCCESS(f"✓ {updated} hashes cortos asignados, {total} firmantes públicos"))
+        if not options['skip_index']:
+            call_command('rebuild_search_index', database=using, verbosity=verbosity, stdout=self.stdout)
+
+    def _run(self, tasks, workers):
+        if workers == 1:
+            yield from map(generate_batch, tasks)
+            return
+        # Los procesos hijos no deben compartir las conexiones abiertas del padre
+        connections.close_all()
+        if 'fork' in multiprocessing.get_all_start_methods():
+            context, initializer = multiprocessing.get_context('fork'), None
+        else:
+            context, initializer = multiprocessing.get_context('spawn'), _init_worker
+        with context.Pool(workers, initializer=initializer) as pool:
+            yield from pool.imap_unordered(generate_batch, tasks)
@@ -0,0 +1,42 @@
+"""
+Reconstruye los índices de texto completo de declaraciones y firmantes
+Uso: python manage.py rebuild_search_index [--only declarations|signers]
+Necesario después de escrituras masivas que no pasan por save() (bulk_create, update).
+"""
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from core.fulltext import (
+    SEARCH_BATCH_SIZE,
+    create_search_index,
+    create_signer_index,
+    rebuild_search_index,
+    rebuild_signer_index,
+)
+from core.models import Declaration, Signer
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye los índices de texto completo de declaraciones y firmantes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--batch-size', type=int, default=SEARCH_BATCH_SIZE)
+        parser.add_argument('--only', choices=('declarations', 'signers'), help='Reconstruir solo un índice')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        connection = connections[using]
+        batch_size = options['batch_size']
+
+        if options['only'] != 'signers':
+            with transaction.atomic(using=using):
+                create_search_index(connection)
+                total = rebuild_search_index(Declaration.objects.all(), using=using, batch_size=batch_size)
+            self.stdout.write(self.style.SUCCESS(f"✓ {total} declaraciones indexadas"))
+
+        if options['only'] != 'declarations':
+            with transaction.atomic(using=using):
+                create_signer_index(connection)
+                total = rebuild_signer_index(Signer.objects.all(), using=using, batch_size=batch_size)
+            self.stdout.write(self.style.SUCCESS(f"✓ {total} firmantes indexados"))
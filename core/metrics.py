@@ -0,0 +1,362 @@
+"""
+Métricas en formato Prometheus agregadas entre los workers
+
+Cada proceso acumula en memoria contadores e histogramas (latencia por vista,
+renderizado de la declaración, reCAPTCHA, consultas SQL y escrituras de sesión)
+y un hilo por proceso escribe cada METRICS_FLUSH_INTERVAL segundos (si hubo
+cambios) una copia en su propio archivo JSON dentro de METRICS_DIR. La vista `/metrics` suma los archivos de todos los
+procesos, así la respuesta es la misma sea cual sea el worker que la atienda.
+
+Al recolectar, los archivos de los workers que ya terminaron (su pid no existe)
+se suman a un archivo de archivo (ARCHIVE_NAME) y se eliminan: los contadores no
+retroceden al reciclar workers y el directorio no crece con cada worker nuevo.
+Con METRICS_DIR vacío las métricas son solo del proceso que responde.
+
+Las mediciones por solicitud las entrega `core.timing.ServerTimingMiddleware`
+(`observe_request`); reCAPTCHA las registra `core.recaptcha` en cada llamada.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo de archivos ni consulta de pids con señal 0
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RENDER_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+
+# Suma de las métricas de los workers terminados (y su archivo de bloqueo)
+ARCHIVE_NAME = 'archive.json'
+ARCHIVE_LOCK_NAME = 'archive.lock'
+
+# nombre: (tipo, descripción, buckets)
+METRICS = {
+    'declarador_http_request_duration_seconds': (
+        'histogram', 'Duración de las solicitudes por vista (nombre de URL)', LATENCY_BUCKETS),
+    'declarador_http_requests_total': (
+        'counter', 'Solicitudes por vista, método y código de estado', None),
+    'declarador_declaration_render_duration_seconds': (
+        'histogram', 'Tiempo de generación del texto o JSON de la declaración por solicitud', RENDER_BUCKETS),
+    'declarador_recaptcha_duration_seconds': (
+        'histogram', 'Latencia de las llamadas a la API de reCAPTCHA', LATENCY_BUCKETS),
+    'declarador_recaptcha_verifications_total': (
+        'counter', 'Verificaciones reCAPTCHA por resultado', None),
+    'declarador_db_queries_total': (
+        'counter', 'Consultas SQL por vista', None),
+    'declarador_db_query_duration_seconds_total': (
+        'counter', 'Tiempo total en consultas SQL por vista', None),
+    'declarador_session_writes_total': (
+        'counter', 'Guardados de sesión de core.sessions por resultado (skipped, cache, db)', None),
+}
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+class Registry:
+    """Contadores e histogramas de un proceso"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}    # (nombre, etiquetas) -> valor
+        self.histograms = {}  # (nombre, etiquetas) -> [conteo por bucket..., +Inf, suma]
+        self.version = 0      # aumenta con cada cambio (el hilo solo escribe si cambió)
+
+    def inc(self, name, labels, amount=1):
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+            self.version += 1
+
+    def observe(self, name, value, labels):
+        buckets = METRICS[name][2]
+        key = (name, _labels(labels))
+        with self._lock:
+            series = self.histograms.get(key)
+            if series is None:
+                series = self.histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(buckets)] += 1
+            series[-1] += value
+            self.version += 1
+
+    def snapshot(self):
+        """Contenido serializable a JSON"""
+        with self._lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'histograms': [[name, list(labels), list(series)] for (name, labels), series in self.histograms.items()],
+            }
+
+
+registry = Registry()
+_file_token = uuid.uuid4().hex[:8]
+_flushed_version = None
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def _process_snapshot():
+    snapshot = registry.snapshot()
+    # Contadores que otros módulos ya llevan por proceso
+    from .sessions import write_stats
+    for result, value in sorted(write_stats.items()):
+        snapshot['counters'].append(['declarador_session_writes_total', [['result', result]], value])
+    return snapshot
+
+
+def _process_path():
+    # pid + token: un pid reutilizado no pisa el archivo de un worker anterior
+    return Path(settings.METRICS_DIR) / f'{os.getpid()}-{_file_token}.json'
+
+
+def flush():
+    """Escribe la copia de este proceso en METRICS_DIR (reemplazo atómico)"""
+    global _flushed_version
+    _flushed_version = registry.version
+    if not settings.METRICS_DIR:
+        return
+    path = _process_path()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(_process_snapshot(), separators=(',', ':')))
+        os.replace(tmp, path)
+    except OSError:
+        logger.exception("No se pudieron escribir las métricas en %s", settings.METRICS_DIR)
+
+
+def _run_flusher():
+    while True:
+        time.sleep(settings.METRICS_FLUSH_INTERVAL)
+        if registry.version != _flushed_version:
+            flush()
+
+
+def _start_flusher():
+    """Arranca el hilo de escritura del proceso (en la primera solicitud medida)"""
+    global _flusher
+    if _flusher is None and settings.METRICS_DIR:
+        with _flusher_lock:
+            if _flusher is None:
+                _flusher = threading.Thread(target=_run_flusher, name='metrics-flush', daemon=True)
+                _flusher.start()
+
+
+def observe_request(request, response, wall, timings):
+    """Registra una solicitud medida por ServerTimingMiddleware"""
+    match = getattr(request, 'resolver_match', None)
+    view = match.view_name if match else 'unmatched'
+    registry.observe('declarador_http_request_duration_seconds', wall, {'view': view})
+    registry.inc('declarador_http_requests_total',
+                 {'view': view, 'method': request.method, 'status': str(response.status_code)})
+    for phase, fmt in (('render_text', 'text'), ('render_json', 'json')):
+        if timings.counts[phase]:
+            registry.observe('declarador_declaration_render_duration_seconds',
+                             timings.durations[phase], {'format': fmt})
+    if timings.counts['sql']:
+        registry.inc('declarador_db_queries_total', {'view': view}, timings.counts['sql'])
+        registry.inc('declarador_db_query_duration_seconds_total', {'view': view}, timings.durations['sql'])
+    _start_flusher()
+
+
+def observe_recaptcha(outcome, latency=None):
+    """Resultado (y latencia, si hubo llamada a la API) de una verificación reCAPTCHA"""
+    registry.inc('declarador_recaptcha_verifications_total', {'outcome': outcome})
+    if latency is not None:
+        registry.observe('declarador_recaptcha_duration_seconds', latency, {})
+
+
+def _add_snapshot(counters, histograms, snapshot):
+    """Suma `snapshot` a los diccionarios (nombre, etiquetas) -> valor o serie"""
+    for name, labels, value in snapshot['counters']:
+        key = (name, tuple(map(tuple, labels)))
+        counters[key] = counters.get(key, 0) + value
+    for name, labels, series in snapshot['histograms']:
+        key = (name, tuple(map(tuple, labels)))
+        if key in histograms and len(histograms[key]) == len(series):
+            histograms[key] = [a + b for a, b in zip(histograms[key], series)]
+        else:
+            histograms[key] = list(series)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _dead_worker_files(directory):
+    for path in directory.glob('*-*.json'):
+        pid = path.stem.split('-', 1)[0]
+        if pid.isdigit() and int(pid) != os.getpid() and not _pid_alive(int(pid)):
+            yield path
+
+
+def archive_dead_workers():
+    """
+    Suma al archivo ARCHIVE_NAME los archivos de los procesos que ya no existen
+    y los elimina. Con el bloqueo solo un worker archiva a la vez; el archivo
+    registra los nombres ya sumados, así que un corte entre la escritura y el
+    borrado no los cuenta dos veces. Retorna cuántos archivos se archivaron.
+    """
+    if not settings.METRICS_DIR or fcntl is None:
+        return 0
+    directory = Path(settings.METRICS_DIR)
+    if not any(_dead_worker_files(directory)):
+        return 0
+
+    archive_path = directory / ARCHIVE_NAME
+    with open(directory / ARCHIVE_LOCK_NAME, 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            archive = json.loads(archive_path.read_text())
+        except FileNotFoundError:
+            archive = {'counters': [], 'histograms': [], 'merged': []}
+        except (OSError, ValueError):
+            logger.exception("Archivo de métricas ilegible: %s", archive_path)
+            return 0
+
+        counters, histograms = {}, {}
+        _add_snapshot(counters, histograms, archive)
+        merged = set(archive.get('merged', []))
+        dead = []
+        for path in _dead_worker_files(directory):
+            if path.name not in merged:
+                try:
+                    _add_snapshot(counters, histograms, json.loads(path.read_text()))
+                except (OSError, ValueError):
+                    continue
+            dead.append(path)
+        if not dead:
+            return 0
+
+        # Los nombres ya sumados se conservan mientras su archivo exista (p. ej. si el
+        # pid se reutilizó y este recorrido no lo vio como terminado)
+        merged.update(path.name for path in dead)
+        archive = {
+            'counters': [[name, list(labels), value] for (name, labels), value in counters.items()],
+            'histograms': [[name, list(labels), series] for (name, labels), series in histograms.items()],
+            'merged': sorted(name for name in merged if (directory / name).exists()),
+        }
+        tmp = archive_path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(archive, separators=(',', ':')))
+        os.replace(tmp, archive_path)
+        for path in dead:
+            path.unlink(missing_ok=True)
+    return len(dead)
+
+
+def collect():
+    """Suma las copias de todos los procesos (incluida la actual de este y las archivadas)"""
+    counters, histograms = {}, {}
+    snapshots = []
+    if settings.METRICS_DIR:
+        flush()
+        try:
+            archive_dead_workers()
+        except OSError:
+            logger.exception("No se pudieron archivar las métricas en %s", settings.METRICS_DIR)
+        # El archivo se lee al final: un worker archivado se borra después de
+        # escribirse el archivo, así que no hay lectura en que falte en ambos
+        directory = Path(settings.METRICS_DIR)
+        for path in directory.glob('*-*.json'):
+            try:
+                snapshots.append((path.name, json.loads(path.read_text())))
+            except (OSError, ValueError):
+                # Archivo a medio escribir por otra versión o borrado entre medias
+                continue
+        try:
+            archive = json.loads((directory / ARCHIVE_NAME).read_text())
+        except (OSError, ValueError):
+            archive = None
+        if archive is not None:
+            # Archivos ya sumados al archivo que aún no se borraron
+            merged = set(archive.get('merged', []))
+            snapshots = [(name, snapshot) for name, snapshot in snapshots if name not in merged]
+            snapshots.append((ARCHIVE_NAME, archive))
+    else:
+        snapshots.append((None, _process_snapshot()))
+
+    for _, snapshot in snapshots:
+        _add_snapshot(counters, histograms, snapshot)
+    return counters, histograms
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def exposition():
+    """Texto en formato de exposición de Prometheus (versión 0.0.4)"""
+    counters, histograms = collect()
+    lines = []
+    for name, (kind, description, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        if kind == 'counter':
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+            continue
+        for (metric, labels), series in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets + ('+Inf',), series):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", str(bound)),))} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(series[-1])}')
+            lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+def _reset_after_fork():
+    # Cada worker lleva sus propias métricas y su propio archivo
+    # (los hilos no sobreviven al fork)
+    global registry, _file_token, _flushed_version, _flusher, _flusher_lock
+    registry = Registry()
+    _file_token = uuid.uuid4().hex[:8]
+    _flushed_version = None
+    _flusher = None
+    _flusher_lock = threading.Lock()
+
+
+def _flush_at_exit():
+    if settings.METRICS_ENABLED:
+        flush()
+
+
+atexit.register(_flush_at_exit)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
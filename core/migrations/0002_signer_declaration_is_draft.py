@@ -1,21 +1,21 @@
 # Generated by Django 5.2.8 on 2025-12-03 03:35
 
-from django.db import migrations, models, connection
+from django.db import migrations, models
+
+
+def _has_is_draft(schema_editor):
+    """Verifica si la columna is_draft existe (introspección compatible con PostgreSQL y SQLite)"""
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        columns = connection.introspection.get_table_description(cursor, 'core_declaration')
+    return any(column.name == 'is_draft' for column in columns)
 
 
 def check_and_add_is_draft(apps, schema_editor):
     """Verifica si la columna is_draft existe antes de agregarla"""
-    with connection.cursor() as cursor:
-        # Verificar si la columna ya existe (PostgreSQL)
-        cursor.execute("""
-            SELECT column_name 
-            FROM information_schema.columns 
-            WHERE table_name='core_declaration' AND column_name='is_draft'
-        """)
-        exists = cursor.fetchone()
-        
-        if not exists:
-            # Solo agregar la columna si no existe
+    if not _has_is_draft(schema_editor):
+        # Solo agregar la columna si no existe
+        with schema_editor.connection.cursor() as cursor:
             cursor.execute("""
                 ALTER TABLE core_declaration 
                 ADD COLUMN is_draft BOOLEAN DEFAULT FALSE NOT NULL
@@ -24,15 +24,8 @@ def check_and_add_is_draft(apps, schema_editor):
 
 def reverse_add_is_draft(apps, schema_editor):
     """Elimina la columna is_draft si existe"""
-    with connection.cursor() as cursor:
-        cursor.execute("""
-            SELECT column_name 
-            FROM information_schema.columns 
-            WHERE table_name='core_declaration' AND column_name='is_draft'
-        """)
-        exists = cursor.fetchone()
-        
-        if exists:
+    if _has_is_draft(schema_editor):
+        with schema_editor.connection.cursor() as cursor:
             cursor.execute("ALTER TABLE core_declaration DROP COLUMN is_draft")
 
 
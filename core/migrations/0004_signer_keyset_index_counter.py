@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:55
+
+from django.db import migrations, models
+
+
+def backfill_public_signers(apps, schema_editor):
+    """Inicializa el contador de firmantes públicos con el total actual"""
+    Signer = apps.get_model('core', 'Signer')
+    Counter = apps.get_model('core', 'Counter')
+    Counter.objects.update_or_create(
+        key='public_signers',
+        defaults={'value': Signer.objects.filter(public_listing=True).count()},
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_signer_affiliation_ror_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=50, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Contador',
+                'verbose_name_plural': 'Contadores',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='signer',
+            index=models.Index(condition=models.Q(('public_listing', True)), fields=['-created_at', '-id'], name='signer_public_recent_idx'),
+        ),
+        migrations.RunPython(backfill_public_signers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:57
+
+from django.db import migrations, models
+from django.db.models.functions import Trim, Upper
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+def backfill_lookup_columns(apps, schema_editor):
+    """Rellena las columnas normalizadas por rangos de pk (un UPDATE por lote)"""
+    Declaration = apps.get_model('core', 'Declaration')
+    bounds = Declaration.objects.aggregate(low=models.Min('pk'), high=models.Max('pk'))
+    if bounds['low'] is None:
+        return
+    for start in range(bounds['low'], bounds['high'] + 1, BACKFILL_BATCH_SIZE):
+        Declaration.objects.filter(pk__gte=start, pk__lt=start + BACKFILL_BATCH_SIZE).update(
+            hash_lookup=Upper(Trim('validation_hash')),
+            id_lookup=Upper(Trim('declaration_id')),
+        )
+
+
+class Migration(migrations.Migration):
+
+    # Cada lote del backfill se confirma por separado (sin bloquear la tabla completa)
+    atomic = False
+
+    dependencies = [
+        ('core', '0004_signer_keyset_index_counter'),
+    ]
+
+    operations = [
+        # Columnas sin índice primero; el índice se crea después del backfill
+        migrations.AddField(
+            model_name='declaration',
+            name='hash_lookup',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='declaration',
+            name='id_lookup',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.RunPython(backfill_lookup_columns, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='declaration',
+            name='hash_lookup',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='declaration',
+            name='id_lookup',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='signer',
+            name='hash_short',
+            field=models.CharField(db_index=True, editable=False, max_length=8),
+        ),
+    ]
@@ -0,0 +1,107 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:20
+
+import unicodedata
+
+from django.db import migrations
+
+# Copia fija de core/fulltext.py al momento de la migración: las migraciones no
+# importan código de la aplicación, que puede cambiar después
+SQLITE_TABLE = 'core_declaration_fts'
+POSTGRES_TABLE = 'core_declaration_search'
+BATCH_SIZE = 2000
+
+POSTGRES_DOCUMENT = ' || '.join(
+    f"setweight(to_tsvector('simple', %s), '{weight}')" for weight in ('A', 'B', 'C', 'D')
+)
+
+
+def fold_text(value):
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def search_document(declaration):
+    """Columnas indexadas: (herramienta, propósito, prompts, contexto)"""
+    tool = ' '.join(filter(None, [declaration.ai_tool_name, declaration.ai_tool_provider]))
+    prompts = '\n'.join(
+        p.get('description', '') for p in (declaration.prompts or []) if isinstance(p, dict)
+    )
+    return (
+        tool,
+        declaration.specific_purpose or '',
+        prompts,
+        declaration.content_use_context or '',
+    )
+
+
+def index_batch(cursor, vendor, declarations):
+    rows = [(d.pk, *search_document(d)) for d in declarations]
+    if not rows:
+        return
+    if vendor == 'sqlite':
+        cursor.executemany(
+            f"INSERT INTO {SQLITE_TABLE} (rowid, tool, purpose, prompts, context) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            rows,
+        )
+    else:
+        cursor.executemany(
+            f"INSERT INTO {POSTGRES_TABLE} (declaration_id, document) VALUES (%s, {POSTGRES_DOCUMENT})",
+            [(row[0], *map(fold_text, row[1:])) for row in rows],
+        )
+
+
+def create_and_fill_index(apps, schema_editor):
+    """Crea el índice de texto completo del motor actual e indexa las declaraciones existentes"""
+    connection = schema_editor.connection
+    if connection.vendor not in ('sqlite', 'postgresql'):
+        return
+    Declaration = apps.get_model('core', 'Declaration')
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_TABLE} USING fts5("
+                "tool, purpose, prompts, context, tokenize='unicode61 remove_diacritics 2')"
+            )
+            cursor.execute(f"DELETE FROM {SQLITE_TABLE}")
+        else:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {POSTGRES_TABLE} ("
+                "declaration_id bigint PRIMARY KEY REFERENCES core_declaration (id) "
+                "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+                "document tsvector NOT NULL)"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {POSTGRES_TABLE}_document_gin "
+                f"ON {POSTGRES_TABLE} USING gin (document)"
+            )
+            cursor.execute(f"TRUNCATE {POSTGRES_TABLE}")
+
+        fields = ('pk', 'ai_tool_name', 'ai_tool_provider', 'specific_purpose', 'prompts', 'content_use_context')
+        queryset = Declaration.objects.using(connection.alias).only(*fields).order_by('pk')
+        batch = []
+        for declaration in queryset.iterator(chunk_size=BATCH_SIZE):
+            batch.append(declaration)
+            if len(batch) >= BATCH_SIZE:
+                index_batch(cursor, connection.vendor, batch)
+                batch = []
+        index_batch(cursor, connection.vendor, batch)
+
+
+def drop_index(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        if schema_editor.connection.vendor == 'sqlite':
+            cursor.execute(f"DROP TABLE IF EXISTS {SQLITE_TABLE}")
+        elif schema_editor.connection.vendor == 'postgresql':
+            cursor.execute(f"DROP TABLE IF EXISTS {POSTGRES_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_declaration_lookup_columns'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_and_fill_index, drop_index),
+    ]
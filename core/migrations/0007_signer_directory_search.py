@@ -0,0 +1,95 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:40
+
+import unicodedata
+
+from django.db import migrations, models
+
+# Copia fija de core/fulltext.py al momento de la migración (ver 0006)
+SQLITE_TABLE = 'core_signer_fts'
+POSTGRES_TABLE = 'core_signer_search'
+BATCH_SIZE = 2000
+
+
+def fold_text(value):
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def index_batch(cursor, vendor, signers):
+    rows = [(s.pk, s.full_name or '', s.affiliation or '', s.discipline or '') for s in signers]
+    if not rows:
+        return
+    if vendor == 'sqlite':
+        cursor.executemany(
+            f"INSERT INTO {SQLITE_TABLE} (rowid, full_name, affiliation, discipline) "
+            "VALUES (%s, %s, %s, %s)",
+            rows,
+        )
+    else:
+        cursor.executemany(
+            f"INSERT INTO {POSTGRES_TABLE} (signer_id, document) VALUES (%s, %s)",
+            [(row[0], fold_text(' '.join(row[1:]))) for row in rows],
+        )
+
+
+def create_and_fill_index(apps, schema_editor):
+    """Crea el índice de búsqueda de firmantes del motor actual e indexa los existentes"""
+    connection = schema_editor.connection
+    if connection.vendor not in ('sqlite', 'postgresql'):
+        return
+    Signer = apps.get_model('core', 'Signer')
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_TABLE} USING fts5("
+                "full_name, affiliation, discipline, "
+                "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+            cursor.execute(f"DELETE FROM {SQLITE_TABLE}")
+        else:
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {POSTGRES_TABLE} ("
+                "signer_id bigint PRIMARY KEY REFERENCES core_signer (id) "
+                "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+                "document text NOT NULL)"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {POSTGRES_TABLE}_document_trgm "
+                f"ON {POSTGRES_TABLE} USING gin (document gin_trgm_ops)"
+            )
+            cursor.execute(f"TRUNCATE {POSTGRES_TABLE}")
+
+        queryset = Signer.objects.using(connection.alias).only(
+            'pk', 'full_name', 'affiliation', 'discipline'
+        ).order_by('pk')
+        batch = []
+        for signer in queryset.iterator(chunk_size=BATCH_SIZE):
+            batch.append(signer)
+            if len(batch) >= BATCH_SIZE:
+                index_batch(cursor, connection.vendor, batch)
+                batch = []
+        index_batch(cursor, connection.vendor, batch)
+
+
+def drop_index(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        if schema_editor.connection.vendor == 'sqlite':
+            cursor.execute(f"DROP TABLE IF EXISTS {SQLITE_TABLE}")
+        elif schema_editor.connection.vendor == 'postgresql':
+            cursor.execute(f"DROP TABLE IF EXISTS {POSTGRES_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_declaration_fulltext_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='signer',
+            index=models.Index(condition=models.Q(('public_listing', True)), fields=['country', '-created_at', '-id'], name='signer_public_country_idx'),
+        ),
+        migrations.RunPython(create_and_fill_index, drop_index),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:00
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower, Trim, Upper
+
+
+def check_duplicates(apps, schema_editor):
+    """Aborta con un mensaje claro si ya existen emails u ORCID repetidos"""
+    Signer = apps.get_model('core', 'Signer')
+    problems = []
+    for label, expression in (('email', Lower(Trim('email'))), ('ORCID', Upper(Trim('orcid')))):
+        duplicates = (
+            Signer.objects.annotate(value=expression)
+            .values('value')
+            .annotate(total=Count('id'))
+            .filter(total__gt=1)
+            .values_list('value', flat=True)[:20]
+        )
+        problems += [f"{label} repetido: {value}" for value in duplicates]
+    if problems:
+        raise RuntimeError(
+            "No se pueden crear las restricciones únicas de firmantes. "
+            "Resuelve los duplicados en el admin y vuelve a migrar:\n" + '\n'.join(problems)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_signer_directory_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='signer',
+            constraint=models.UniqueConstraint(Lower(Trim('email')), name='signer_email_unique_ci'),
+        ),
+        migrations.AddConstraint(
+            model_name='signer',
+            constraint=models.UniqueConstraint(Upper(Trim('orcid')), name='signer_orcid_unique'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:00
+
+import os
+
+from django.db import migrations, models
+from django.db.models import Count
+
+HASH_SHORT_MIN_LENGTH = 8
+
+
+def shortest_unique_prefix(value, others, min_length=HASH_SHORT_MIN_LENGTH):
+    """Prefijo más corto (al menos min_length) de `value` que no es prefijo de ninguno de `others`"""
+    length = min_length
+    for other in others:
+        if other != value:
+            length = max(length, len(os.path.commonprefix([value, other])) + 1)
+    return value[:length]
+
+
+def extend_colliding_hash_short(apps, schema_editor):
+    """
+    Alarga los hash cortos repetidos: el firmante más antiguo de cada grupo
+    conserva su enlace de 8 caracteres y los demás reciben su prefijo único.
+    """
+    Signer = apps.get_model('core', 'Signer')
+    colliding = (
+        Signer.objects.values('hash_short')
+        .annotate(total=Count('id'))
+        .filter(total__gt=1)
+        .values_list('hash_short', flat=True)
+    )
+    for hash_short in list(colliding):
+        group = list(
+            Signer.objects.filter(hash_short=hash_short)
+            .order_by('created_at', 'pk')
+            .only('pk', 'validation_hash')
+        )
+        hashes = [signer.validation_hash for signer in group]
+        for signer in group[1:]:
+            signer.hash_short = shortest_unique_prefix(signer.validation_hash, hashes)
+            signer.save(update_fields=['hash_short'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_signer_unique_email_orcid'),
+    ]
+
+    # Primero se ensancha la columna (los prefijos alargados tienen más de 8
+    # caracteres), luego se alargan los repetidos y al final se crea el índice único
+    operations = [
+        migrations.AlterField(
+            model_name='signer',
+            name='hash_short',
+            field=models.CharField(db_index=True, editable=False, max_length=64),
+        ),
+        migrations.RunPython(extend_colliding_hash_short, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='signer',
+            name='hash_short',
+            field=models.CharField(editable=False, max_length=64, unique=True),
+        ),
+    ]
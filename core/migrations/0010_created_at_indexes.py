@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_signer_hash_short_unique'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='declaration',
+            index=models.Index(fields=['created_at'], name='declaration_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='signer',
+            index=models.Index(fields=['created_at'], name='signer_created_idx'),
+        ),
+    ]
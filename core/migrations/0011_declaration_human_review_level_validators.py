@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:17
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_created_at_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='declaration',
+            name='human_review_level',
+            field=models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(5)]),
+        ),
+    ]
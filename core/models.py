@@ -1,16 +1,111 @@
-from django.db import models
+from django.db import models, router, transaction, IntegrityError
+from django.db.models import F
+from django.db.models.functions import Lower, Trim, Upper
 import json
 import hashlib
+import os
 from datetime import datetime
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+from .identifiers import allocate_identifier, DECLARATION as DECLARATION_IDS, SIGNER as SIGNER_IDS
+
+def normalize_lookup(value):
+    """Normaliza hashes e IDs para las columnas de búsqueda (sin espacios, mayúsculas)"""
+    return (value or '').strip().upper()
+
+
+def violated_constraint(exc):
+    """
+    Nombre de la restricción violada por un IntegrityError (PostgreSQL) o el
+    mensaje del error (SQLite: "UNIQUE constraint failed: core_signer.signer_id"
+    o "UNIQUE constraint failed: index 'signer_email_unique_ci'").
+    """
+    diag = getattr(exc.__cause__, 'diag', None)
+    return getattr(diag, 'constraint_name', None) or str(exc)
+
+
+# Restricciones únicas normalizadas de Signer (usadas para identificar duplicados)
+SIGNER_EMAIL_CONSTRAINT = 'signer_email_unique_ci'
+SIGNER_ORCID_CONSTRAINT = 'signer_orcid_unique'
+
+# Reintentos de save() ante colisiones de los identificadores generados
+IDENTIFIER_SAVE_ATTEMPTS = 5
+
+# Largo mínimo del hash corto de las URLs de verificación (/v/<hash_short>/)
+HASH_SHORT_MIN_LENGTH = 8
+HEX_DIGITS = '0123456789abcdef'
+
+
+def hex_prefix_upper_bound(prefix):
+    """
+    Cota superior exclusiva del rango [prefix, bound) de los hashes hexadecimales
+    (minúsculas) que empiezan con `prefix`, o None si el prefijo es solo 'f'.
+    """
+    digits = list(prefix)
+    while digits:
+        position = HEX_DIGITS.index(digits[-1])
+        if position + 1 < len(HEX_DIGITS):
+            digits[-1] = HEX_DIGITS[position + 1]
+            return ''.join(digits)
+        digits.pop()
+    return None
+
+
+def shortest_unique_prefix(value, others, min_length=HASH_SHORT_MIN_LENGTH):
+    """
+    Prefijo más corto (al menos min_length) de `value` que no es prefijo de
+    ninguno de `others`, como las abreviaciones de git.
+    """
+    length = min_length
+    for other in others:
+        if other != value:
+            length = max(length, len(os.path.commonprefix([value, other])) + 1)
+    return value[:length]
+
+
+# Países del formulario de registro (ver COUNTRIES en signer_register.js)
+COUNTRY_FLAGS = {
+    'Alemania': '🇩🇪',
+    'Argentina': '🇦🇷',
+    'Bélgica': '🇧🇪',
+    'Bolivia': '🇧🇴',
+    'Brasil': '🇧🇷',
+    'Chile': '🇨🇱',
+    'Colombia': '🇨🇴',
+    'Costa Rica': '🇨🇷',
+    'Cuba': '🇨🇺',
+    'Ecuador': '🇪🇨',
+    'El Salvador': '🇸🇻',
+    'España': '🇪🇸',
+    'Francia': '🇫🇷',
+    'Guatemala': '🇬🇹',
+    'Honduras': '🇭🇳',
+    'Italia': '🇮🇹',
+    'México': '🇲🇽',
+    'Nicaragua': '🇳🇮',
+    'Panamá': '🇵🇦',
+    'Paraguay': '🇵🇾',
+    'Perú': '🇵🇪',
+    'Polonia': '🇵🇱',
+    'Portugal': '🇵🇹',
+    'Puerto Rico': '🇵🇷',
+    'Reino Unido': '🇬🇧',
+    'República Dominicana': '🇩🇴',
+    'Suiza': '🇨🇭',
+    'Uruguay': '🇺🇾',
+    'Venezuela': '🇻🇪',
+    'Otro': '🌍'
+}
+
+
 class Signer(models.Model):
     """Modelo para almacenar firmantes del compromiso de uso ético de IA"""
 
     # Identificadores únicos
     signer_id = models.CharField(max_length=20, unique=True, editable=False)
     validation_hash = models.CharField(max_length=64, unique=True, editable=False)
-    hash_short = models.CharField(max_length=8, editable=False)
+    # Prefijo único más corto (mínimo 8) de validation_hash; ver allocate_hash_short()
+    hash_short = models.CharField(max_length=64, unique=True, editable=False)
 
     # Información personal
     full_name = models.CharField(max_length=200)
@@ -41,20 +136,98 @@ class Signer(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Firmante'
         verbose_name_plural = 'Firmantes'
-
-    def save(self, *args, **kwargs):
-        if not self.signer_id:
-            import random
-            import string
-            self.signer_id = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
-
-        if not self.validation_hash:
+        indexes = [
+            # Paginación por keyset del directorio público (created_at, id)
+            models.Index(
+                fields=['-created_at', '-id'],
+                name='signer_public_recent_idx',
+                condition=models.Q(public_listing=True),
+            ),
+            # Directorio filtrado por país, en el mismo orden
+            models.Index(
+                fields=['country', '-created_at', '-id'],
+                name='signer_public_country_idx',
+                condition=models.Q(public_listing=True),
+            ),
+            # Exportación por rango de fechas (incluye los firmantes no públicos)
+            models.Index(fields=['created_at'], name='signer_created_idx'),
+        ]
+        constraints = [
+            # Un registro por email (sin distinguir mayúsculas) y por ORCID
+            models.UniqueConstraint(Lower(Trim('email')), name=SIGNER_EMAIL_CONSTRAINT),
+            models.UniqueConstraint(Upper(Trim('orcid')), name=SIGNER_ORCID_CONSTRAINT),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Estado cargado, usado para mantener el contador de firmantes públicos
+        instance._loaded_public_listing = instance.__dict__.get('public_listing')
+        return instance
+
+    def _generate_identifiers(self, signer_id=True, validation_hash=True, using='default'):
+        if signer_id:
+            self.signer_id = allocate_identifier(SIGNER_IDS, using=using)
+
+        if validation_hash:
             # Generar hash basado en datos del firmante
             hash_input = f"{self.full_name}{self.email}{self.orcid}{self.affiliation}{self.created_at or datetime.now()}"
             self.validation_hash = hashlib.sha256(hash_input.encode()).hexdigest()
-            self.hash_short = self.validation_hash[:8]
 
-        super().save(*args, **kwargs)
+    def allocate_hash_short(self, using='default'):
+        """
+        Asigna el prefijo más corto de validation_hash (mínimo 8 caracteres) que
+        no comparte ningún otro firmante. La sonda es una consulta por rango sobre
+        el índice único de validation_hash; el índice único de hash_short cubre
+        las asignaciones concurrentes (save() reintenta).
+        """
+        prefix = self.validation_hash[:HASH_SHORT_MIN_LENGTH]
+        neighbours = Signer.objects.using(using).filter(validation_hash__gte=prefix)
+        bound = hex_prefix_upper_bound(prefix)
+        if bound:
+            neighbours = neighbours.filter(validation_hash__lt=bound)
+        if self.pk:
+            neighbours = neighbours.exclude(pk=self.pk)
+        self.hash_short = shortest_unique_prefix(
+            self.validation_hash, neighbours.values_list('validation_hash', flat=True)
+        )
+
+    def save(self, *args, **kwargs):
+        new_signer_id = not self.signer_id
+        new_hash = not self.validation_hash
+        if not (new_signer_id or new_hash):
+            super().save(*args, **kwargs)
+            return
+
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        for attempt in range(1, IDENTIFIER_SAVE_ATTEMPTS + 1):
+            self._generate_identifiers(signer_id=new_signer_id, validation_hash=new_hash, using=using)
+            if new_hash:
+                self.allocate_hash_short(using=using)
+            try:
+                # Savepoint: una colisión no invalida la transacción externa
+                with transaction.atomic(using=using):
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError as exc:
+                if attempt == IDENTIFIER_SAVE_ATTEMPTS or not self._identifier_collision(exc):
+                    raise
+
+    @staticmethod
+    def _identifier_collision(exc):
+        """True si el IntegrityError se debe a un signer_id, validation_hash o hash_short repetido"""
+        constraint = violated_constraint(exc)
+        return any(column in constraint for column in ('signer_id', 'validation_hash', 'hash_short'))
+
+    @staticmethod
+    def duplicate_field(exc):
+        """'email' u 'orcid' si el IntegrityError viola su restricción única, o None"""
+        constraint = violated_constraint(exc)
+        if SIGNER_EMAIL_CONSTRAINT in constraint:
+            return 'email'
+        if SIGNER_ORCID_CONSTRAINT in constraint:
+            return 'orcid'
+        return None
 
     def __str__(self):
         return f"{self.full_name} - {self.affiliation}"
@@ -80,38 +253,6 @@ class Signer(models.Model):
     @property
     def country_flag(self):
         """Retorna el emoji de bandera correspondiente al país"""
-        COUNTRY_FLAGS = {
-            'Alemania': '🇩🇪',
-            'Argentina': '🇦🇷',
-            'Bélgica': '🇧🇪',
-            'Bolivia': '🇧🇴',
-            'Brasil': '🇧🇷',
-            'Chile': '🇨🇱',
-            'Colombia': '🇨🇴',
-            'Costa Rica': '🇨🇷',
-            'Cuba': '🇨🇺',
-            'Ecuador': '🇪🇨',
-            'El Salvador': '🇸🇻',
-            'España': '🇪🇸',
-            'Francia': '🇫🇷',
-            'Guatemala': '🇬🇹',
-            'Honduras': '🇭🇳',
-            'Italia': '🇮🇹',
-            'México': '🇲🇽',
-            'Nicaragua': '🇳🇮',
-            'Panamá': '🇵🇦',
-            'Paraguay': '🇵🇾',
-            'Perú': '🇵🇪',
-            'Polonia': '🇵🇱',
-            'Portugal': '🇵🇹',
-            'Puerto Rico': '🇵🇷',
-            'Reino Unido': '🇬🇧',
-            'República Dominicana': '🇩🇴',
-            'Suiza': '🇨🇭',
-            'Uruguay': '🇺🇾',
-            'Venezuela': '🇻🇪',
-            'Otro': '🌍'
-        }
         return COUNTRY_FLAGS.get(self.country, '🌍') if self.country else '🌍'
 
 
@@ -122,6 +263,10 @@ class Declaration(models.Model):
     declaration_id = models.CharField(max_length=20, unique=True, editable=False)
     validation_hash = models.CharField(max_length=64, blank=True)
 
+    # Columnas de búsqueda normalizadas (mayúsculas) para consultas exactas indexadas
+    hash_lookup = models.CharField(max_length=64, blank=True, editable=False, db_index=True)
+    id_lookup = models.CharField(max_length=20, blank=True, editable=False, db_index=True)
+
     # Diagnostic/Traceability
     selected_checklist_ids = models.JSONField(default=list, blank=True)
 
@@ -162,13 +307,38 @@ class Declaration(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Exportación por rango de fechas
+            models.Index(fields=['created_at'], name='declaration_created_idx'),
+        ]
 
     def save(self, *args, **kwargs):
-        if not self.declaration_id:
-            import random
-            import string
-            self.declaration_id = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
-        super().save(*args, **kwargs)
+        self.hash_lookup = normalize_lookup(self.validation_hash)
+        if self.declaration_id:
+            self.id_lookup = normalize_lookup(self.declaration_id)
+            super().save(*args, **kwargs)
+            return
+
+        # Un ID ya usado solo se repite si cambió IDENTIFIER_KEY: se asigna otro
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        for attempt in range(1, IDENTIFIER_SAVE_ATTEMPTS + 1):
+            self.declaration_id = allocate_identifier(DECLARATION_IDS, using=using)
+            self.id_lookup = normalize_lookup(self.declaration_id)
+            try:
+                # Savepoint: una colisión no invalida la transacción externa
+                with transaction.atomic(using=using):
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError as exc:
+                if attempt == IDENTIFIER_SAVE_ATTEMPTS or 'declaration_id' not in violated_constraint(exc):
+                    raise
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Versión cargada, usada para invalidar la caché de artefactos renderizados
+        instance._loaded_updated_at = instance.__dict__.get('updated_at')
+        return instance
 
     def compute_hash(self, content):
         """Compute SHA-256 hash of declaration content"""
@@ -176,3 +346,53 @@ class Declaration(models.Model):
 
     def __str__(self):
         return f"Declaration {self.declaration_id} - {self.ai_tool_name}"
+
+
+class Counter(models.Model):
+    """Contadores desnormalizados (evitan COUNT(*) en páginas públicas)"""
+
+    PUBLIC_SIGNERS = 'public_signers'
+
+    key = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Contador'
+        verbose_name_plural = 'Contadores'
+
+    @classmethod
+    def get_value(cls, key):
+        """Valor actual del contador (0 si no existe)"""
+        return cls.objects.filter(key=key).values_list('value', flat=True).first() or 0
+
+    @classmethod
+    def increment(cls, key, delta=1):
+        """Incremento atómico; crea el contador si aún no existe"""
+        if not cls.objects.filter(key=key).update(value=F('value') + delta):
+            cls.objects.get_or_create(key=key, defaults={'value': 0})
+            cls.objects.filter(key=key).update(value=F('value') + delta)
+
+    @classmethod
+    def reserve(cls, key, size=1, using='default'):
+        """
+        Reserva `size` valores consecutivos del contador y retorna el rango
+        [inicio, fin). El UPDATE bloquea la fila hasta el fin de la transacción,
+        así que dos procesos nunca reciben rangos superpuestos.
+        """
+        counters = cls.objects.using(using)
+        with transaction.atomic(using=using):
+            if not counters.filter(key=key).update(value=F('value') + size):
+                counters.get_or_create(key=key, defaults={'value': 0})
+                counters.filter(key=key).update(value=F('value') + size)
+            end = counters.filter(key=key).values_list('value', flat=True).get()
+        return end - size, end
+
+    @classmethod
+    def recount_public_signers(cls, using='default'):
+        """Recalcula el contador de firmantes públicos (tras operaciones masivas)"""
+        total = Signer.objects.using(using).filter(public_listing=True).count()
+        cls.objects.using(using).update_or_create(key=cls.PUBLIC_SIGNERS, defaults={'value': total})
+        return total
+
+    def __str__(self):
+        return f"{self.key}: {self.value}"
@@ -0,0 +1,71 @@
+"""
+Paginación por keyset (cursor) sobre (created_at, id)
+A diferencia de OFFSET, el costo de cada página es constante: la consulta
+parte del último registro visto usando el índice en lugar de recorrer y
+descartar las filas anteriores.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import Q
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def encode_cursor(obj):
+    """Cursor opaco '<microsegundos desde epoch>.<id>' para un registro"""
+    micros = (obj.created_at - _EPOCH) // timedelta(microseconds=1)
+    return f"{micros}.{obj.pk}"
+
+
+def decode_cursor(cursor):
+    """Retorna (created_at, pk) o None si el cursor no es válido"""
+    try:
+        micros, pk = cursor.split('.', 1)
+        return _EPOCH + timedelta(microseconds=int(micros)), int(pk)
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+
+def keyset_page(queryset, after=None, before=None, page_size=50):
+    """
+    Página de un queryset ordenado por (-created_at, -id).
+
+    Args:
+        queryset: QuerySet sin ordenar (se ordena aquí)
+        after: Cursor del último registro de la página anterior (página siguiente)
+        before: Cursor del primer registro de la página siguiente (página anterior)
+        page_size: Registros por página
+
+    Returns:
+        dict: {'items': list, 'next_cursor': str|None, 'prev_cursor': str|None}
+    """
+    after = decode_cursor(after) if after else None
+    before = decode_cursor(before) if before else None
+
+    if before:
+        created_at, pk = before
+        # La cota created_at__gte permite una búsqueda por rango en el índice
+        rows = list(
+            queryset.filter(created_at__gte=created_at)
+            .filter(Q(created_at__gt=created_at) | Q(pk__gt=pk))
+            .order_by('created_at', 'pk')[:page_size + 1]
+        )
+        has_more_newer = len(rows) > page_size
+        items = rows[:page_size][::-1]
+        return {
+            'items': items,
+            'next_cursor': encode_cursor(items[-1]) if items else None,
+            'prev_cursor': encode_cursor(items[0]) if items and has_more_newer else None,
+        }
+
+    if after:
+        created_at, pk = after
+        queryset = queryset.filter(created_at__lte=created_at).filter(Q(created_at__lt=created_at) | Q(pk__lt=pk))
+
+    rows = list(queryset.order_by('-created_at', '-pk')[:page_size + 1])
+    items = rows[:page_size]
+    return {
+        'items': items,
+        'next_cursor': encode_cursor(items[-1]) if len(rows) > page_size else None,
+        'prev_cursor': encode_cursor(items[0]) if after and items else None,
+    }
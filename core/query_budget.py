@@ -0,0 +1,101 @@
+"""
+Presupuestos de consultas SQL por solicitud
+
+`QueryRecorder` registra, con un execute wrapper en cada conexión, las
+consultas que ejecuta un bloque de código (SQL con marcadores y parámetros por
+separado). Sobre lo registrado:
+  - `duplicates()`: la misma consulta con los mismos parámetros más de una vez
+    (resultado que se podría reutilizar),
+  - `repeated()`: la misma consulta con parámetros distintos QUERY_REPEAT_LIMIT
+    veces o más, el patrón N+1 (una consulta por fila en lugar de un JOIN,
+    select_related/prefetch_related o un IN),
+  - `problems(budget)`: lo anterior más el exceso sobre el presupuesto,
+  - `report()`: listado numerado de las consultas para el mensaje de error.
+
+Los tests de core/tests.py recorren cada URL de config/urls.py con su presupuesto.
+"""
+import re
+from collections import Counter as Tally
+from contextlib import ExitStack
+
+from django.db import connections
+
+# Repeticiones de una misma consulta (con otros parámetros) que se consideran N+1
+QUERY_REPEAT_LIMIT = 3
+
+# Listas IN (%s, %s, ...) de largo variable y nombres de savepoint generados
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+_SAVEPOINT_NAME = re.compile(r'"s\d+_x\d+"')
+_WHITESPACE = re.compile(r'\s+')
+# Control de transacciones: no cuenta como consulta repetida
+_TRANSACTION_CONTROL = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT', 'BEGIN', 'COMMIT', 'ROLLBACK')
+
+
+def query_template(sql):
+    """SQL normalizado: iguala listas IN de distinto largo, savepoints y espacios"""
+    sql = _SAVEPOINT_NAME.sub('"sp"', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def _freeze(params):
+    if isinstance(params, (list, tuple)):
+        return tuple(_freeze(value) for value in params)
+    if isinstance(params, dict):
+        return tuple(sorted((key, _freeze(value)) for key, value in params.items()))
+    return params
+
+
+class QueryRecorder:
+    """Context manager que registra las consultas de las conexiones `aliases` (todas por defecto)"""
+
+    def __init__(self, aliases=None):
+        self.aliases = list(aliases) if aliases else list(connections)
+        self.queries = []  # (alias, sql, parámetros)
+        self._stack = None
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for alias in self.aliases:
+            self._stack.enter_context(connections[alias].execute_wrapper(self._record))
+        return self
+
+    def __exit__(self, *exc):
+        self._stack.close()
+        return False
+
+    def _record(self, execute, sql, params, many, context):
+        self.queries.append((context['connection'].alias, sql, _freeze(params)))
+        return execute(sql, params, many, context)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def duplicates(self):
+        """[(veces, sql, parámetros)] de las consultas idénticas repetidas"""
+        counts = Tally(self.queries)
+        return [(count, sql, params) for (_, sql, params), count in counts.items() if count > 1]
+
+    def repeated(self, limit=QUERY_REPEAT_LIMIT):
+        """[(veces, sql normalizado)] de las consultas repetidas con parámetros distintos (N+1)"""
+        distinct = {(alias, query_template(sql), params) for alias, sql, params in self.queries}
+        counts = Tally(template for _, template, _ in distinct if not template.startswith(_TRANSACTION_CONTROL))
+        return [(count, template) for template, count in counts.items() if count >= limit]
+
+    def problems(self, budget, limit=QUERY_REPEAT_LIMIT):
+        """Descripción de cada incumplimiento (lista vacía si no hay ninguno)"""
+        problems = []
+        if len(self) > budget:
+            problems.append(f"{len(self)} consultas, presupuesto {budget}")
+        for count, sql, params in self.duplicates():
+            problems.append(f"consulta duplicada {count} veces: {sql} {params}")
+        for count, template in self.repeated(limit):
+            problems.append(f"posible N+1 ({count} veces con parámetros distintos): {template}")
+        return problems
+
+    def report(self):
+        """Consultas numeradas en orden de ejecución"""
+        return '\n'.join(
+            f"{number:>3}. [{alias}] {_WHITESPACE.sub(' ', sql)} {params}"
+            for number, (alias, sql, params) in enumerate(self.queries, 1)
+        )
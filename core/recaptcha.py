@@ -0,0 +1,301 @@
+"""
+Cliente de verificación de reCAPTCHA v2
+
+Reemplaza la llamada directa a `requests.post` de cada verificación por:
+  - una sesión HTTP persistente con pool de conexiones (sin un handshake TLS
+    por solicitud),
+  - una caché breve de tokens ya verificados (reenvíos del mismo formulario),
+  - un circuit breaker: tras varios fallos seguidos de la API de Google deja
+    de llamarla durante un tiempo y aplica la política configurada
+    (RECAPTCHA_FAILURE_POLICY: 'closed' rechaza, 'open' deja pasar),
+  - métricas de latencia y resultados por proceso (`get_client().metrics()`),
+    también exportadas a Prometheus (`core.metrics`).
+
+`averify` hace lo mismo con httpx para las vistas async bajo ASGI, con un solo
+`httpx.AsyncClient` por worker que se cierra al apagarlo (`aclose_client`, desde
+el lifespan de config/asgi.py). Bajo WSGI cada solicitud async corre en un event
+loop nuevo: ahí las vistas usan `verify` (ver `core.utils.averify_recaptcha`).
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import Counter as Tally, deque
+
+import httpx
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+
+from .metrics import observe_recaptcha
+
+logger = logging.getLogger(__name__)
+
+TOKEN_CACHE_PREFIX = 'recaptcha:token:'
+LATENCY_SAMPLES = 1000
+
+# Estados del circuit breaker
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class CircuitBreaker:
+    """
+    Abre el circuito tras `threshold` fallos consecutivos; pasado `cooldown`
+    deja pasar una sola solicitud de prueba (half-open) que lo cierra o lo
+    vuelve a abrir.
+    """
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return CLOSED
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return HALF_OPEN
+        return OPEN
+
+    def allow_request(self):
+        with self._lock:
+            state = self.state
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.trial_in_flight or self.failures >= self.threshold:
+                if self.opened_at is None or self.trial_in_flight:
+                    logger.warning("reCAPTCHA: circuito abierto tras %d fallos", self.failures)
+                self.opened_at = time.monotonic()
+            self.trial_in_flight = False
+
+
+class RecaptchaClient:
+    """Verifica tokens contra la API de reCAPTCHA (una instancia por proceso)"""
+
+    def __init__(self, verify_url=None, timeout=None, pool_size=None, token_ttl=None,
+                 failure_policy=None, breaker_threshold=None, breaker_cooldown=None):
+        self.verify_url = verify_url or settings.RECAPTCHA_VERIFY_URL
+        self.timeout = timeout or (settings.RECAPTCHA_CONNECT_TIMEOUT, settings.RECAPTCHA_READ_TIMEOUT)
+        self.token_ttl = settings.RECAPTCHA_TOKEN_TTL if token_ttl is None else token_ttl
+        self.failure_policy = failure_policy or settings.RECAPTCHA_FAILURE_POLICY
+        self.breaker = CircuitBreaker(
+            breaker_threshold or settings.RECAPTCHA_BREAKER_THRESHOLD,
+            breaker_cooldown or settings.RECAPTCHA_BREAKER_COOLDOWN,
+        )
+
+        self.pool_size = pool_size or settings.RECAPTCHA_POOL_SIZE
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._async_client = None
+        self._async_loop = None
+
+        self._metrics_lock = threading.Lock()
+        self._outcomes = Tally()
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def _token_key(self, token, remote_ip):
+        digest = hashlib.sha256(f"{token}|{remote_ip or ''}".encode()).hexdigest()
+        return TOKEN_CACHE_PREFIX + digest
+
+    def _record(self, outcome, latency=None):
+        with self._metrics_lock:
+            self._outcomes[outcome] += 1
+            if latency is not None:
+                self._latencies.append(latency)
+        observe_recaptcha(outcome, latency)
+
+    def _unavailable(self, error_code, message=''):
+        """Resultado cuando la API no responde, según RECAPTCHA_FAILURE_POLICY"""
+        if self.failure_policy == 'open':
+            return {'success': True, 'error_codes': [], 'degraded': True, 'error_message': message}
+        return {'success': False, 'error_codes': [error_code], 'error_message': message}
+
+    def _short_circuit(self):
+        """Resultado inmediato si el circuito está abierto; None si se puede llamar a la API"""
+        if self.breaker.allow_request():
+            return None
+        self._record('short_circuit')
+        return self._unavailable('circuit-open', 'reCAPTCHA API no disponible (circuito abierto)')
+
+    def _payload(self, token, remote_ip):
+        data = {'secret': settings.RECAPTCHA_SECRET_KEY, 'response': token}
+        if remote_ip:
+            data['remoteip'] = remote_ip
+        return data
+
+    def _failed(self, start, error):
+        latency = time.perf_counter() - start
+        self.breaker.record_failure()
+        self._record('error', latency)
+        logger.warning("reCAPTCHA: error de conexión tras %.0f ms: %s", latency * 1000, error)
+        return self._unavailable('connection-error', str(error))
+
+    def _verified(self, start, result):
+        latency = time.perf_counter() - start
+        self.breaker.record_success()
+        verification = {
+            'success': result.get('success', False),
+            'error_codes': result.get('error-codes', []),
+            'challenge_ts': result.get('challenge_ts'),
+            'hostname': result.get('hostname'),
+        }
+        self._record('success' if verification['success'] else 'rejected', latency)
+        return verification
+
+    def verify(self, token, remote_ip=None):
+        """
+        Verifica un token; retorna el mismo dict que `core.utils.verify_recaptcha`
+        ({'success', 'error_codes', ...}).
+        """
+        if not token:
+            return {'success': False, 'error_codes': ['missing-input-response']}
+
+        key = self._token_key(token, remote_ip)
+        if self.token_ttl and cache.get(key):
+            self._record('cache_hit')
+            return {'success': True, 'error_codes': [], 'cached': True}
+
+        unavailable = self._short_circuit()
+        if unavailable:
+            return unavailable
+
+        start = time.perf_counter()
+        try:
+            response = self.session.post(self.verify_url, data=self._payload(token, remote_ip), timeout=self.timeout)
+            response.raise_for_status()
+            result = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            return self._failed(start, e)
+
+        verification = self._verified(start, result)
+        if verification['success'] and self.token_ttl:
+            cache.set(key, True, self.token_ttl)
+        return verification
+
+    def _get_async_client(self):
+        """
+        Cliente httpx del worker, creado en el primer uso. Un worker ASGI tiene
+        un solo event loop; si el loop cambia (p. ej. en tests) se crea otro.
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            connect, read = self.timeout
+            self._async_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(read, connect=connect),
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+            )
+            self._async_loop = loop
+        return self._async_client
+
+    async def averify(self, token, remote_ip=None):
+        """Versión async de `verify` para vistas ASGI (no ocupa un hilo mientras espera a Google)"""
+        if not token:
+            return {'success': False, 'error_codes': ['missing-input-response']}
+
+        key = self._token_key(token, remote_ip)
+        if self.token_ttl and await cache.aget(key):
+            self._record('cache_hit')
+            return {'success': True, 'error_codes': [], 'cached': True}
+
+        unavailable = self._short_circuit()
+        if unavailable:
+            return unavailable
+
+        start = time.perf_counter()
+        try:
+            response = await self._get_async_client().post(self.verify_url, data=self._payload(token, remote_ip))
+            response.raise_for_status()
+            result = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            return self._failed(start, e)
+
+        verification = self._verified(start, result)
+        if verification['success'] and self.token_ttl:
+            await cache.aset(key, True, self.token_ttl)
+        return verification
+
+    def metrics(self):
+        """Resumen de resultados y latencias (ms) de las llamadas a la API en este proceso"""
+        with self._metrics_lock:
+            outcomes = dict(self._outcomes)
+            latencies = sorted(self._latencies)
+
+        def percentile(fraction):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000, 2)
+
+        return {
+            'outcomes': outcomes,
+            'calls': len(latencies),
+            'latency_ms': {'p50': percentile(0.5), 'p95': percentile(0.95), 'p99': percentile(0.99),
+                           'max': percentile(1.0)},
+            'circuit': self.breaker.state,
+        }
+
+    def close(self):
+        self.session.close()
+
+    async def aclose(self):
+        """Cierra el cliente httpx (en el mismo event loop en que se usó)"""
+        client, self._async_client, self._async_loop = self._async_client, None, None
+        if client is not None:
+            await client.aclose()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Cliente compartido del proceso (se crea en el primer uso)"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = RecaptchaClient()
+    return _client
+
+
+async def aclose_client():
+    """Cierra las conexiones del cliente compartido al apagar el worker ASGI"""
+    if _client is not None:
+        await _client.aclose()
+        _client.close()
+
+
+def reset_client():
+    """Descarta el cliente compartido (tras un fork o al cambiar la configuración)"""
+    global _client, _client_lock
+    _client = None
+    _client_lock = threading.Lock()
+
+
+# Los procesos hijos no deben compartir los sockets del pool del padre
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reset_client)
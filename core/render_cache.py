@@ -0,0 +1,54 @@
+"""
+Caché de artefactos renderizados (texto y JSON) de declaraciones guardadas
+Las declaraciones persistidas casi nunca cambian, así que las vistas públicas
+de verificación sirven el texto/JSON desde caché en lugar de renderizar en
+cada visita.
+"""
+from django.conf import settings
+from django.core.cache import caches
+
+from .ir import build_declaration_ir
+from .utils import RENDERER_VERSION, generate_declaration_text, generate_declaration_json
+
+
+def _cache():
+    return caches[settings.DECLARATION_CACHE_ALIAS]
+
+
+def _stamp(updated_at):
+    """Marca de tiempo compacta para la clave de caché"""
+    if updated_at is None:
+        return '0'
+    return str(int(updated_at.timestamp() * 1_000_000))
+
+
+def make_cache_key(declaration_id, lang, updated_at):
+    """Clave (declaration_id, idioma, updated_at, versión del renderizador)"""
+    return f"decl:{declaration_id}:{lang}:{_stamp(updated_at)}:r{RENDERER_VERSION}"
+
+
+def get_rendered_declaration(declaration, lang='es'):
+    """
+    Retorna (text_output, json_output) de una declaración guardada,
+    renderizando y guardando en caché solo si no está disponible.
+    """
+    cache = _cache()
+    key = make_cache_key(declaration.declaration_id, lang, declaration.updated_at)
+    rendered = cache.get(key)
+    if rendered is None:
+        ir = build_declaration_ir(declaration)
+        rendered = (
+            generate_declaration_text(ir, declaration.validation_hash, lang),
+            generate_declaration_json(ir, declaration.validation_hash, lang),
+        )
+        cache.set(key, rendered, timeout=settings.DECLARATION_CACHE_TIMEOUT)
+    return rendered
+
+
+def invalidate_rendered_declaration(declaration_id, updated_at):
+    """Elimina los artefactos cacheados de una versión de la declaración en todos los idiomas"""
+    if not declaration_id:
+        return
+    _cache().delete_many([
+        make_cache_key(declaration_id, lang, updated_at) for lang, _ in settings.LANGUAGES
+    ])
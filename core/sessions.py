@@ -0,0 +1,202 @@
+"""
+Backend de sesiones con caché que solo escribe cuando los datos cambian
+
+SESSION_ENGINE = 'core.sessions'. Extiende el backend `cached_db` de Django:
+  - al cargar la sesión guarda un digest de su contenido serializado (JSON
+    canónico); `save()` no escribe nada si el digest no cambió, aunque la vista
+    haya marcado `request.session.modified` (recargar o ir y volver entre pasos
+    del wizard no escribe en la base de datos),
+  - las lecturas se sirven desde la caché SESSION_CACHE_ALIAS,
+  - con SESSION_WRITE_BEHIND_DELAY > 0 los cambios se escriben primero en la
+    caché y un hilo por proceso los pasa a la base de datos tras ese retraso,
+    agrupando las escrituras de la misma sesión en una sola (write-behind).
+
+La caché debe ser compartida por todos los workers ('file' en un solo
+servidor) o usarse en un solo proceso ('locmem', desarrollo); con 'none' (por
+defecto con DEBUG=False) se lee siempre de la base de datos y no hay
+escritura diferida. Como las sesiones sin cambios no se reescriben, su
+expiración cuenta desde el último cambio.
+"""
+import atexit
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter as Tally
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.sessions.backends.base import CreateError, UpdateError
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.core.cache.backends.dummy import DummyCache
+from django.db import connections
+
+logger = logging.getLogger('django.contrib.sessions')
+
+KEY_PREFIX = 'core.sessions'
+
+# Contadores del proceso: 'skipped' (sin cambios), 'cache' (solo caché), 'db' (filas escritas)
+write_stats = Tally()
+
+
+def payload_digest(data):
+    """Digest del contenido de la sesión (independiente del orden de las claves)"""
+    payload = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=16).digest()
+
+
+def write_to_db(session_key, data):
+    """Escribe (UPDATE o, si no existe la fila, INSERT) los datos de una sesión"""
+    store = DBStore(session_key)
+    store._session_cache = data
+    try:
+        store.save()
+    except UpdateError:
+        try:
+            store.save(must_create=True)
+        except CreateError:
+            # Otro proceso la creó entre medias
+            store.save()
+    write_stats['db'] += 1
+
+
+class WriteBehindQueue:
+    """
+    Sesiones pendientes de escribir en la base de datos (una entrada por sesión),
+    guardadas como JSON compacto para que nadie modifique la copia pendiente.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def put(self, session_key, data, delay):
+        payload = json.dumps(data, separators=(',', ':'))
+        with self._lock:
+            # La primera escritura pendiente fija el plazo; las siguientes solo reemplazan los datos
+            due = self._pending[session_key][1] if session_key in self._pending else time.monotonic() + delay
+            self._pending[session_key] = (payload, due)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='session-write-behind', daemon=True)
+                self._thread.start()
+
+    def get(self, session_key):
+        with self._lock:
+            entry = self._pending.get(session_key)
+        return json.loads(entry[0]) if entry else None
+
+    def discard(self, session_key):
+        with self._lock:
+            self._pending.pop(session_key, None)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def flush(self, force=False):
+        """Escribe las sesiones vencidas (todas si force); retorna cuántas se escribieron"""
+        now = time.monotonic()
+        with self._lock:
+            ready = [key for key, (_, due) in self._pending.items() if force or due <= now]
+            batch = [(key, self._pending.pop(key)[0]) for key in ready]
+        for session_key, payload in batch:
+            try:
+                write_to_db(session_key, json.loads(payload))
+            except Exception:
+                logger.exception("No se pudo escribir la sesión %s…", session_key[:8])
+        return len(batch)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(max(settings.SESSION_WRITE_BEHIND_DELAY / 2, 0.05))
+            self._wakeup.clear()
+            if self._pending:
+                self.flush()
+                # Conexión propia del hilo: no mantenerla abierta entre lotes
+                connections.close_all()
+
+
+write_behind = WriteBehindQueue()
+
+
+def flush_pending():
+    """Escribe ya todas las sesiones pendientes (al terminar el proceso, benchmarks)"""
+    return write_behind.flush(force=True)
+
+
+def _reset_after_fork():
+    # Las sesiones pendientes y el hilo pertenecen al proceso padre
+    global write_behind
+    write_behind = WriteBehindQueue()
+    write_stats.clear()
+
+
+atexit.register(flush_pending)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class SessionStore(CachedDBStore):
+    """cached_db que omite escrituras sin cambios y puede diferir las de la base de datos"""
+
+    cache_key_prefix = KEY_PREFIX
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        self._stored_digest = None
+
+    def load(self):
+        pending = write_behind.get(self.session_key) if self.session_key else None
+        data = pending if pending is not None else super().load()
+        self._stored_digest = payload_digest(data) if data else None
+        return data
+
+    async def aload(self):
+        return await sync_to_async(self.load)()
+
+    def save(self, must_create=False):
+        if must_create or self.session_key is None:
+            # Las sesiones nuevas se insertan siempre (create() necesita detectar claves repetidas)
+            super().save(must_create)
+            if must_create:
+                write_stats['db'] += 1
+            self._stored_digest = payload_digest(self._session)
+            return
+
+        data = self._get_session()
+        digest = payload_digest(data)
+        if digest == self._stored_digest:
+            write_stats['skipped'] += 1
+            return
+
+        # Sin caché compartida los demás workers leerían la fila vieja: escritura directa
+        delay = 0 if isinstance(self._cache, DummyCache) else settings.SESSION_WRITE_BEHIND_DELAY
+        if delay > 0:
+            try:
+                self._cache.set(self.cache_key, data, self.get_expiry_age())
+            except Exception:
+                logger.exception("Error saving to cache (%s)", self._cache)
+                super().save()
+            else:
+                write_behind.put(self.session_key, data, delay)
+                write_stats['cache'] += 1
+        else:
+            super().save()
+            write_stats['db'] += 1
+        self._stored_digest = digest
+
+    async def asave(self, must_create=False):
+        await sync_to_async(self.save)(must_create)
+
+    def delete(self, session_key=None):
+        key = session_key or self.session_key
+        if key:
+            write_behind.discard(key)
+        super().delete(session_key)
+
+    async def adelete(self, session_key=None):
+        await sync_to_async(self.delete)(session_key)
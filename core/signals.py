@@ -0,0 +1,75 @@
+"""
+Señales de la aplicación core
+"""
+from django.db import connections
+from django.db.models.signals import post_save, post_delete, post_migrate
+from django.dispatch import receiver
+
+from .fulltext import (
+    create_search_index, index_declaration, unindex_declaration,
+    create_signer_index, index_signer, unindex_signer,
+)
+from .models import Declaration, Signer, Counter
+from .render_cache import invalidate_rendered_declaration
+
+
+@receiver(post_save, sender=Declaration)
+@receiver(post_delete, sender=Declaration)
+def invalidate_declaration_cache(sender, instance, **kwargs):
+    """Invalida el texto/JSON cacheado de la versión anterior de la declaración"""
+    # updated_at cambia en cada guardado, por lo que la versión nueva usa otra
+    # clave; aquí se eliminan las entradas de la versión cargada desde la BD.
+    loaded = getattr(instance, '_loaded_updated_at', None)
+    if loaded is not None:
+        invalidate_rendered_declaration(instance.declaration_id, loaded)
+    instance._loaded_updated_at = instance.updated_at
+
+
+@receiver(post_save, sender=Declaration)
+def update_search_index_on_save(sender, instance, raw=False, using='default', **kwargs):
+    """Mantiene sincronizado el índice de texto completo"""
+    if not raw:
+        index_declaration(instance, using=using)
+
+
+@receiver(post_delete, sender=Declaration)
+def update_search_index_on_delete(sender, instance, using='default', **kwargs):
+    """Quita la declaración eliminada del índice de texto completo"""
+    unindex_declaration(instance.pk, using=using)
+
+
+@receiver(post_migrate)
+def ensure_search_index(sender, app_config=None, using='default', **kwargs):
+    """Crea los índices de texto completo si faltan (p. ej. bases creadas sin migraciones)"""
+    if app_config is not None and app_config.label == 'core':
+        create_search_index(connections[using])
+        create_signer_index(connections[using])
+
+
+@receiver(post_save, sender=Signer)
+def update_public_signers_on_save(sender, instance, created, **kwargs):
+    """Mantiene el contador de firmantes públicos al crear o cambiar el listado"""
+    was_public = False if created else getattr(instance, '_loaded_public_listing', instance.public_listing)
+    if instance.public_listing != was_public:
+        Counter.increment(Counter.PUBLIC_SIGNERS, 1 if instance.public_listing else -1)
+    instance._loaded_public_listing = instance.public_listing
+
+
+@receiver(post_delete, sender=Signer)
+def update_public_signers_on_delete(sender, instance, **kwargs):
+    """Descuenta del contador los firmantes públicos eliminados"""
+    if getattr(instance, '_loaded_public_listing', instance.public_listing):
+        Counter.increment(Counter.PUBLIC_SIGNERS, -1)
+
+
+@receiver(post_save, sender=Signer)
+def update_signer_index_on_save(sender, instance, raw=False, using='default', **kwargs):
+    """Mantiene sincronizado el índice de búsqueda del directorio de firmantes"""
+    if not raw:
+        index_signer(instance, using=using)
+
+
+@receiver(post_delete, sender=Signer)
+def update_signer_index_on_delete(sender, instance, using='default', **kwargs):
+    """Quita el firmante eliminado del índice de búsqueda"""
+    unindex_signer(instance.pk, using=using)
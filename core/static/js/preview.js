@@ -5,6 +5,8 @@
 
 let previewUpdateTimeout = null;
 const PREVIEW_UPDATE_DELAY = 300; // ms de delay para evitar demasiadas peticiones
+let previewEtag = null; // ETag del render mostrado (digest de los datos en el servidor)
+let previewRequestSeq = 0; // descarta respuestas que llegan fuera de orden
 
 /**
  * Obtiene los datos actuales del formulario según el paso
@@ -132,9 +134,12 @@ function updatePreview(step) {
         
         if (!previewContainer || !previewContent) return;
 
-        // Mostrar indicador de carga
-        const updatingText = (window.PREVIEW_TRANSLATIONS && window.PREVIEW_TRANSLATIONS.updating) || 'Actualizando vista previa...';
-        previewContent.innerHTML = `<div class="text-center py-8 text-slate-400">${updatingText}</div>`;
+        // Mostrar indicador de carga solo si aún no hay una vista previa que parchear
+        const currentPreview = previewContent.querySelector('pre[data-preview]');
+        if (!currentPreview) {
+            const updatingText = (window.PREVIEW_TRANSLATIONS && window.PREVIEW_TRANSLATIONS.updating) || 'Actualizando vista previa...';
+            previewContent.innerHTML = `<div class="text-center py-8 text-slate-400">${updatingText}</div>`;
+        }
 
         const formData = getFormData(step);
         
@@ -149,33 +154,80 @@ function updatePreview(step) {
         }
         
         const apiUrl = basePath + '/api/preview/';
+
+        const headers = {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': getCookie('csrftoken')
+        };
+        // Con el ETag del render actual el servidor responde 304 o solo las secciones cambiadas
+        if (currentPreview && previewEtag) {
+            headers['If-None-Match'] = previewEtag;
+        }
+        const seq = ++previewRequestSeq;
         
         fetch(apiUrl, {
             method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-                'X-CSRFToken': getCookie('csrftoken')
-            },
+            headers: headers,
             body: JSON.stringify(formData)
         })
-        .then(response => response.json())
+        .then(response => (response.status === 304 ? null : response.json()))
         .then(data => {
+            if (seq !== previewRequestSeq || data === null) {
+                // Respuesta obsoleta o sin cambios (304): se mantiene lo mostrado
+                return;
+            }
             if (data.success) {
-                // Mostrar la vista previa formateada
-                previewContent.innerHTML = `<pre class="p-4 text-sm font-mono leading-relaxed whitespace-pre-wrap text-slate-800">${escapeHtml(data.preview)}</pre>`;
+                if (data.partial && data.base !== previewEtag) {
+                    // El parche no corresponde a lo mostrado: pedir el render completo
+                    previewEtag = null;
+                    previewContent.innerHTML = '';
+                    updatePreview(step);
+                    return;
+                }
+                renderPreviewSections(previewContent, data);
             } else {
+                previewEtag = null;
                 const errorText = (window.PREVIEW_TRANSLATIONS && window.PREVIEW_TRANSLATIONS.error) || 'Error al generar vista previa';
                 previewContent.innerHTML = `<div class="text-center py-8 text-red-500">${errorText}</div>`;
             }
         })
         .catch(error => {
             console.error('Error updating preview:', error);
+            previewEtag = null;
             const unavailableText = (window.PREVIEW_TRANSLATIONS && window.PREVIEW_TRANSLATIONS.unavailable) || 'Vista previa no disponible';
             previewContent.innerHTML = `<div class="text-center py-8 text-slate-400">${unavailableText}</div>`;
         });
     }, PREVIEW_UPDATE_DELAY);
 }
 
+/**
+ * Muestra la vista previa: un <span data-section> por sección dentro del <pre>.
+ * Las respuestas parciales solo traen las secciones cambiadas y se parchean en su lugar.
+ */
+function renderPreviewSections(previewContent, data) {
+    let pre = previewContent.querySelector('pre[data-preview]');
+    if (!data.partial || !pre) {
+        pre = document.createElement('pre');
+        pre.className = 'p-4 text-sm font-mono leading-relaxed whitespace-pre-wrap text-slate-800';
+        pre.setAttribute('data-preview', '');
+        Object.entries(data.sections).forEach(([key, text]) => {
+            const span = document.createElement('span');
+            span.dataset.section = key;
+            span.textContent = text;
+            pre.appendChild(span);
+        });
+        previewContent.replaceChildren(pre);
+    } else {
+        Object.entries(data.sections).forEach(([key, text]) => {
+            const span = pre.querySelector(`span[data-section="${key}"]`);
+            if (span) {
+                span.textContent = text;
+            }
+        });
+    }
+    previewEtag = data.etag;
+}
+
 /**
  * Obtiene el valor de una cookie
  */
@@ -194,15 +246,6 @@ function getCookie(name) {
     return cookieValue;
 }
 
-/**
- * Escapa HTML para prevenir XSS
- */
-function escapeHtml(text) {
-    const div = document.createElement('div');
-    div.textContent = text;
-    return div.innerHTML;
-}
-
 /**
  * Toggle del panel de vista previa (ocultar/mostrar)
  */
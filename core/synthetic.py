@@ -0,0 +1,333 @@
+"""
+Datos sintéticos para pruebas de carga y de escala
+
+Genera declaraciones y firmantes con las mismas distribuciones de valores que
+produce el sitio: tipos de uso de USAGE_TYPES (y sugeridos por HELP_CHECKLIST),
+herramientas de AI_TOOLS_CATALOG, declaraciones basadas en PRESETS, modos de
+integración guardados en español o ya traducidos, y firmantes repartidos por
+país y disciplina.
+
+Todo es determinista a partir de la semilla: cada lote usa su propio
+generador (`random.Random(f"{seed}:{tipo}:{lote}")`), así el resultado no
+depende del orden en que los procesos terminan sus lotes. Los IDs salen de un
+rango del contador reservado de antemano (`reserve_identifiers`) y las fechas
+crecen con la posición en el rango.
+
+Las filas se insertan con bulk_create, que no pasa por save() ni dispara
+señales: el hash de la declaración, las columnas de búsqueda normalizadas y el
+hash corto de los firmantes se calculan aquí, y el comando
+`generate_synthetic_data` recalcula después el contador de firmantes públicos
+y los índices de búsqueda.
+"""
+import contextlib
+import hashlib
+import os
+import random
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import translation
+from django.utils.translation import gettext
+
+from .catalogs import get_catalog
+from .constants import AI_TOOLS_CATALOG, CC_LICENSES, CONTENT_USE_MODES, HELP_CHECKLIST, PRESETS, USAGE_TYPES
+from .identifiers import DECLARATION, SIGNER, identifier_for
+from .models import COUNTRY_FLAGS, HASH_SHORT_MIN_LENGTH, Declaration, Signer, normalize_lookup
+from .utils import compute_hash, generate_declaration_body
+
+# Idioma en que se generó cada declaración (peso relativo)
+LANGUAGE_WEIGHTS = {'es': 70, 'en': 15, 'pt': 10, 'it': 5}
+
+# Categorías de AI_TOOLS_CATALOG
+TOOL_CATEGORY_WEIGHTS = {'commercial': 70, 'specialized': 15, 'open_source': 10, 'local_platforms': 5}
+
+# Nivel de revisión humana 0..5
+REVIEW_LEVEL_WEIGHTS = (3, 8, 15, 30, 28, 16)
+
+# Licencias de CC_LICENSES, en el mismo orden
+LICENSE_WEIGHTS = (40, 10, 15, 5, 5, 5, 20)
+
+PRESET_SHARE = 0.3
+OTHER_USAGE_SHARE = 0.03
+TRANSLATED_MODES_SHARE = 0.5
+PUBLIC_LISTING_SHARE = 0.9
+ORCID_VERIFIED_SHARE = 0.35
+
+# Países más frecuentes; el resto de COUNTRY_FLAGS comparte el peso por defecto
+COUNTRY_WEIGHTS = {
+    'México': 22, 'España': 18, 'Colombia': 12, 'Argentina': 10, 'Chile': 9,
+    'Perú': 6, 'Brasil': 5, 'Ecuador': 3, 'Venezuela': 2, 'Uruguay': 2, 'Portugal': 2,
+}
+DEFAULT_COUNTRY_WEIGHT = 0.5
+
+# Disciplinas del formulario de registro (msgid en español, se guardan traducidas)
+DISCIPLINE_WEIGHTS = {
+    'Académico': 35, 'Investigador': 30, 'Estudiante': 18, 'Técnico': 8, 'Gestor': 5, 'Otro': 4,
+}
+
+# Idioma del formulario de registro por país
+COUNTRY_LANGUAGES = {'Brasil': 'pt', 'Portugal': 'pt', 'Italia': 'it', 'Reino Unido': 'en'}
+
+FIRST_NAMES = [
+    'José', 'María', 'Luis', 'Ana', 'Carlos', 'Lucía', 'Andrés', 'Camila', 'Javier', 'Valentina',
+    'Pedro', 'Sofía', 'Diego', 'Isabel', 'Miguel', 'Paula', 'João', 'Inês', 'Conceição', 'Tomás',
+    'Giulia', 'Marco', 'Elena', 'Francisco', 'Daniela', 'Ricardo', 'Martina', 'Sebastián', 'Laura', 'Jorge',
+]
+LAST_NAMES = [
+    'González', 'Rodríguez', 'Pérez', 'Fernández', 'López', 'Martínez', 'Gómez', 'Sánchez', 'Díaz', 'Muñoz',
+    'Romero', 'Torres', 'Ramírez', 'Flores', 'Silva', 'Araújo', 'Simões', 'Núñez', 'Castro', 'Vargas',
+    'Rossi', 'Bianchi', 'Herrera', 'Medina', 'Ortiz', 'Rojas', 'Morales', 'Jiménez', 'Reyes', 'Cruz',
+]
+AFFILIATIONS = {
+    'México': ['Universidad Nacional Autónoma de México', 'Instituto Politécnico Nacional', 'Universidad de Guadalajara'],
+    'España': ['Universidad Complutense de Madrid', 'Universitat de Barcelona', 'Universidad de Salamanca'],
+    'Colombia': ['Universidad Nacional de Colombia', 'Universidad de los Andes', 'Universidad de Antioquia'],
+    'Argentina': ['Universidad de Buenos Aires', 'Universidad Nacional de Córdoba', 'CONICET'],
+    'Chile': ['Universidad de Chile', 'Pontificia Universidad Católica de Chile', 'Universidad de Concepción'],
+    'Perú': ['Pontificia Universidad Católica del Perú', 'Universidad Nacional Mayor de San Marcos'],
+    'Brasil': ['Universidade de São Paulo', 'Universidade Estadual de Campinas', 'Universidade Federal do Rio de Janeiro'],
+    'Portugal': ['Universidade do Porto', 'Universidade de Lisboa', 'Universidade de Coimbra'],
+}
+GENERIC_AFFILIATIONS = ['Universidad Nacional', 'Instituto de Investigación', 'Universidad Tecnológica', 'Centro de Estudios Avanzados']
+
+PROJECTS = [
+    'tesis doctoral', 'tesis de maestría', 'artículo para revista indexada', 'informe técnico',
+    'capítulo de libro', 'proyecto de investigación', 'material docente', 'ponencia de congreso',
+]
+REVIEWER_ROLES = ['Autor Principal', 'Coautor', 'Director de Tesis', 'Investigador Responsable', 'Editor', 'Revisor Externo']
+
+
+@contextlib.contextmanager
+def preserve_timestamps(*models):
+    """
+    Desactiva auto_now y auto_now_add mientras dura el bloque: bulk_create
+    llama a pre_save() y sin esto reemplazaría las fechas generadas por la hora actual.
+    """
+    fields = [
+        (field, field.auto_now, field.auto_now_add)
+        for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    for field, _, _ in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in fields:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def batch_random(seed, kind, batch_no):
+    """Generador propio del lote (independiente del proceso que lo ejecute)"""
+    return random.Random(f"{seed}:{kind}:{batch_no}")
+
+
+def batch_timestamps(rng, count, offset, total, start, end):
+    """
+    Fechas ordenadas de los elementos [offset, offset + count) de `total`
+    repartidos entre `start` y `end` (cada lote ocupa su tramo del intervalo).
+    """
+    span = (end - start).total_seconds()
+    low = span * offset / total
+    high = span * (offset + count) / total
+    seconds = sorted(rng.uniform(low, high) for _ in range(count))
+    return [start + timedelta(seconds=value) for value in seconds]
+
+
+def _weighted(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+_usage_values = [usage['value'] for usage in USAGE_TYPES if usage['value'] != 'other']
+_country_weights = {country: COUNTRY_WEIGHTS.get(country, DEFAULT_COUNTRY_WEIGHT) for country in COUNTRY_FLAGS}
+
+
+def _tool(rng):
+    tool = rng.choice(AI_TOOLS_CATALOG[_weighted(rng, TOOL_CATEGORY_WEIGHTS)])
+    return tool['name'], rng.choice(tool['versions']), tool['provider']
+
+
+def _content_modes(rng, lang, modes=None):
+    """Modos de integración; en otros idiomas a veces se guardan ya traducidos"""
+    if modes is None:
+        modes = rng.sample(CONTENT_USE_MODES[:-1], rng.choices((1, 2, 3), weights=(60, 30, 10))[0])
+        if rng.random() < 0.05:
+            modes.append(CONTENT_USE_MODES[-1])
+    if lang != 'es' and rng.random() < TRANSLATED_MODES_SHARE:
+        translated = dict(zip(CONTENT_USE_MODES, get_catalog(lang).content_modes))
+        modes = [translated[mode] for mode in modes]
+    return list(modes)
+
+
+def build_declaration(rng, value, created_at):
+    """Declaration sin guardar para el valor `value` del contador de declaraciones"""
+    lang = _weighted(rng, LANGUAGE_WEIGHTS)
+    catalog = get_catalog(lang)
+    preset = rng.choice(PRESETS)['data'] if rng.random() < PRESET_SHARE else None
+
+    checklist = rng.sample(HELP_CHECKLIST, rng.choices((0, 1, 2, 3), weights=(25, 40, 25, 10))[0])
+    if preset:
+        usage_types = list(preset['usage_types'])
+    else:
+        usage_types = [item['suggests'] for item in checklist]
+        extra = rng.choices((0, 1, 2), weights=(40, 45, 15))[0]
+        usage_types += rng.sample(_usage_values, extra)
+        usage_types = list(dict.fromkeys(usage_types)) or [rng.choice(_usage_values)]
+    custom_usage_type = ''
+    if rng.random() < OTHER_USAGE_SHARE:
+        usage_types.append('other')
+        custom_usage_type = f"Apoyo en la preparación de {rng.choice(PROJECTS)}"
+
+    examples = [
+        example for usage in catalog.usage_types if usage['value'] in usage_types
+        for example in usage['examples']
+    ]
+    if preset:
+        specific_purpose = preset['specific_purpose']
+    else:
+        specific_purpose = f"{rng.choice(examples) if examples else custom_usage_type} ({rng.choice(PROJECTS)})."
+    prompts = [
+        {'id': str(i + 1), 'description': rng.choice(examples or [specific_purpose])}
+        for i in range(rng.choices((0, 1, 2, 3), weights=(30, 40, 20, 10))[0])
+    ]
+
+    content_use_modes = _content_modes(rng, lang, preset and preset['content_use_modes'])
+    custom_content_use_mode = ''
+    if any(mode in catalog.other_modes for mode in content_use_modes):
+        custom_content_use_mode = 'Fragmentos adaptados como ejemplos en el anexo'
+
+    human_review_level = rng.choices(range(6), weights=REVIEW_LEVEL_WEIGHTS)[0]
+    if preset:
+        # Los presets pueden traer un nivel fuera de rango (0..5)
+        human_review_level = min(preset['human_review_level'], 5)
+    reviewer_name = reviewer_role = ''
+    if human_review_level > 0:
+        reviewer_name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        reviewer_role = preset['reviewer_role'] if preset else rng.choice(REVIEWER_ROLES)
+
+    tool_name, tool_version, tool_provider = _tool(rng)
+    usage_date = created_at - timedelta(days=rng.randint(0, 120))
+    declaration = Declaration(
+        declaration_id=identifier_for(DECLARATION, value),
+        selected_checklist_ids=[item['id'] for item in checklist],
+        usage_types=usage_types,
+        custom_usage_type=custom_usage_type,
+        ai_tool_name=tool_name,
+        ai_tool_version=tool_version,
+        ai_tool_provider=tool_provider,
+        ai_tool_date_month=usage_date.month,
+        ai_tool_date_year=usage_date.year,
+        specific_purpose=specific_purpose,
+        prompts=prompts,
+        content_use_modes=content_use_modes,
+        custom_content_use_mode=custom_content_use_mode,
+        content_use_context=f"Incluido en {rng.choice(PROJECTS)}." if rng.random() < 0.6 else '',
+        human_review_level=human_review_level,
+        reviewer_name=reviewer_name,
+        reviewer_role=reviewer_role,
+        license=rng.choices([lic['value'] for lic in CC_LICENSES], weights=LICENSE_WEIGHTS)[0],
+        is_draft=rng.random() < 0.05,
+        created_at=created_at,
+        updated_at=created_at,
+    )
+    # Mismo hash que el paso 4 en el idioma de la declaración
+    declaration.validation_hash = compute_hash(generate_declaration_body(declaration, lang))
+    # bulk_create no llama a save(): las columnas normalizadas se asignan aquí
+    declaration.hash_lookup = normalize_lookup(declaration.validation_hash)
+    declaration.id_lookup = normalize_lookup(declaration.declaration_id)
+    return declaration
+
+
+def build_signer(rng, value, created_at):
+    """Signer sin guardar para el valor `value` del contador de firmantes"""
+    country = _weighted(rng, _country_weights)
+    with translation.override(COUNTRY_LANGUAGES.get(country, 'es')):
+        discipline = gettext(_weighted(rng, DISCIPLINE_WEIGHTS))
+    first, last, second_last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), rng.choice(LAST_NAMES)
+    full_name = f"{first} {last} {second_last}"
+    # El valor del contador hace únicos el email y el ORCID
+    email = f"{first}.{last}.{value}@example.org".lower()
+    orcid = f"0009-{value // 10**8 % 10**4:04d}-{value // 10**4 % 10**4:04d}-{value % 10**4:04d}"
+    affiliation = rng.choice(AFFILIATIONS.get(country, GENERIC_AFFILIATIONS))
+    orcid_verified = rng.random() < ORCID_VERIFIED_SHARE
+    validation_hash = hashlib.sha256(f"{full_name}{email}{orcid}{affiliation}{created_at}".encode()).hexdigest()
+    return Signer(
+        signer_id=identifier_for(SIGNER, value),
+        validation_hash=validation_hash,
+        # Provisorio (único); assign_hash_shorts() asigna el prefijo definitivo
+        hash_short=validation_hash,
+        full_name=full_name,
+        email=email,
+        orcid=orcid,
+        country=country,
+        affiliation=affiliation,
+        discipline=discipline,
+        orcid_verified=orcid_verified,
+        orcid_registered_name=full_name if orcid_verified else None,
+        public_listing=rng.random() < PUBLIC_LISTING_SHARE,
+        created_at=created_at,
+        updated_at=created_at,
+    )
+
+
+BUILDERS = {DECLARATION: (Declaration, build_declaration), SIGNER: (Signer, build_signer)}
+
+
+def generate_batch(task):
+    """
+    Genera e inserta un lote. `task` es una tupla (tipo, número de lote, primer
+    valor del contador, cantidad, posición del lote, total, semilla, inicio,
+    fin, base de datos); retorna (tipo, filas insertadas).
+    """
+    kind, batch_no, first_value, count, offset, total, seed, start, end, using = task
+    model, build = BUILDERS[kind]
+    rng = batch_random(seed, kind, batch_no)
+    timestamps = batch_timestamps(rng, count, offset, total, start, end)
+    rows = [build(rng, first_value + i, created_at) for i, created_at in enumerate(timestamps)]
+    with preserve_timestamps(model), transaction.atomic(using=using):
+        model.objects.using(using).bulk_create(rows)
+    return kind, len(rows)
+
+
+def _hashes_in_order(using, batch_size):
+    """(pk, validation_hash, hash_short) de todos los firmantes, por validation_hash (paginación por keyset)"""
+    last = ''
+    while True:
+        rows = list(
+            Signer.objects.using(using).filter(validation_hash__gt=last)
+            .order_by('validation_hash').values_list('pk', 'validation_hash', 'hash_short')[:batch_size]
+        )
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        last = rows[-1][1]
+
+
+def _common_prefix(a, b):
+    return len(os.path.commonprefix([a, b])) if a and b else 0
+
+
+def assign_hash_shorts(using='default', batch_size=5000):
+    """
+    Asigna el prefijo único más corto (ver Signer.allocate_hash_short) a los
+    firmantes con el hash corto provisorio. Con los hashes ordenados basta
+    comparar cada uno con sus dos vecinos: una sola pasada en vez de una
+    consulta por firmante. Retorna la cantidad de firmantes actualizados.
+    """
+    pending, updated = [], 0
+    previous = current = None
+    for following in [*_hashes_in_order(using, batch_size), None]:
+        if current is not None and current[2] == current[1]:
+            length = max(
+                HASH_SHORT_MIN_LENGTH,
+                _common_prefix(current[1], previous and previous[1]) + 1,
+                _common_prefix(current[1], following and following[1]) + 1,
+            )
+            pending.append(Signer(pk=current[0], hash_short=current[1][:length]))
+        if len(pending) >= batch_size or (following is None and pending):
+            with transaction.atomic(using=using):
+                Signer.objects.using(using).bulk_update(pending, ['hash_short'], batch_size=500)
+            updated += len(pending)
+            pending = []
+        previous, current = current, following
+    return updated
@@ -0,0 +1,25 @@
+"""
+Backend de plantillas con medición del tiempo de renderizado (core/timing.py)
+"""
+from django.template.backends.django import DjangoTemplates, Template
+
+from .timing import timed
+
+
+class TimedTemplate(Template):
+    """Plantilla cuyo render suma su duración a la fase 'template' de la solicitud"""
+
+    @timed('template')
+    def render(self, context=None, request=None):
+        return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates que retorna TimedTemplate (los {% include %} cuentan dentro de la plantilla principal)"""
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
@@ -1,3 +1,1018 @@
-from django.test import TestCase
+"""
+Tests de la aplicación core: presupuestos de consultas por URL, identificadores,
+búsquedas, paginación, firmantes, exportaciones, cachés, reCAPTCHA, vista previa,
+métricas y migraciones con datos.
+"""
+import csv
+import gzip
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
+import requests
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver
+
+from . import identifiers, metrics
+from .cache_backends import LRUFileBasedCache
+from .exports import get_export_queryset, iter_encoded, iter_export_rows
+from .fulltext import search_declarations, search_signers
+from .recaptcha import CLOSED, HALF_OPEN, OPEN, RecaptchaClient
+from .identifiers import (
+    ALPHABET, DECLARATION, SIGNER, Permutation, check_character, identifier_for, is_valid_identifier,
+    reserve_identifiers,
+)
+from .models import Counter, Declaration, Signer, shortest_unique_prefix
+from .pagination import decode_cursor, encode_cursor, keyset_page
+from .query_budget import QueryRecorder
+from .synthetic import assign_hash_shorts, generate_batch
+from .views.search import (
+    MIN_PREFIX_LENGTH, PREFIX_MATCH_LIMIT, prefix_upper_bound, resolve_declaration_query,
+)
+
+SEED = 20240501
+SEED_SIGNERS = 120  # más de dos páginas del directorio (SIGNERS_PAGE_SIZE = 50)
+SEED_DECLARATIONS = 60
+
+# Consultas máximas por solicitud (nombre de URL -> presupuesto)
+BUDGETS = {
+    'home': 0,
+    # Sesión: existencia de la clave, INSERT/UPDATE en un savepoint
+    'step1': 4,
+    'step2': 3,
+    'step3': 3,
+    # Reserva del ID (UPDATE + SELECT del contador) y guardado de la sesión
+    'step4': 7,
+    'download_text': 0,
+    'download_json': 0,
+    'load_preset': 4,
+    'search': 2,
+    'view_declaration': 1,
+    'privacy': 0,
+    'preview_declaration': 0,
+    # INSERT, índice de búsqueda (DELETE + INSERT) y sesión
+    'save_declaration': 6,
+    # Disciplinas (caché fría), contador de públicos y página; con q=, ids del índice y filas
+    'signers_list': 3,
+    'signer_search': 2,
+    'signer_register': 0,
+    # Reserva del ID, sonda del hash corto, INSERT, contador de públicos e índice de búsqueda
+    'signer_create': 11,
+    'signer_verify': 1,
+    # Usuario de la sesión y exportación en streaming
+    'export_data': 2,
+    'metrics': 0,
+    'set_language': 0,
+}
+
+STEP3_FORM = {
+    'ai_tool_name': 'ChatGPT', 'ai_tool_version': 'GPT-4o', 'ai_tool_provider': 'OpenAI',
+    'ai_tool_date_month': '5', 'ai_tool_date_year': '2025',
+    'specific_purpose': 'Redacción y revisión del capítulo de resultados de la tesis.',
+    'prompt_0': 'Mejora la redacción del siguiente párrafo.',
+    'content_use_modes': ['Otro'], 'content_use_context': 'Tesis doctoral.',
+    'human_review_level': '3', 'reviewer_name': 'Ana Pérez', 'reviewer_role': 'Directora',
+    'license': 'CC BY 4.0',
+}
+
+
+def url_names(patterns, namespace=None):
+    """Nombres de las URLs del proyecto (sin las de aplicaciones incluidas con namespace, como admin)"""
+    names = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if not pattern.namespace:
+                names |= url_names(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            names.add(pattern.name)
+    return names
+
+
+@override_settings(RECAPTCHA_ENABLED=False, SESSION_CACHE_ALIAS='default', METRICS_ENABLED=False)
+class QueryBudgetTests(TestCase):
+    """
+    Presupuestos de consultas SQL por URL
+
+    Cada URL de config/urls.py se solicita sobre una base sembrada con
+    core.synthetic y se registran sus consultas con core.query_budget. El test
+    falla si una solicitud supera el presupuesto de BUDGETS, repite una consulta
+    idéntica o repite la misma consulta con distintos parámetros (N+1); el mensaje
+    lista las consultas ejecutadas. Una URL nueva sin presupuesto también falla.
+
+    Las cachés se vacían antes de cada test: los presupuestos son los de una
+    solicitud con la caché fría. Dentro de TestCase las transacciones de las vistas
+    son savepoints y el contador de IDs reserva de a un valor (ver
+    core.identifiers), y esas consultas cuentan en el presupuesto.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        end = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        start = end - timedelta(days=365)
+        for kind, total in ((SIGNER, SEED_SIGNERS), (DECLARATION, SEED_DECLARATIONS)):
+            first = reserve_identifiers(kind, total)
+            generate_batch((kind, 0, first, total, 0, total, SEED, start, end, 'default'))
+        # bulk_create no pasa por save(): hash corto, contador e índices de búsqueda
+        assign_hash_shorts()
+        Counter.recount_public_signers()
+        call_command('rebuild_search_index', stdout=StringIO())
+        cls.declaration = Declaration.objects.order_by('pk').first()
+        cls.signer = Signer.objects.filter(public_listing=True).order_by('pk').first()
+        cls.staff = get_user_model().objects.create_user('staff', password='x', is_staff=True)
+
+    def setUp(self):
+        for alias in ('default', settings.DECLARATION_CACHE_ALIAS):
+            caches[alias].clear()
+
+    def assertQueryBudget(self, name, request):
+        """Ejecuta `request()` (una solicitud del cliente) y verifica el presupuesto de `name`"""
+        with QueryRecorder() as recorder:
+            response = request()
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertLess(response.status_code, 500)
+        problems = recorder.problems(BUDGETS[name])
+        if problems:
+            self.fail(f"{name}: " + '; '.join(problems) + f"\nConsultas:\n{recorder.report()}")
+        return response
+
+    def complete_wizard(self):
+        self.client.post('/es/paso1/', {'checklist': ['q1', 'q3']})
+        self.client.post('/es/paso2/', {'usage_types': ['draft', 'analysis'], 'custom_usage_type': ''})
+        self.client.post('/es/paso3/', STEP3_FORM)
+
+    def test_every_url_has_a_budget(self):
+        self.assertEqual(url_names(get_resolver().url_patterns), set(BUDGETS))
+
+    def test_wizard(self):
+        self.assertQueryBudget('home', lambda: self.client.get('/es/'))
+        self.assertQueryBudget('step1', lambda: self.client.get('/es/paso1/'))
+        self.assertQueryBudget('step1', lambda: self.client.post('/es/paso1/', {'checklist': ['q1', 'q3']}))
+        self.assertQueryBudget('step2', lambda: self.client.get('/es/paso2/'))
+        self.assertQueryBudget('step2', lambda: self.client.post(
+            '/es/paso2/', {'usage_types': ['draft', 'analysis'], 'custom_usage_type': ''}))
+        self.assertQueryBudget('step3', lambda: self.client.get('/es/paso3/'))
+        self.assertQueryBudget('step3', lambda: self.client.post('/es/paso3/', STEP3_FORM))
+        self.assertQueryBudget('step4', lambda: self.client.get('/es/paso4/'))
+        self.assertQueryBudget('step4', lambda: self.client.get('/es/paso4/'))
+
+    def test_preset_and_preview(self):
+        self.assertQueryBudget('load_preset', lambda: self.client.post('/es/cargar-plantilla/', {'preset_id': 'thesis-edit'}))
+        body = json.dumps({'specific_purpose': 'Redacción del capítulo de resultados.'})
+        self.assertQueryBudget('preview_declaration', lambda: self.client.post(
+            '/es/api/preview/', body, content_type='application/json'))
+
+    def test_downloads_and_save(self):
+        self.complete_wizard()
+        self.client.get('/es/paso4/')
+        self.assertQueryBudget('download_text', lambda: self.client.get('/es/descargar/texto/'))
+        self.assertQueryBudget('download_json', lambda: self.client.get('/es/descargar/json/'))
+        response = self.assertQueryBudget('save_declaration', lambda: self.client.post('/es/api/guardar/'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_search(self):
+        declaration = self.declaration
+        self.assertQueryBudget('search', lambda: self.client.get('/es/buscar/'))
+        self.assertQueryBudget('search', lambda: self.client.post('/es/buscar/', {'query': declaration.validation_hash[:8]}))
+        self.assertQueryBudget('search', lambda: self.client.post('/es/buscar/', {'query': declaration.declaration_id}))
+        self.assertQueryBudget('search', lambda: self.client.get('/es/buscar/', {'q': 'tesis'}))
+        response = self.assertQueryBudget('view_declaration', lambda: self.client.get(
+            f'/es/declaracion/{declaration.declaration_id}/'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_signers_directory(self):
+        response = self.assertQueryBudget('signers_list', lambda: self.client.get('/es/firmantes/'))
+        next_cursor = response.context['next_cursor']
+        self.assertTrue(next_cursor)
+        self.assertQueryBudget('signers_list', lambda: self.client.get('/es/firmantes/', {'after': next_cursor}))
+        self.assertQueryBudget('signers_list', lambda: self.client.get('/es/firmantes/', {'country': 'México'}))
+        self.assertQueryBudget('signers_list', lambda: self.client.get('/es/firmantes/', {'q': 'universidad'}))
+        self.assertQueryBudget('signer_search', lambda: self.client.get('/es/api/firmantes/buscar/', {'q': 'gonz'}))
+        response = self.assertQueryBudget('signer_verify', lambda: self.client.get(f'/es/v/{self.signer.hash_short}/'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_signer_registration(self):
+        self.assertQueryBudget('signer_register', lambda: self.client.get('/es/firmar/'))
+        body = json.dumps({
+            'fullName': 'Ana Pérez', 'email': 'ana.perez@example.org', 'orcid': '0000-0002-1825-0097',
+            'affiliation': 'Universidad de Chile', 'discipline': 'Investigador', 'country': 'Chile',
+        })
+        response = self.assertQueryBudget('signer_create', lambda: self.client.post(
+            '/es/api/firmar/', body, content_type='application/json'))
+        self.assertEqual(response.status_code, 200)
+        # Duplicado: la respuesta de error tampoco debe pasarse del presupuesto
+        self.assertQueryBudget('signer_create', lambda: self.client.post(
+            '/es/api/firmar/', body, content_type='application/json'))
+
+    def test_privacy(self):
+        self.assertQueryBudget('privacy', lambda: self.client.get('/es/privacidad/'))
+
+    def test_export_and_metrics(self):
+        self.client.force_login(self.staff)
+        self.assertQueryBudget('export_data', lambda: self.client.get('/exportar/declarations/', {'format': 'jsonl'}))
+        self.assertQueryBudget('export_data', lambda: self.client.get('/exportar/signers/', {'format': 'csv'}))
+        self.assertQueryBudget('metrics', lambda: self.client.get('/metrics'))
+        self.assertQueryBudget('set_language', lambda: self.client.post('/i18n/setlang/', {'language': 'en', 'next': '/en/'}))
+
+
+class QueryRecorderTests(TestCase):
+
+    def test_duplicates_and_repeated_queries(self):
+        with QueryRecorder() as recorder:
+            Counter.get_value(Counter.PUBLIC_SIGNERS)
+            Counter.get_value(Counter.PUBLIC_SIGNERS)
+            for pk in (1, 2, 3):
+                list(Signer.objects.filter(pk=pk))
+        self.assertEqual(len(recorder), 5)
+        self.assertEqual([count for count, _, _ in recorder.duplicates()], [2])
+        self.assertEqual([count for count, _ in recorder.repeated()], [3])
+        self.assertEqual(len(recorder.problems(budget=5)), 2)
+        self.assertIn('5 consultas, presupuesto 4', recorder.problems(budget=4)[0])
+
+    def test_in_lists_of_different_length_are_the_same_query(self):
+        with QueryRecorder() as recorder:
+            for pks in ([1], [1, 2], [1, 2, 3]):
+                list(Signer.objects.filter(pk__in=pks))
+        self.assertEqual([count for count, _ in recorder.repeated()], [3])
+
+
+def create_declaration(validation_hash):
+    return Declaration.objects.create(
+        validation_hash=validation_hash, usage_types=['draft'], ai_tool_name='ChatGPT',
+        ai_tool_date_month=5, ai_tool_date_year=2025, specific_purpose='Prueba.',
+    )
+
+
+class DeclarationLookupTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.declaration = create_declaration('3FA9C0D2E4B61785')
+        # Hashes que comparten el prefijo 'E7E7E7' (más candidatas que PREFIX_MATCH_LIMIT)
+        cls.ambiguous = [create_declaration(f'E7E7E7{n:010X}') for n in range(PREFIX_MATCH_LIMIT + 2)]
+
+    def test_exact_hash_and_id(self):
+        declaration = self.declaration
+        self.assertEqual(resolve_declaration_query(' 3fa9c0d2e4b61785 '), (declaration, []))
+        self.assertEqual(resolve_declaration_query(declaration.declaration_id.lower()), (declaration, []))
+
+    def test_unique_prefix(self):
+        self.assertEqual(resolve_declaration_query('3fa9c0d2'), (self.declaration, []))
+
+    def test_ambiguous_prefix_is_limited(self):
+        declaration, candidates = resolve_declaration_query('e7e7e7')
+        self.assertIsNone(declaration)
+        self.assertEqual(len(candidates), PREFIX_MATCH_LIMIT + 1)
+        self.assertTrue(all(d.hash_lookup.startswith('E7E7E7') for d in candidates))
+        created = [d.created_at for d in candidates]
+        self.assertEqual(created, sorted(created, reverse=True))
+
+    def test_short_or_invalid_prefix_is_not_searched(self):
+        short = self.declaration.validation_hash[:MIN_PREFIX_LENGTH - 1]
+        self.assertEqual(resolve_declaration_query(short), (None, []))
+        self.assertEqual(resolve_declaration_query('3FA9C0-'), (None, []))
+        self.assertEqual(resolve_declaration_query('   '), (None, []))
+
+    def test_prefix_upper_bound(self):
+        self.assertEqual(prefix_upper_bound('3FA9'), '3FAA')
+        self.assertEqual(prefix_upper_bound('3FA9C9'), '3FA9CA')
+        self.assertEqual(prefix_upper_bound('AZ'), 'B')
+        self.assertEqual(prefix_upper_bound('AZZ'), 'B')
+        self.assertIsNone(prefix_upper_bound('ZZZ'))
+        self.assertIsNone(prefix_upper_bound(''))
+
+
+
+class DeclarationFulltextTests(TestCase):
+    """Búsqueda de texto completo de declaraciones y su uso en el admin"""
+
+    @classmethod
+    def setUpTestData(cls):
+        def create(validation_hash, **fields):
+            declaration = create_declaration(validation_hash)
+            for name, value in fields.items():
+                setattr(declaration, name, value)
+            declaration.save()
+            return declaration
+
+        # 'revisión' en columnas de distinto peso: herramienta > propósito > prompts > contexto
+        cls.context = create('10000000000000AA', content_use_context='Texto para revisión externa.')
+        cls.prompts = create('20000000000000AA', prompts=[{'description': 'Pide una revisión de estilo'}])
+        cls.purpose = create('30000000000000AA', specific_purpose='Revision de la bibliografía.')
+        cls.tool = create('40000000000000AA', ai_tool_name='Revisión GPT')
+        cls.draft = create('50000000000000AA', ai_tool_name='Revisión GPT', is_draft=True)
+
+    def test_ranked_by_column_weight(self):
+        result = search_declarations('REVISION')
+        self.assertEqual(result['items'], [self.tool, self.purpose, self.prompts, self.context])
+        self.assertFalse(result['has_next'])
+
+    def test_drafts_and_paging(self):
+        self.assertIn(self.draft, search_declarations('revisión', include_drafts=True)['items'])
+        first = search_declarations('revis', page_size=3)
+        second = search_declarations('revis', page=2, page_size=3)
+        self.assertTrue(first['has_next'])
+        self.assertEqual(first['items'] + second['items'], [self.tool, self.purpose, self.prompts, self.context])
+        self.assertEqual((second['has_next'], second['has_previous']), (False, True))
+
+    def test_no_terms_or_no_matches(self):
+        self.assertEqual(search_declarations('  ¿? ')['items'], [])
+        self.assertEqual(search_declarations('inexistente')['items'], [])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.purpose.specific_purpose = 'Traducción.'
+        self.purpose.save()
+        self.context.delete()
+        self.assertEqual(search_declarations('revisión')['items'], [self.tool, self.prompts])
+        self.assertEqual(search_declarations('traduccion')['items'], [self.purpose])
+
+    def test_admin_merges_text_and_exact_matches(self):
+        model_admin = admin.site._registry[Declaration]
+        queryset = Declaration.objects.all()
+        by_text, _ = model_admin.get_search_results(None, queryset, 'revision')
+        self.assertEqual(set(by_text), {self.tool, self.purpose, self.prompts, self.context, self.draft})
+        by_hash, _ = model_admin.get_search_results(None, queryset, ' 40000000000000aa ')
+        self.assertEqual(list(by_hash), [self.tool])
+        by_id, _ = model_admin.get_search_results(None, queryset, self.prompts.declaration_id.lower())
+        self.assertEqual(list(by_id), [self.prompts])
+        # Ambos criterios en la misma consulta (sin duplicados)
+        both, _ = model_admin.get_search_results(None, queryset.exclude(pk=self.draft.pk), 'revision')
+        self.assertEqual(both.count(), 4)
+        self.assertEqual(model_admin.get_search_results(None, queryset, '  ')[0].count(), 5)
+
+def create_signer(email, orcid):
+    return Signer.objects.create(
+        full_name='Ana Pérez', email=email, orcid=orcid,
+        affiliation='Universidad de Chile', discipline='Investigador',
+    )
+
+
+
+class SignerSearchTests(TestCase):
+    """Búsqueda del directorio de firmantes (search_signers y API de sugerencias)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        def create(number, full_name, affiliation, discipline, country, **fields):
+            return Signer.objects.create(
+                full_name=full_name, email=f'firmante{number}@example.org', orcid=f'0000-0000-0000-000{number}',
+                affiliation=affiliation, discipline=discipline, country=country, **fields,
+            )
+
+        cls.munoz = create(1, 'José Muñoz', 'Universidad de Chile', 'Biología', 'Chile', orcid_verified=True)
+        cls.alvarez = create(2, 'Josefina Álvarez', 'Universidad Católica', 'Física', 'Chile')
+        cls.perez = create(3, 'JOSE Pérez', 'UNAM', 'Biología', 'México', orcid_verified=True)
+        cls.hidden = create(4, 'José Oculto', 'Universidad de Chile', 'Biología', 'Chile', public_listing=False)
+
+    def search(self, query, filters=None, **kwargs):
+        return search_signers(query, filters, **kwargs)['items']
+
+    def test_accent_and_case_insensitive(self):
+        self.assertEqual(self.search('jose'), [self.perez, self.alvarez, self.munoz])
+        self.assertEqual(self.search('MUNOZ'), [self.munoz])
+        self.assertEqual(self.search('álvarez católica'), [self.alvarez])
+        self.assertEqual(self.search('biologia'), [self.perez, self.munoz])
+
+    def test_only_public_signers(self):
+        self.assertEqual(self.search('oculto'), [])
+        self.assertEqual(self.search('  '), [])
+
+    def test_filters(self):
+        self.assertEqual(self.search('jose', {'country': 'Chile'}), [self.alvarez, self.munoz])
+        self.assertEqual(self.search('jose', {'discipline': 'Biología'}), [self.perez, self.munoz])
+        self.assertEqual(self.search('jose', {'orcid_verified': True}), [self.perez, self.munoz])
+        self.assertEqual(self.search('jose', {'country': 'Chile', 'orcid_verified': True}), [self.munoz])
+
+    def test_paging(self):
+        first = search_signers('jo', page_size=2)
+        second = search_signers('jo', page=2, page_size=2)
+        self.assertEqual((first['items'], first['has_next'], first['has_previous']), ([self.perez, self.alvarez], True, False))
+        self.assertEqual((second['items'], second['has_next'], second['has_previous']), ([self.munoz], False, True))
+
+    def test_fields(self):
+        signer = self.search('munoz', fields=('pk', 'full_name'))[0]
+        self.assertIn('email', signer.get_deferred_fields())
+        self.assertNotIn('full_name', signer.get_deferred_fields())
+
+    def test_index_follows_updates(self):
+        self.munoz.full_name = 'Juan Muñoz'
+        self.munoz.save()
+        self.assertEqual(self.search('jose'), [self.perez, self.alvarez])
+        self.perez.delete()
+        self.assertEqual(self.search('biologia'), [self.munoz])
+
+    def test_suggestions_api(self):
+        response = self.client.get('/es/api/firmantes/buscar/', {'q': 'JOSÉ', 'verified': '1', 'country': 'Chile'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'results': [{
+            'fullName': 'José Muñoz',
+            'affiliation': 'Universidad de Chile',
+            'discipline': 'Biología',
+            'country': 'Chile',
+            'orcidVerified': True,
+            'hashShort': self.munoz.hash_short,
+            'verificationUrl': f'/es/v/{self.munoz.hash_short}/',
+        }]})
+        self.assertEqual(self.client.get('/es/api/firmantes/buscar/', {'discipline': 'Física'}).json(), {'results': []})
+
+
+class KeysetPaginationTests(TestCase):
+    """Paginación por cursor de core/pagination.py (orden -created_at, -id)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        base = datetime(2025, 3, 1, 12, 0, tzinfo=timezone.utc)
+        # Cuatro firmantes con el mismo created_at, repartidos entre la 1.ª y la 2.ª página
+        offsets = [0, 1, 1, 1, 1, 2, 3]
+        for number, minutes in enumerate(offsets):
+            signer = create_signer(f'firmante{number}@example.org', f'0000-0000-0000-000{number}')
+            Signer.objects.filter(pk=signer.pk).update(created_at=base + timedelta(minutes=minutes, microseconds=7))
+        cls.ordered = list(Signer.objects.order_by('-created_at', '-pk'))
+
+    def test_first_page(self):
+        page = keyset_page(Signer.objects.all(), page_size=3)
+        self.assertEqual(page['items'], self.ordered[:3])
+        self.assertEqual(page['next_cursor'], encode_cursor(self.ordered[2]))
+        self.assertIsNone(page['prev_cursor'])
+
+    def test_forward_and_backward_with_ties(self):
+        pages = [keyset_page(Signer.objects.all(), page_size=3)]
+        while pages[-1]['next_cursor']:
+            pages.append(keyset_page(Signer.objects.all(), after=pages[-1]['next_cursor'], page_size=3))
+        # Los empates en created_at quedan repartidos entre páginas sin repetir ni saltar filas
+        self.assertEqual([len(page['items']) for page in pages], [3, 3, 1])
+        self.assertEqual([s for page in pages for s in page['items']], self.ordered)
+        self.assertIsNotNone(pages[-1]['prev_cursor'])
+
+        back = keyset_page(Signer.objects.all(), before=pages[2]['prev_cursor'], page_size=3)
+        self.assertEqual(back['items'], pages[1]['items'])
+        self.assertEqual(back['next_cursor'], pages[1]['next_cursor'])
+        first = keyset_page(Signer.objects.all(), before=back['prev_cursor'], page_size=3)
+        self.assertEqual(first['items'], pages[0]['items'])
+        self.assertIsNone(first['prev_cursor'])
+
+    def test_last_page_and_empty(self):
+        last = keyset_page(Signer.objects.all(), after=encode_cursor(self.ordered[-2]), page_size=3)
+        self.assertEqual((last['items'], last['next_cursor']), ([self.ordered[-1]], None))
+        past_end = keyset_page(Signer.objects.all(), after=encode_cursor(self.ordered[-1]), page_size=3)
+        self.assertEqual(past_end, {'items': [], 'next_cursor': None, 'prev_cursor': None})
+        self.assertEqual(keyset_page(Signer.objects.none()), {'items': [], 'next_cursor': None, 'prev_cursor': None})
+
+    def test_invalid_cursor_returns_first_page(self):
+        first = keyset_page(Signer.objects.all(), page_size=3)
+        for cursor in ('abc', '12.', '1.x', '.', '9' * 400 + '.1'):
+            self.assertIsNone(decode_cursor(cursor))
+            self.assertEqual(keyset_page(Signer.objects.all(), after=cursor, page_size=3), first)
+            self.assertEqual(keyset_page(Signer.objects.all(), before=cursor, page_size=3), first)
+
+    def test_cursor_round_trip(self):
+        signer = self.ordered[0]
+        self.assertEqual(decode_cursor(encode_cursor(signer)), (signer.created_at, signer.pk))
+
+
+class PublicSignersCounterTests(TestCase):
+    """Counter.PUBLIC_SIGNERS se mantiene con las señales de Signer"""
+
+    def assertCount(self, expected):
+        self.assertEqual(Counter.get_value(Counter.PUBLIC_SIGNERS) - self.start, expected)
+
+    def setUp(self):
+        self.start = Counter.get_value(Counter.PUBLIC_SIGNERS)
+
+    def test_create_and_delete(self):
+        public = create_signer('publico@example.org', '0000-0000-0000-0001')
+        self.assertCount(1)
+        hidden = Signer.objects.create(
+            full_name='Ana Pérez', email='oculto@example.org', orcid='0000-0000-0000-0002',
+            affiliation='Universidad de Chile', discipline='Investigador', public_listing=False,
+        )
+        self.assertCount(1)
+        hidden.delete()
+        self.assertCount(1)
+        Signer.objects.get(pk=public.pk).delete()
+        self.assertCount(0)
+
+    def test_public_listing_toggle(self):
+        signer = create_signer('publico@example.org', '0000-0000-0000-0001')
+        signer.save()
+        self.assertCount(1)
+        signer.public_listing = False
+        signer.save()
+        self.assertCount(0)
+        signer.save()
+        self.assertCount(0)
+        # Instancia recién leída de la base: compara con el valor cargado
+        loaded = Signer.objects.get(pk=signer.pk)
+        loaded.public_listing = True
+        loaded.save()
+        self.assertCount(1)
+        loaded.delete()
+        self.assertCount(0)
+
+    def test_recount(self):
+        create_signer('publico@example.org', '0000-0000-0000-0001')
+        Counter.objects.filter(key=Counter.PUBLIC_SIGNERS).update(value=99)
+        self.assertEqual(Counter.recount_public_signers(), 1)
+        self.assertEqual(Counter.get_value(Counter.PUBLIC_SIGNERS), 1)
+
+class SignerUniqueConstraintTests(TransactionTestCase):
+    """Las restricciones únicas normalizadas se verifican en la base (sin transacción envolvente)"""
+
+    def assertDuplicate(self, field, email, orcid):
+        with self.assertRaises(IntegrityError) as raised:
+            create_signer(email, orcid)
+        self.assertEqual(Signer.duplicate_field(raised.exception), field)
+
+    def test_email_differing_in_case_and_whitespace(self):
+        create_signer('ana.perez@example.org', '0000-0002-1825-0097')
+        self.assertDuplicate('email', '  Ana.Perez@Example.ORG ', '0000-0001-5109-3700')
+        self.assertEqual(Signer.objects.count(), 1)
+
+    def test_orcid_differing_in_case_and_whitespace(self):
+        create_signer('ana.perez@example.org', '0000-0002-1694-233x')
+        self.assertDuplicate('orcid', 'otra@example.org', ' 0000-0002-1694-233X ')
+        self.assertEqual(Signer.objects.count(), 1)
+
+    def test_distinct_signers_are_saved(self):
+        create_signer('ana.perez@example.org', '0000-0002-1825-0097')
+        create_signer('juan.soto@example.org', '0000-0001-5109-3700')
+        self.assertEqual(Signer.objects.count(), 2)
+
+
+class IdentifierTests(TestCase):
+
+    def test_permutation_is_a_bijection_on_a_small_domain(self):
+        # Mismo algoritmo (Feistel de 10 bits con cycle walking) sobre [0, 2**9)
+        with mock.patch.multiple(identifiers, PAYLOAD_BITS=9, FEISTEL_HALF_BITS=5, FEISTEL_HALF_MASK=0b11111):
+            for namespace in (DECLARATION, SIGNER):
+                permutation = Permutation(b'clave', namespace)
+                self.assertEqual(sorted(permutation(value) for value in range(2 ** 9)), list(range(2 ** 9)))
+
+    def test_permutation_depends_on_key_and_namespace(self):
+        values = range(1000)
+        base = [Permutation(b'clave', DECLARATION)(value) for value in values]
+        self.assertEqual(len(set(base)), len(base))
+        self.assertTrue(all(0 <= value < 2 ** identifiers.PAYLOAD_BITS for value in base))
+        self.assertNotEqual(base, [Permutation(b'otra', DECLARATION)(value) for value in values])
+        self.assertNotEqual(base, [Permutation(b'clave', SIGNER)(value) for value in values])
+
+    def test_check_character_rejects_single_character_edits(self):
+        rng = random.Random(SEED)
+        for value in rng.sample(range(10 ** 6), 50):
+            identifier = identifier_for(DECLARATION, value)
+            self.assertTrue(is_valid_identifier(identifier.lower()))
+            for position in range(len(identifier)):
+                for char in ALPHABET:
+                    if char != identifier[position]:
+                        edited = identifier[:position] + char + identifier[position + 1:]
+                        self.assertFalse(is_valid_identifier(edited), edited)
+        self.assertEqual(check_character('0000000'), '0')
+
+    def test_declaration_save_retries_identifier_collisions(self):
+        existing = create_declaration('A1B2C3D4E5F60718')
+        fresh = identifier_for(DECLARATION, 10 ** 6)
+        with mock.patch('core.models.allocate_identifier', side_effect=[existing.declaration_id, fresh]):
+            declaration = create_declaration('0718A1B2C3D4E5F6')
+        self.assertEqual(declaration.declaration_id, fresh)
+        self.assertEqual(declaration.id_lookup, fresh)
+
+
+class LRUFileBasedCacheTests(TestCase):
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.cache = LRUFileBasedCache(tmpdir.name, {'OPTIONS': {'MAX_ENTRIES': 3, 'CULL_FREQUENCY': 3}})
+
+    def test_reads_do_not_write_to_disk(self):
+        self.cache.set('a', 1)
+        fname = self.cache._key_to_file('a')
+        os.utime(fname, (1, 1))
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertEqual(os.stat(fname).st_mtime, 1)
+
+    def test_cull_evicts_least_recently_used(self):
+        for key in ('a', 'b', 'c'):
+            self.cache.set(key, key)
+        self.cache.get('a')
+        self.cache.set('d', 'd')  # 3 entradas: se elimina una (la menos usada, 'b')
+        self.assertEqual([self.cache.get(key) for key in 'abcd'], ['a', None, 'c', 'd'])
+
+
+def siteverify_response(success=True):
+    response = mock.Mock()
+    response.json.return_value = {'success': success, 'error-codes': [] if success else ['invalid-input-response']}
+    return response
+
+
+@override_settings(RECAPTCHA_SECRET_KEY='secreto', METRICS_ENABLED=False)
+class RecaptchaClientTests(TestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+        patcher = mock.patch.object(requests.Session, 'post')
+        self.post = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def client_with(self, policy='closed'):
+        client = RecaptchaClient(failure_policy=policy, breaker_threshold=3, breaker_cooldown=30)
+        self.addCleanup(client.close)
+        return client
+
+    def test_circuit_breaker_transitions(self):
+        client = self.client_with()
+        self.post.side_effect = requests.exceptions.ConnectionError('sin red')
+        for attempt in range(3):
+            self.assertEqual(client.breaker.state, CLOSED)
+            self.assertEqual(client.verify(f'token-{attempt}')['error_codes'], ['connection-error'])
+        self.assertEqual(client.breaker.state, OPEN)
+        self.assertEqual(client.verify('token-3')['error_codes'], ['circuit-open'])
+        self.assertEqual(self.post.call_count, 3)
+
+        # Pasado el cooldown: una sola solicitud de prueba; las concurrentes no llaman a la API
+        client.breaker.opened_at -= 30
+        self.assertEqual(client.breaker.state, HALF_OPEN)
+
+        def trial(*args, **kwargs):
+            self.assertEqual(client.verify('concurrente')['error_codes'], ['circuit-open'])
+            return siteverify_response()
+
+        self.post.side_effect = trial
+        self.assertTrue(client.verify('token-4')['success'])
+        self.assertEqual(self.post.call_count, 4)
+        self.assertEqual(client.breaker.state, CLOSED)
+
+    def test_failed_trial_reopens_the_circuit(self):
+        client = self.client_with()
+        self.post.side_effect = requests.exceptions.Timeout('lento')
+        for attempt in range(3):
+            client.verify(f'token-{attempt}')
+        client.breaker.opened_at -= 30
+        client.verify('token-3')
+        self.assertEqual(client.breaker.state, OPEN)
+        self.assertEqual(self.post.call_count, 4)
+
+    def test_failure_policies(self):
+        self.post.side_effect = requests.exceptions.ConnectionError('sin red')
+        closed = self.client_with('closed').verify('token')
+        self.assertFalse(closed['success'])
+        self.assertNotIn('degraded', closed)
+        opened = self.client_with('open').verify('token')
+        self.assertTrue(opened['success'])
+        self.assertTrue(opened['degraded'])
+
+    def test_verified_tokens_are_cached(self):
+        client = self.client_with()
+        self.post.return_value = siteverify_response()
+        self.assertTrue(client.verify('token', '10.0.0.1')['success'])
+        self.assertEqual(client.verify('token', '10.0.0.1'), {'success': True, 'error_codes': [], 'cached': True})
+        self.assertEqual(self.post.call_count, 1)
+        # Otra IP u otro token sí consultan la API; los rechazos no se guardan
+        client.verify('token', '10.0.0.2')
+        self.post.return_value = siteverify_response(success=False)
+        client.verify('falso', '10.0.0.1')
+        client.verify('falso', '10.0.0.1')
+        self.assertEqual(self.post.call_count, 4)
+        self.assertEqual(client.metrics()['outcomes'], {'success': 2, 'cache_hit': 1, 'rejected': 2})
+
+
+PREVIEW_FORM = {
+    'usage_types': ['draft', 'analysis'],
+    'ai_tool': {'name': 'ChatGPT', 'version': 'GPT-4o', 'provider': 'OpenAI', 'date_month': 5, 'date_year': 2025},
+    'specific_purpose': 'Redacción del capítulo de resultados.',
+    'prompts': [{'description': 'Mejora la redacción del siguiente párrafo.'}],
+    'human_review': {'level': 3, 'reviewer_name': 'Ana Pérez', 'reviewer_role': 'Directora'},
+    'license': 'CC BY 4.0',
+}
+
+
+@override_settings(RECAPTCHA_ENABLED=False, SESSION_CACHE_ALIAS='default', METRICS_ENABLED=False)
+class PreviewTests(TestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def preview(self, form, etag=None):
+        headers = {'If-None-Match': etag} if etag else {}
+        return self.client.post('/es/api/preview/', json.dumps(form), content_type='application/json', headers=headers)
+
+    def test_unchanged_preview_is_not_modified(self):
+        response = self.preview(PREVIEW_FORM)
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertFalse(payload['partial'])
+        self.assertIn('Redacción del capítulo de resultados.', payload['sections']['purpose'])
+        etag = response['ETag']
+        self.assertEqual(payload['etag'], etag)
+
+        response = self.preview(PREVIEW_FORM, etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+    def test_changed_field_sends_only_changed_sections(self):
+        etag = self.preview(PREVIEW_FORM)['ETag']
+        response = self.preview(dict(PREVIEW_FORM, specific_purpose='Traducción del resumen.'), etag)
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertTrue(payload['partial'])
+        self.assertEqual(payload['base'], etag)
+        self.assertNotEqual(payload['etag'], etag)
+        self.assertEqual(list(payload['sections']), ['purpose'])
+        self.assertIn('Traducción del resumen.', payload['sections']['purpose'])
+
+    def test_unknown_etag_sends_every_section(self):
+        response = self.preview(PREVIEW_FORM, '"desconocido"')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.json()['partial'])
+        self.assertIn('header', response.json()['sections'])
+
+
+def dead_pid():
+    """Pid de un proceso que ya terminó"""
+    process = subprocess.Popen([sys.executable, '-c', ''])
+    process.wait()
+    return process.pid
+
+
+@override_settings(METRICS_ENABLED=True)
+class MetricsArchiveTests(TestCase):
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.directory = Path(tmpdir.name)
+        override = override_settings(METRICS_DIR=tmpdir.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        # Registro vacío: las métricas de otros tests no cuentan en este proceso
+        patcher = mock.patch.object(metrics, 'registry', metrics.Registry())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write_worker(self, name, requests):
+        snapshot = {
+            'counters': [['declarador_http_requests_total', [['view', 'home']], requests]],
+            'histograms': [['declarador_recaptcha_duration_seconds', [], [requests] + [0] * 11 + [0.5]]],
+        }
+        (self.directory / name).write_text(json.dumps(snapshot))
+
+    def requests_total(self):
+        counters, histograms = metrics.collect()
+        return (counters[('declarador_http_requests_total', (('view', 'home'),))],
+                histograms[('declarador_recaptcha_duration_seconds', ())][0])
+
+    def test_dead_workers_are_merged_into_the_archive(self):
+        pid = dead_pid()
+        self.write_worker(f'{pid}-aaaa.json', 3)
+        self.write_worker(f'{pid}-bbbb.json', 4)
+        self.write_worker(f'{os.getppid()}-cccc.json', 5)  # proceso vivo
+        self.assertEqual(self.requests_total(), (12, 12))
+        self.assertEqual(
+            sorted(path.name for path in self.directory.glob('*.json')),
+            sorted([metrics.ARCHIVE_NAME, f'{os.getppid()}-cccc.json', metrics._process_path().name]),
+        )
+        # Un segundo worker terminado se suma al archivo existente
+        self.write_worker(f'{dead_pid()}-dddd.json', 1)
+        self.assertEqual(self.requests_total(), (13, 13))
+        self.assertEqual(metrics.archive_dead_workers(), 0)
+
+    def test_merged_file_left_behind_is_not_counted_twice(self):
+        name = f'{dead_pid()}-aaaa.json'
+        self.write_worker(name, 3)
+        self.assertEqual(self.requests_total(), (3, 3))
+        # Corte entre la escritura del archivo y el borrado del worker
+        self.write_worker(name, 3)
+        archive = json.loads((self.directory / metrics.ARCHIVE_NAME).read_text())
+        archive['merged'] = [name]
+        (self.directory / metrics.ARCHIVE_NAME).write_text(json.dumps(archive))
+        self.assertEqual(self.requests_total(), (3, 3))
+        self.assertFalse((self.directory / name).exists())
+
+    def test_merged_names_are_kept_while_their_files_exist(self):
+        pid = dead_pid()
+        name = f'{pid}-aaaa.json'
+        self.write_worker(name, 3)
+        self.assertEqual(self.requests_total(), (3, 3))
+        # El archivo quedó tras el corte y su pid se reutiliza: este recorrido no lo ve terminado
+        self.write_worker(name, 3)
+        archive_path = self.directory / metrics.ARCHIVE_NAME
+        archive = json.loads(archive_path.read_text())
+        archive['merged'] = [name, '1-borrado.json']
+        archive_path.write_text(json.dumps(archive))
+        other = f'{dead_pid()}-bbbb.json'
+        self.write_worker(other, 2)
+        with mock.patch.object(metrics, '_pid_alive', lambda candidate: candidate == pid):
+            self.assertEqual(metrics.archive_dead_workers(), 1)
+        self.assertEqual(json.loads(archive_path.read_text())['merged'], sorted([name, other]))
+        # Cuando el pid termina, el archivo se elimina sin sumarlo otra vez
+        self.assertEqual(self.requests_total(), (5, 5))
+        self.assertFalse((self.directory / name).exists())
+        self.assertEqual(json.loads(archive_path.read_text())['merged'], [name])
+
+
+class HashShortTests(TestCase):
+
+    def test_shortest_unique_prefix(self):
+        value = 'abcdef0123456789'
+        self.assertEqual(shortest_unique_prefix(value, []), 'abcdef01')
+        self.assertEqual(shortest_unique_prefix(value, [value, '12345678aaaa']), 'abcdef01')
+        self.assertEqual(shortest_unique_prefix(value, ['abcdef0199999999']), 'abcdef012')
+        self.assertEqual(shortest_unique_prefix(value, ['abcdef0199999999', 'abcdef0123459999']), 'abcdef0123456')
+        self.assertEqual(shortest_unique_prefix(value, ['abcdef0123456789ff']), value)
+
+    def test_save_extends_colliding_prefixes(self):
+        hashes = iter(['ffffffff' + '0' * 56, 'ffffffff0' + '1' * 55, 'ffffffff00001' + '0' * 51, 'abcdef01' + '0' * 56])
+
+        def generate(signer, signer_id=True, validation_hash=True, using='default'):
+            signer.signer_id = identifiers.allocate_identifier(SIGNER, using=using)
+            signer.validation_hash = next(hashes)
+
+        with mock.patch.object(Signer, '_generate_identifiers', autospec=True, side_effect=generate):
+            signers = [create_signer(f'firmante{n}@example.org', f'0000-0000-0000-000{n}') for n in range(4)]
+        self.assertEqual([signer.hash_short for signer in signers], [
+            'ffffffff',                # primero: no había otro con ese prefijo
+            'ffffffff01',              # difiere del anterior en el 10.º carácter
+            'ffffffff00001',           # comparte 12 caracteres con el primero
+            'abcdef01',
+        ])
+        # Recalculado ahora, el primero también necesita 13 caracteres
+        signers[0].allocate_hash_short()
+        self.assertEqual(signers[0].hash_short, 'ffffffff00000')
+
+
+class MigrationTestCase(TransactionTestCase):
+    """Migra a `before`, deja crear datos con el modelo histórico y migra a `after`"""
+
+    before = None
+    after = None
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        self.addCleanup(self.migrate_to_latest)
+        executor.migrate(self.before)
+        self.old_apps = executor.loader.project_state(self.before).apps
+
+    def migrate_to_latest(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def migrate_forward(self):
+        """Aplica `after` y retorna las apps del estado resultante"""
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        return executor.loader.project_state(self.after).apps
+
+
+class HashShortMigrationTests(MigrationTestCase):
+    """0009 alarga los hash cortos repetidos antes de crear el índice único"""
+
+    before = [('core', '0008_signer_unique_email_orcid')]
+    after = [('core', '0009_signer_hash_short_unique')]
+
+    def test_colliding_hash_shorts_are_extended(self):
+        OldSigner = self.old_apps.get_model('core', 'Signer')
+        hashes = ['aaaaaaaa111' + '0' * 53, 'aaaaaaaa112' + '0' * 53, 'aaaaaaaa2' + '0' * 55, 'bbbbbbbb' + '0' * 56]
+        for number, validation_hash in enumerate(hashes):
+            OldSigner.objects.create(
+                signer_id=f'ID{number}', validation_hash=validation_hash, hash_short=validation_hash[:8],
+                full_name='Ana Pérez', email=f'firmante{number}@example.org', orcid=f'0000-0000-0000-000{number}',
+                affiliation='Universidad de Chile', discipline='Investigador',
+            )
+
+        NewSigner = self.migrate_forward().get_model('core', 'Signer')
+        self.assertEqual(list(NewSigner.objects.order_by('pk').values_list('hash_short', flat=True)), [
+            'aaaaaaaa',      # el más antiguo conserva su enlace
+            'aaaaaaaa112',
+            'aaaaaaaa2',
+            'bbbbbbbb',
+        ])
+
+
+
+class DeclarationIndexMigrationTests(MigrationTestCase):
+    """0006 crea el índice de texto completo e indexa las declaraciones existentes"""
+
+    before = [('core', '0005_declaration_lookup_columns')]
+    after = [('core', '0006_declaration_fulltext_index')]
+
+    def test_existing_declarations_are_indexed(self):
+        OldDeclaration = self.old_apps.get_model('core', 'Declaration')
+        for number, tool in enumerate(['Claude', 'Gemini']):
+            OldDeclaration.objects.create(
+                declaration_id=f'DECL-{number}', validation_hash=f'{number:016X}', usage_types=['draft'],
+                ai_tool_name=tool, ai_tool_date_month=5, ai_tool_date_year=2025,
+                specific_purpose='Corrección de estilo.', prompts=[{'description': 'Resume el artículo'}],
+            )
+        self.migrate_forward()
+        self.migrate_to_latest()
+        found = [d.declaration_id for d in search_declarations('correccion', include_drafts=True)['items']]
+        self.assertEqual(sorted(found), ['DECL-0', 'DECL-1'])
+        self.assertEqual([d.declaration_id for d in search_declarations('resume gemini')['items']], ['DECL-1'])
+
+
+class SignerIndexMigrationTests(MigrationTestCase):
+    """0007 crea el índice del directorio e indexa los firmantes existentes"""
+
+    before = [('core', '0006_declaration_fulltext_index')]
+    after = [('core', '0007_signer_directory_search')]
+
+    def test_existing_signers_are_indexed(self):
+        OldSigner = self.old_apps.get_model('core', 'Signer')
+        for number, full_name in enumerate(['José Muñoz', 'Ana Pérez']):
+            OldSigner.objects.create(
+                signer_id=f'ID{number}', validation_hash=f'{number:064x}', hash_short=f'{number:08x}',
+                full_name=full_name, email=f'firmante{number}@example.org', orcid=f'0000-0000-0000-000{number}',
+                affiliation='Universidad de Chile', discipline='Investigador',
+            )
+        self.migrate_forward()
+        self.migrate_to_latest()
+        self.assertEqual([s.signer_id for s in search_signers('munoz')['items']], ['ID0'])
+        self.assertEqual([s.signer_id for s in search_signers('universidad')['items']], ['ID1', 'ID0'])
+
+class ExportTests(TestCase):
+    """Exportación en streaming (core/exports.py, comando export_data y vista)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        santiago = ZoneInfo(settings.TIME_ZONE)
+        # El segundo día termina a las 23:30 hora local (ya es el día siguiente en UTC)
+        moments = [datetime(2025, 1, 1, 10, 0), datetime(2025, 1, 2, 23, 30), datetime(2025, 1, 3, 0, 30)]
+        cls.declarations = []
+        for number, moment in enumerate(moments):
+            declaration = create_declaration(f'{number:016X}')
+            Declaration.objects.filter(pk=declaration.pk).update(created_at=moment.replace(tzinfo=santiago))
+            cls.declarations.append(declaration)
+            signer = create_signer(f'firmante{number}@example.org', f'0000-0000-0000-000{number}')
+            Signer.objects.filter(pk=signer.pk).update(created_at=moment.replace(tzinfo=santiago))
+        cls.staff = get_user_model().objects.create_user('staff', password='x', is_staff=True)
+
+    def export(self, kind, fmt, **filters):
+        return ''.join(iter_export_rows(kind, get_export_queryset(kind, **filters), fmt))
+
+    def test_declarations_jsonl(self):
+        rows = [json.loads(line) for line in self.export('declarations', 'jsonl').splitlines()]
+        self.assertEqual([row['id'] for row in rows], [d.declaration_id for d in self.declarations])
+        self.assertEqual(rows[0]['validationHash'], '0000000000000000')
+
+    def test_signers_csv(self):
+        rows = list(csv.reader(self.export('signers', 'csv').splitlines()))
+        self.assertEqual(rows[0][:3], ['Nombre', 'Email', 'ORCID'])
+        self.assertEqual([row[1] for row in rows[1:]], [f'firmante{n}@example.org' for n in range(3)])
+
+    def test_date_range_uses_local_days(self):
+        for kind in ('declarations', 'signers'):
+            day = date(2025, 1, 2)
+            self.assertEqual(get_export_queryset(kind, since=day, until=day).count(), 1)
+            self.assertEqual(get_export_queryset(kind, since=day).count(), 2)
+            self.assertEqual(get_export_queryset(kind, until=day).count(), 2)
+        first = self.declarations[0].pk
+        self.assertEqual(get_export_queryset('declarations', min_id=first + 1, max_id=first + 1).count(), 1)
+
+    def test_date_filter_compares_the_column(self):
+        sql = str(get_export_queryset('declarations', since=date(2025, 1, 2), until=date(2025, 1, 2)).query)
+        self.assertNotIn('django_datetime_cast_date', sql)
+        self.assertNotIn('AT TIME ZONE', sql)
+
+    def test_gzip_stream(self):
+        lines = [f'línea {number}\n' for number in range(2000)]
+        plain = b''.join(iter_encoded(lines))
+        blocks = list(iter_encoded(lines, compress=True, flush_bytes=1024))
+        self.assertGreater(len(blocks), 1)
+        self.assertEqual(gzip.decompress(b''.join(blocks)), plain)
+        self.assertEqual(plain.decode(), ''.join(lines))
+
+    def test_export_data_command(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'firmantes.jsonl.gz')
+            call_command('export_data', 'signers', '--gzip', '--since', '2025-01-02', '-o', path, stderr=StringIO())
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                rows = [json.loads(line) for line in f]
+        self.assertEqual([row['email'] for row in rows], ['firmante1@example.org', 'firmante2@example.org'])
+        with self.assertRaises(CommandError):
+            call_command('export_data', 'signers', '--since', '02/01/2025')
+
+    def test_export_view(self):
+        self.assertEqual(self.client.get('/exportar/declarations/').status_code, 302)
+        self.client.force_login(self.staff)
+        response = self.client.get('/exportar/declarations/', {'format': 'csv', 'gzip': '1', 'until': '2025-01-01'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        content = gzip.decompress(b''.join(response.streaming_content)).decode()
+        self.assertEqual(len(content.splitlines()), 2)
+        self.assertEqual(self.client.get('/exportar/declarations/', {'since': 'ayer'}).status_code, 400)
@@ -0,0 +1,279 @@
+"""
+Instrumentación de rendimiento por solicitud (Server-Timing y logs estructurados)
+
+`ServerTimingMiddleware` mide una muestra de las solicitudes
+(SERVER_TIMING_SAMPLE_RATE) y para cada una registra:
+  - tiempo total de la vista (wall time),
+  - número y tiempo de consultas SQL (execute wrapper en cada conexión),
+  - tiempo de renderizado de plantillas (`core.template_backends.TimedDjangoTemplates`),
+  - tiempo en las fases marcadas con `timed()`: generación del texto y del JSON
+    de la declaración y verificación reCAPTCHA.
+Los emite en la cabecera `Server-Timing` (visible en las herramientas de
+desarrollo del navegador) y en una línea JSON del logger `core.timing`.
+
+Presupuesto de sobrecarga: el middleware estima lo que cuesta medir cada
+solicitud muestreada; si la media supera SERVER_TIMING_OVERHEAD_BUDGET (fracción
+del tiempo total) reduce la tasa de muestreo a la mitad, y la recupera poco a
+poco cuando vuelve a estar por debajo.
+
+Con METRICS_ENABLED se miden todas las solicitudes (sin cabecera ni log fuera
+de la muestra) para alimentar las métricas de Prometheus (`core.metrics`).
+
+Fuera de una solicitud medida `timed()` y el wrapper de SQL solo consultan
+una ContextVar.
+"""
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import random
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Fases con nombre propio en Server-Timing (orden de la cabecera)
+PHASES = ('sql', 'template', 'render_text', 'render_json', 'recaptcha')
+PHASE_DESCRIPTIONS = {
+    'sql': 'SQL',
+    'template': 'Plantillas',
+    'render_text': 'Texto de la declaración',
+    'render_json': 'JSON de la declaración',
+    'recaptcha': 'reCAPTCHA',
+}
+
+_current = contextvars.ContextVar('core_request_timings', default=None)
+
+
+class RequestTimings:
+    """Tiempos acumulados de una solicitud (compartido entre hilos de la misma solicitud)"""
+
+    __slots__ = ('durations', 'counts', 'active', 'events')
+
+    def __init__(self):
+        self.durations = dict.fromkeys(PHASES, 0.0)
+        self.counts = dict.fromkeys(PHASES, 0)
+        self.active = set()
+        self.events = 0
+
+    def add(self, phase, seconds):
+        self.durations[phase] = self.durations.get(phase, 0.0) + seconds
+        self.counts[phase] = self.counts.get(phase, 0) + 1
+        self.events += 1
+
+
+def current_timings():
+    """Tiempos de la solicitud en curso, o None si no se está midiendo"""
+    return _current.get()
+
+
+class _Phase:
+    """Context manager de `timed`; las llamadas anidadas de la misma fase cuentan una vez"""
+
+    __slots__ = ('name', 'timings', 'start')
+
+    def __init__(self, name):
+        self.name = name
+        self.timings = None
+
+    def __enter__(self):
+        timings = _current.get()
+        if timings is not None and self.name not in timings.active:
+            timings.active.add(self.name)
+            self.timings = timings
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.timings is not None:
+            self.timings.add(self.name, time.perf_counter() - self.start)
+            self.timings.active.discard(self.name)
+            self.timings = None
+        return False
+
+
+def timed(name):
+    """
+    Decorador (funciones normales o async) que suma la duración de cada llamada
+    a la fase `name` de la solicitud en curso.
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with _Phase(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _sql_wrapper(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add('sql', time.perf_counter() - start)
+
+
+def install_sql_wrapper(sender, connection, **kwargs):
+    """Registra el wrapper de SQL en cada conexión nueva (señal connection_created)"""
+    if _sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_sql_wrapper)
+
+
+connection_created.connect(install_sql_wrapper, dispatch_uid='core.timing.sql')
+
+
+def _event_cost():
+    """Costo aproximado (s) de registrar una fase, medido una vez por proceso"""
+    timings = RequestTimings()
+    token = _current.set(timings)
+    try:
+        start = time.perf_counter()
+        for _ in range(200):
+            with _Phase('recaptcha'):
+                pass
+        return (time.perf_counter() - start) / 200
+    finally:
+        _current.reset(token)
+
+
+class SamplingController:
+    """Tasa de muestreo adaptativa según el presupuesto de sobrecarga"""
+
+    def __init__(self, rate, budget):
+        self.max_rate = rate
+        self.rate = rate
+        self.budget = budget
+        self.overhead = 0.0  # media móvil de la fracción de sobrecarga
+        self._event_cost = None
+        self._lock = threading.Lock()
+
+    @property
+    def event_cost(self):
+        if self._event_cost is None:
+            self._event_cost = _event_cost()
+        return self._event_cost
+
+    def should_sample(self):
+        return self.rate > 0 and (self.rate >= 1 or random.random() < self.rate)
+
+    def record(self, overhead_seconds, wall_seconds):
+        if wall_seconds <= 0:
+            return
+        with self._lock:
+            self.overhead = 0.9 * self.overhead + 0.1 * (overhead_seconds / wall_seconds)
+            if self.overhead > self.budget:
+                self.rate = max(self.rate / 2, self.max_rate / 1000)
+            elif self.overhead < self.budget / 2 and self.rate < self.max_rate:
+                self.rate = min(self.rate * 1.25, self.max_rate)
+
+
+def server_timing_header(wall, timings):
+    """Valor de la cabecera Server-Timing (duraciones en ms)"""
+    parts = [f'total;dur={wall * 1000:.2f}']
+    for phase in PHASES:
+        if timings.counts[phase]:
+            desc = PHASE_DESCRIPTIONS[phase]
+            if phase == 'sql':
+                desc = f"{desc} ({timings.counts[phase]})"
+            parts.append(f'{phase.replace("_", "-")};desc="{desc}";dur={timings.durations[phase] * 1000:.2f}')
+    return ', '.join(parts)
+
+
+def timing_record(request, response, wall, timings, sample_rate):
+    """Campos de la línea de log estructurada"""
+    match = getattr(request, 'resolver_match', None)
+    record = {
+        'event': 'request_timing',
+        'view': match.view_name if match else None,
+        'method': request.method,
+        'status': response.status_code,
+        'wall_ms': round(wall * 1000, 2),
+        'sql_count': timings.counts['sql'],
+    }
+    for phase in PHASES:
+        record[f'{phase}_ms'] = round(timings.durations[phase] * 1000, 2)
+    record['sample_rate'] = round(sample_rate, 4)
+    return record
+
+
+class ServerTimingMiddleware:
+    """
+    Mide una muestra de las solicitudes (todas con METRICS_ENABLED); va primero
+    en MIDDLEWARE para que el tiempo total incluya al resto de middlewares.
+    Compatible con WSGI y ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.controller = SamplingController(
+            settings.SERVER_TIMING_SAMPLE_RATE, settings.SERVER_TIMING_OVERHEAD_BUDGET,
+        )
+        self.metrics_enabled = settings.METRICS_ENABLED
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        sampled = self.controller.should_sample()
+        if not sampled and not self.metrics_enabled:
+            return self.get_response(request)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, start, timings, sampled)
+
+    async def __acall__(self, request):
+        sampled = self.controller.should_sample()
+        if not sampled and not self.metrics_enabled:
+            return await self.get_response(request)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, start, timings, sampled)
+
+    def _finish(self, request, response, start, timings, sampled):
+        wall = time.perf_counter() - start
+        if self.metrics_enabled:
+            metrics.observe_request(request, response, wall, timings)
+        if not sampled:
+            return response
+        finish_start = time.perf_counter()
+        sample_rate = self.controller.rate
+        if settings.SERVER_TIMING_HEADER:
+            response['Server-Timing'] = server_timing_header(wall, timings)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(timing_record(request, response, wall, timings, sample_rate)))
+        overhead = timings.events * self.controller.event_cost + (time.perf_counter() - finish_start)
+        self.controller.record(overhead, wall + overhead)
+        return response
@@ -4,16 +4,16 @@ Migrated from usoeticoia.org utils.ts
 """
 import json
 import hashlib
-import requests
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from .constants import USAGE_TYPES, HUMAN_REVIEW_LEVELS, HELP_CHECKLIST, CC_LICENSES
-from .translations import (
-    get_translation,
-    get_translated_usage_types,
-    get_translated_review_levels,
-    get_translated_content_modes,
-    get_translated_checklist
-)
+from .catalogs import get_catalog
+from .ir import build_declaration_ir
+from .recaptcha import get_client as get_recaptcha_client
+from .timing import timed
+from .translations import get_translation
+
+# Incrementar cuando cambie el texto o JSON generado (invalida artefactos cacheados)
+RENDERER_VERSION = 1
 
 
 def compute_hash(message):
@@ -25,210 +25,174 @@ def compute_hash(message):
 
 def get_usage_label(usage_type, custom_usage_type='', lang='es'):
     """Get label for a usage type"""
-    if usage_type == 'other':
-        return custom_usage_type or get_translation('usage_other', lang)
-    
-    # Map usage type values to translation keys
-    value_to_key = {
-        'draft': 'draft',
-        'coauthor': 'coauthor',
-        'writing-support': 'writing',
-        'ideation': 'ideation',
-        'analysis': 'analysis',
-        'coding': 'coding',
-        'translation': 'translation',
-        'review': 'review',
-        'other': 'other'
-    }
-    
-    translation_key = value_to_key.get(usage_type, usage_type)
-    return get_translation(f'usage_{translation_key}', lang)
+    return get_catalog(lang).usage_label(usage_type, custom_usage_type)
 
 
 def get_review_level_info(level, lang='es'):
     """Get review level information"""
-    review_levels = get_translated_review_levels(lang)
-    for rl in review_levels:
-        if rl['level'] == level:
-            return rl
-    return None
+    return get_catalog(lang).review_level(level)
 
 
 def get_license_label(license_value, lang='es'):
     """Get license label"""
-    # Licenses are usually the same across languages, but we can add translations if needed
-    for lic in CC_LICENSES:
-        if lic['value'] == license_value:
-            return lic['label']
-    return license_value
+    return get_catalog(lang).license_label(license_value)
 
 
+@timed('render_text')
 def generate_declaration_text(declaration, hash_value=None, lang='es'):
-    """Generate human-readable declaration text"""
+    """Generate human-readable declaration text (accepts a Declaration or its IR)"""
+    declaration = build_declaration_ir(declaration)
+    text = generate_declaration_body(declaration, lang)
+    if hash_value:
+        text += generate_declaration_footer(declaration, hash_value, lang)
+    return text
+
+
+@timed('render_text')
+def generate_signed_declaration_text(declaration, lang='es'):
+    """
+    Render the declaration once, hash the body and append the registry footer.
+
+    Equivalent to hashing ``generate_declaration_text(declaration, None, lang)``
+    and rendering again with the hash, but the body is only built once.
+
+    Returns:
+        tuple: (text_with_footer, hash_value)
+    """
+    declaration = build_declaration_ir(declaration)
+    body = generate_declaration_body(declaration, lang)
+    hash_value = compute_hash(body)
+    return body + generate_declaration_footer(declaration, hash_value, lang), hash_value
+
+
+def generate_declaration_footer(declaration, hash_value, lang='es'):
+    """Generate the registry/hash footer appended to a hashed declaration"""
+    text = "\n" + "-" * 65 + "\n"
+    text += f"{get_translation('decl_id_registry', lang)}: {declaration.declaration_id}\n"
+    text += f"{get_translation('decl_hash_validation', lang)}: {hash_value}\n"
+    return text
+
+
+def generate_declaration_body(declaration, lang='es'):
+    """Generate the declaration text without the registry/hash footer"""
+    return ''.join(text for _, text in generate_declaration_sections(declaration, lang))
+
+
+@timed('render_text')
+def generate_declaration_sections(declaration, lang='es'):
+    """
+    Render the declaration body as an ordered list of ``(key, text)`` sections.
+
+    Joining the texts gives ``generate_declaration_body``; optional sections
+    (prompts, content, license) are present with an empty text so the keys are
+    stable across edits (the live preview patches sections by key).
+    """
+    declaration = build_declaration_ir(declaration)
+    catalog = get_catalog(lang)
 
     # Parse usage types
-    usage_labels = []
-    for ut in declaration.usage_types:
-        usage_labels.append(get_usage_label(ut, declaration.custom_usage_type, lang))
-    usage_text = '; '.join(usage_labels)
+    usage_text = '; '.join(declaration.usage_labels(catalog))
 
     # Parse review level
-    review_level = get_review_level_info(declaration.human_review_level, lang)
+    review_level = catalog.review_level(declaration.human_review_level)
 
     # Parse license
-    license_label = get_license_label(declaration.license, lang)
+    license_label = catalog.license_label(declaration.license)
 
     # Parse content modes
-    content_modes = []
-    translated_modes = get_translated_content_modes(lang)
-    
-    # Map Spanish modes to translated modes by index
-    spanish_modes = [
-        'Incorporado tal cual (Verbatim)',
-        'Editado parcialmente (ajustes menores)',
-        'Reescrito sustancialmente',
-        'Usado solo como inspiración/referencia',
-        'Sintetizado con otras fuentes',
-        'Otro'
-    ]
-    
-    for mode in declaration.content_use_modes:
-        if mode == 'Otro' or mode == translated_modes[5]:
-            content_modes.append(declaration.custom_content_use_mode or translated_modes[5])
-        else:
-            # Find index in Spanish modes and use corresponding translated mode
-            try:
-                index = spanish_modes.index(mode)
-                content_modes.append(translated_modes[index])
-            except ValueError:
-                # If not found, try to find in translated modes
-                try:
-                    index = translated_modes.index(mode)
-                    content_modes.append(mode)  # Already translated
-                except ValueError:
-                    content_modes.append(mode)  # Fallback to original
-    content_modes_text = ', '.join(content_modes)
-
-    # Date string
-    date_str = f"{str(declaration.ai_tool_date_month).zfill(2)}/{declaration.ai_tool_date_year}"
+    content_modes_text = ', '.join(declaration.content_mode_labels(catalog))
 
     # Diagnostic answers for traceability
     diagnostic_answers = ""
-    checklist = get_translated_checklist(lang)
     if declaration.selected_checklist_ids:
         for item_id in declaration.selected_checklist_ids:
-            for item in checklist:
-                if item['id'] == item_id:
-                    diagnostic_answers += f"   [x] {item['q']}\n"
+            question = catalog.checklist_question(item_id)
+            if question is not None:
+                diagnostic_answers += f"   [x] {question}\n"
     else:
         diagnostic_answers = f"   ({get_translation('decl_manual_selection', lang)})\n"
 
     # Build text with translations
-    text = f"{get_translation('decl_title', lang)}\n"
-    text += "═" * 65 + "\n\n"
+    header = f"{get_translation('decl_title', lang)}\n"
+    header += "═" * 65 + "\n\n"
 
-    text += f"{get_translation('decl_section_0', lang)}\n"
-    text += diagnostic_answers + "\n"
+    diagnostic = f"{get_translation('decl_section_0', lang)}\n"
+    diagnostic += diagnostic_answers + "\n"
 
-    text += f"{get_translation('decl_section_1', lang)}\n"
-    text += f"   {usage_text.upper()}\n\n"
+    usage = f"{get_translation('decl_section_1', lang)}\n"
+    usage += f"   {usage_text.upper()}\n\n"
 
-    text += f"{get_translation('decl_section_2', lang)}\n"
-    text += f"   {get_translation('decl_tool_name', lang)}: {declaration.ai_tool_name or get_translation('decl_not_specified', lang)}\n"
-    text += f"   {get_translation('decl_tool_version', lang)}: {declaration.ai_tool_version or '—'}\n"
-    text += f"   {get_translation('decl_tool_provider', lang)}: {declaration.ai_tool_provider or '—'}\n"
-    text += f"   {get_translation('decl_tool_date', lang)}: {date_str}\n\n"
+    tool = f"{get_translation('decl_section_2', lang)}\n"
+    tool += f"   {get_translation('decl_tool_name', lang)}: {declaration.ai_tool_name or get_translation('decl_not_specified', lang)}\n"
+    tool += f"   {get_translation('decl_tool_version', lang)}: {declaration.ai_tool_version or '—'}\n"
+    tool += f"   {get_translation('decl_tool_provider', lang)}: {declaration.ai_tool_provider or '—'}\n"
+    tool += f"   {get_translation('decl_tool_date', lang)}: {declaration.date_text}\n\n"
 
-    text += f"{get_translation('decl_section_3', lang)}\n"
-    text += f"   {declaration.specific_purpose or get_translation('decl_not_described', lang)}\n\n"
+    purpose = f"{get_translation('decl_section_3', lang)}\n"
+    purpose += f"   {declaration.specific_purpose or get_translation('decl_not_described', lang)}\n\n"
 
     # Prompts
-    valid_prompts = [p for p in declaration.prompts if p.get('description', '').strip()]
-    if valid_prompts:
-        text += f"{get_translation('decl_section_4', lang)}\n"
-        for i, p in enumerate(valid_prompts, 1):
-            text += f'   {i}. "{p["description"]}"\n'
-        text += "\n"
+    prompts = ""
+    if declaration.prompts:
+        prompts += f"{get_translation('decl_section_4', lang)}\n"
+        for i, prompt in enumerate(declaration.prompts, 1):
+            prompts += f'   {i}. "{prompt}"\n'
+        prompts += "\n"
 
     # Content integration
+    content = ""
     if declaration.content_use_modes:
-        text += f"{get_translation('decl_section_5', lang)}\n"
-        text += f"   {get_translation('decl_content_mode', lang)}: {content_modes_text}\n"
+        content += f"{get_translation('decl_section_5', lang)}\n"
+        content += f"   {get_translation('decl_content_mode', lang)}: {content_modes_text}\n"
         if declaration.content_use_context:
-            text += f"   {get_translation('decl_content_context', lang)}: {declaration.content_use_context}\n"
-        text += "\n"
+            content += f"   {get_translation('decl_content_context', lang)}: {declaration.content_use_context}\n"
+        content += "\n"
 
     # Human review
-    text += f"{get_translation('decl_section_6', lang)}\n"
+    review = f"{get_translation('decl_section_6', lang)}\n"
     if review_level:
-        label_parts = review_level['label'].split(':', 1)
-        short_label = label_parts[1].strip() if len(label_parts) > 1 else review_level['label']
-        text += f"   {get_translation('decl_review_level', lang)} {declaration.human_review_level}: {short_label}\n"
-        text += f"   {get_translation('decl_review_description', lang)}: {review_level['description']}\n"
+        review += f"   {get_translation('decl_review_level', lang)} {declaration.human_review_level}: {review_level['short_label']}\n"
+        review += f"   {get_translation('decl_review_description', lang)}: {review_level['description']}\n"
 
     if declaration.human_review_level > 0:
         if declaration.reviewer_name:
-            text += f"   {get_translation('decl_reviewed_by', lang)}: {declaration.reviewer_name}\n"
+            review += f"   {get_translation('decl_reviewed_by', lang)}: {declaration.reviewer_name}\n"
         if declaration.reviewer_role:
-            text += f"   {get_translation('decl_reviewer_role', lang)}: {declaration.reviewer_role}\n"
+            review += f"   {get_translation('decl_reviewer_role', lang)}: {declaration.reviewer_role}\n"
 
     # License
+    license_text = ""
     if declaration.license and declaration.license != 'None':
-        text += f"\n{get_translation('decl_section_7', lang)}\n"
-        text += f"   • {license_label}\n"
-
-    # Hash validation
-    if hash_value:
-        text += "\n" + "-" * 65 + "\n"
-        text += f"{get_translation('decl_id_registry', lang)}: {declaration.declaration_id}\n"
-        text += f"{get_translation('decl_hash_validation', lang)}: {hash_value}\n"
-
-    return text
+        license_text += f"\n{get_translation('decl_section_7', lang)}\n"
+        license_text += f"   • {license_label}\n"
+
+    return [
+        ('header', header),
+        ('diagnostic', diagnostic),
+        ('usage', usage),
+        ('tool', tool),
+        ('purpose', purpose),
+        ('prompts', prompts),
+        ('content', content),
+        ('review', review),
+        ('license', license_text),
+    ]
 
 
+@timed('render_json')
 def generate_declaration_json(declaration, hash_value=None, lang='es'):
-    """Generate JSON declaration"""
+    """Generate JSON declaration (accepts a Declaration or its IR)"""
+    payload = build_declaration_payload(declaration, hash_value, lang)
+    return json.dumps(payload, ensure_ascii=False, indent=2)
 
-    # Parse usage types
-    usage_labels = []
-    for ut in declaration.usage_types:
-        usage_labels.append(get_usage_label(ut, declaration.custom_usage_type, lang))
 
-    # Parse review level
-    review_level = get_review_level_info(declaration.human_review_level, lang)
+def build_declaration_payload(declaration, hash_value=None, lang='es'):
+    """Build the dict serialized by generate_declaration_json"""
+    declaration = build_declaration_ir(declaration)
+    catalog = get_catalog(lang)
 
-    # Parse content modes
-    content_modes = []
-    translated_modes = get_translated_content_modes(lang)
-    
-    # Map Spanish modes to translated modes by index
-    spanish_modes = [
-        'Incorporado tal cual (Verbatim)',
-        'Editado parcialmente (ajustes menores)',
-        'Reescrito sustancialmente',
-        'Usado solo como inspiración/referencia',
-        'Sintetizado con otras fuentes',
-        'Otro'
-    ]
-    
-    for mode in declaration.content_use_modes:
-        if mode == 'Otro' or mode == translated_modes[5]:
-            content_modes.append(declaration.custom_content_use_mode or translated_modes[5])
-        else:
-            # Find index in Spanish modes and use corresponding translated mode
-            try:
-                index = spanish_modes.index(mode)
-                content_modes.append(translated_modes[index])
-            except ValueError:
-                # If not found, try to find in translated modes
-                try:
-                    index = translated_modes.index(mode)
-                    content_modes.append(mode)  # Already translated
-                except ValueError:
-                    content_modes.append(mode)  # Fallback to original
-
-    # Valid prompts
-    valid_prompts = [p['description'] for p in declaration.prompts if p.get('description', '').strip()]
+    # Parse review level
+    review_level = catalog.review_level(declaration.human_review_level)
 
     payload = {
         'declarationType': 'academic-ai-transparency',
@@ -244,19 +208,19 @@ def generate_declaration_json(declaration, hash_value=None, lang='es'):
         },
         'usage': {
             'types': declaration.usage_types,
-            'labels': usage_labels,
+            'labels': declaration.usage_labels(catalog),
             'customDescription': declaration.custom_usage_type if 'other' in declaration.usage_types else None
         },
         'tool': {
             'name': declaration.ai_tool_name,
             'version': declaration.ai_tool_version,
             'provider': declaration.ai_tool_provider,
-            'date': f"{declaration.ai_tool_date_year}-{str(declaration.ai_tool_date_month).zfill(2)}"
+            'date': declaration.date_iso
         },
         'purpose': declaration.specific_purpose,
-        'prompts': valid_prompts,
+        'prompts': list(declaration.prompts),
         'integration': {
-            'modes': content_modes,
+            'modes': declaration.content_mode_labels(catalog),
             'context': declaration.content_use_context or None
         },
         'humanReview': {
@@ -268,9 +232,34 @@ def generate_declaration_json(declaration, hash_value=None, lang='es'):
         }
     }
 
-    return json.dumps(payload, ensure_ascii=False, indent=2)
+    return payload
+
+
+def generate_declaration_outputs(declaration, hash_value=None, languages=None):
+    """
+    Render text and JSON for several languages from a single IR build.
+
+    Args:
+        declaration: Declaration or DeclarationIR
+        hash_value: Validation hash for the footer/JSON (optional)
+        languages: Language codes (defaults to settings.LANGUAGES)
+
+    Returns:
+        dict: {lang: {'text': str, 'json': str}}
+    """
+    declaration = build_declaration_ir(declaration)
+    if languages is None:
+        languages = [code for code, _ in settings.LANGUAGES]
+    return {
+        lang: {
+            'text': generate_declaration_text(declaration, hash_value, lang),
+            'json': generate_declaration_json(declaration, hash_value, lang),
+        }
+        for lang in languages
+    }
 
 
+@timed('recaptcha')
 def verify_recaptcha(recaptcha_response, remote_ip=None):
     """
     Verifica el token de reCAPTCHA v2 con la API de Google
@@ -281,43 +270,30 @@ def verify_recaptcha(recaptcha_response, remote_ip=None):
 
     Returns:
         dict: {'success': bool, 'error_codes': list, 'score': float}
+        (ver core/recaptcha.py para la caché de tokens y el circuit breaker)
     """
     # Si reCAPTCHA está deshabilitado, siempre retornar éxito
     if not settings.RECAPTCHA_ENABLED or not settings.RECAPTCHA_SECRET_KEY:
         return {'success': True, 'error_codes': [], 'bypass': True}
 
-    # Si no hay respuesta de reCAPTCHA, fallar
-    if not recaptcha_response:
-        return {'success': False, 'error_codes': ['missing-input-response']}
+    # Sesión persistente, caché de tokens verificados y circuit breaker
+    return get_recaptcha_client().verify(recaptcha_response, remote_ip)
 
-    # Preparar datos para la verificación
-    data = {
-        'secret': settings.RECAPTCHA_SECRET_KEY,
-        'response': recaptcha_response,
-    }
 
-    if remote_ip:
-        data['remoteip'] = remote_ip
-
-    try:
-        # Hacer request a la API de Google reCAPTCHA
-        response = requests.post(
-            'https://www.google.com/recaptcha/api/siteverify',
-            data=data,
-            timeout=5
-        )
-        result = response.json()
-
-        return {
-            'success': result.get('success', False),
-            'error_codes': result.get('error-codes', []),
-            'challenge_ts': result.get('challenge_ts'),
-            'hostname': result.get('hostname'),
-        }
-    except requests.exceptions.RequestException as e:
-        # En caso de error de conexión, registrar y fallar
-        return {
-            'success': False,
-            'error_codes': ['connection-error'],
-            'error_message': str(e)
-        }
+@timed('recaptcha')
+async def averify_recaptcha(recaptcha_response, remote_ip=None, asgi=False):
+    """
+    Versión async de `verify_recaptcha` para las vistas async; mismo resultado
+    y misma caché de tokens y circuit breaker.
+
+    Con `asgi=True` (solicitud atendida por un servidor ASGI) usa el cliente
+    httpx del worker. Bajo WSGI la vista async corre en un event loop nuevo
+    por solicitud, así que se usa la sesión persistente de `verify` en un hilo.
+    """
+    if not settings.RECAPTCHA_ENABLED or not settings.RECAPTCHA_SECRET_KEY:
+        return {'success': True, 'error_codes': [], 'bypass': True}
+
+    client = get_recaptcha_client()
+    if asgi:
+        return await client.averify(recaptcha_response, remote_ip)
+    return await sync_to_async(client.verify)(recaptcha_response, remote_ip)
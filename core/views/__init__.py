@@ -3,7 +3,7 @@ Vistas de la aplicación core organizadas por módulos.
 """
 
 # Importar funciones auxiliares de sesión
-from .declarations import get_session_data, save_session_data
+from .declarations import get_session_data, aget_session_data, save_session_data
 
 # Vistas del wizard de declaraciones
 from .declarations import (
@@ -32,8 +32,15 @@ from .signers import (
     signer_create,
     signer_verify,
     signers_list,
+    signer_search,
 )
 
+# Exportación masiva (admin)
+from .exports import export_data
+
+# Métricas de Prometheus
+from .metrics import prometheus_metrics
+
 # Vistas auxiliares
 from .utils import (
     load_preset,
@@ -45,6 +52,7 @@ from .utils import (
 __all__ = [
     # Funciones auxiliares
     'get_session_data',
+    'aget_session_data',
     'save_session_data',
     # Wizard
     'home',
@@ -63,6 +71,11 @@ __all__ = [
     'signer_create',
     'signer_verify',
     'signers_list',
+    'signer_search',
+    # Exportación
+    'export_data',
+    # Métricas
+    'prometheus_metrics',
     # Auxiliares
     'load_preset',
     'preview_declaration',
@@ -1,105 +1,200 @@
 """
 Vistas del wizard de declaraciones (pasos 1-4).
 """
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
 from django.shortcuts import render, redirect
 from django.views.decorators.csrf import ensure_csrf_cookie
+from django.utils import timezone
 from django.utils.translation import get_language
 from datetime import datetime
-import random
-import string
+import hashlib
+import json
 
 from ..models import Declaration
+from ..identifiers import allocate_identifier, DECLARATION
+from ..ir import build_declaration_ir
 from ..constants import (
-    HELP_CHECKLIST, PRESETS, MONTHS_ES, AI_TOOLS_CATALOG, FIELD_LIMITS, CC_LICENSES
+    HELP_CHECKLIST, PRESETS, MONTHS_ES, AI_TOOLS_CATALOG, FIELD_LIMITS
 )
 from ..utils import (
-    generate_declaration_text,
+    averify_recaptcha,
+    generate_signed_declaration_text,
     generate_declaration_json,
-    compute_hash
-)
-from ..translations import (
-    get_translated_usage_types,
-    get_translated_steps_labels,
-    get_translated_checklist,
-    get_translated_content_modes,
-    get_translated_review_levels,
-    get_translated_glossary
 )
+from ..catalogs import get_catalog
+
+
+def _new_session_data():
+    """Datos iniciales del wizard"""
+    return {
+        'current_step': 0,
+        'selected_checklist_ids': [],
+        'usage_types': [],
+        'custom_usage_type': '',
+        'ai_tool': {
+            'name': '',
+            'version': '',
+            'provider': '',
+            'date_month': datetime.now().month,
+            'date_year': datetime.now().year
+        },
+        'specific_purpose': '',
+        'prompts': [{'id': '1', 'description': ''}],
+        'content_use_modes': [],
+        'custom_content_use_mode': '',
+        'content_use_context': '',
+        'human_review': {
+            'level': 0,
+            'reviewer_role': '',
+            'reviewer_name': ''
+        },
+        'license': 'None'
+    }
 
 
 def get_session_data(request):
-    """Get or initialize session data for the wizard"""
-    if 'declaration_data' not in request.session or request.session['declaration_data'] is None:
-        request.session['declaration_data'] = {
-            'current_step': 0,
-            'selected_checklist_ids': [],
-            'usage_types': [],
-            'custom_usage_type': '',
-            'ai_tool': {
-                'name': '',
-                'version': '',
-                'provider': '',
-                'date_month': datetime.now().month,
-                'date_year': datetime.now().year
-            },
-            'specific_purpose': '',
-            'prompts': [{'id': '1', 'description': ''}],
-            'content_use_modes': [],
-            'custom_content_use_mode': '',
-            'content_use_context': '',
-            'human_review': {
-                'level': 0,
-                'reviewer_role': '',
-                'reviewer_name': ''
-            },
-            'license': 'None'
-        }
-    return request.session['declaration_data']
+    """
+    Get the wizard data (request.wizard_state, see core/wizard_state.py).
+    Defaults are not stored until a step saves them, so GETs write nothing.
+    """
+    data = request.wizard_state.get('declaration_data')
+    if data is None:
+        data = _new_session_data()
+    return data
+
+
+async def aget_session_data(request):
+    """Versión async de get_session_data (vistas async)"""
+    data = await request.wizard_state.aget('declaration_data')
+    if data is None:
+        data = _new_session_data()
+    return data
 
 
 def save_session_data(request, data):
-    """Save data to session"""
-    request.session['declaration_data'] = data
-    request.session.modified = True
+    """Save the wizard data (session or signed cookie)"""
+    request.wizard_state.set('declaration_data', data)
+
+
+def declaration_from_data(data):
+    """Declaration sin guardar a partir de los datos del wizard"""
+    return Declaration(
+        selected_checklist_ids=data.get('selected_checklist_ids', []),
+        usage_types=data.get('usage_types', []),
+        custom_usage_type=data.get('custom_usage_type', ''),
+        ai_tool_name=data['ai_tool']['name'],
+        ai_tool_version=data['ai_tool']['version'],
+        ai_tool_provider=data['ai_tool']['provider'],
+        ai_tool_date_month=data['ai_tool']['date_month'],
+        ai_tool_date_year=data['ai_tool']['date_year'],
+        specific_purpose=data.get('specific_purpose', ''),
+        prompts=data.get('prompts', []),
+        content_use_modes=data.get('content_use_modes', []),
+        custom_content_use_mode=data.get('custom_content_use_mode', ''),
+        content_use_context=data.get('content_use_context', ''),
+        human_review_level=data['human_review']['level'],
+        reviewer_name=data['human_review']['reviewer_name'],
+        reviewer_role=data['human_review']['reviewer_role'],
+        license=data.get('license', 'None')
+    )
+
+
+def wizard_data_digest(data):
+    """Digest de los datos del wizard (detecta si cambiaron desde el paso 4)"""
+    payload = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=12).hexdigest()
+
+
+def store_generated_declaration(request, declaration, text_output, json_output, lang, data_digest):
+    """
+    Guarda el artefacto del paso 4 para descargas y guardado posterior.
+    Con el estado en cookie firmada solo se guarda un registro compacto
+    (ID, hash, fecha, idioma); get_generated_declaration lo vuelve a renderizar.
+    """
+    generated = {
+        'declaration_id': declaration.declaration_id,
+        'validation_hash': declaration.validation_hash,
+        'created_at': declaration.created_at.isoformat(),
+        'lang': lang,
+        'data_digest': data_digest,
+    }
+    if not request.wizard_state.signed:
+        generated['text_output'] = text_output
+        generated['json_output'] = json_output
+    request.wizard_state.set('generated_declaration', generated)
+
+
+def get_generated_declaration(request):
+    """
+    Artefacto del paso 4 con 'text_output' y 'json_output', o None si no hay
+    (o si los datos del wizard cambiaron y ya no producen el mismo hash).
+    """
+    generated = request.wizard_state.get('generated_declaration')
+    if not generated or 'text_output' in generated:
+        return generated
+
+    declaration = declaration_from_data(get_session_data(request))
+    declaration.declaration_id = generated['declaration_id']
+    declaration.created_at = datetime.fromisoformat(generated['created_at'])
+    ir = build_declaration_ir(declaration)
+    text_output, hash_value = generate_signed_declaration_text(ir, generated['lang'])
+    if hash_value != generated['validation_hash']:
+        return None
+    return dict(
+        generated,
+        text_output=text_output,
+        json_output=generate_declaration_json(ir, hash_value, generated['lang']),
+    )
 
 
 def home(request):
     """Landing page - redirects to step 1"""
     # Reset session data on new visit
     if 'reset' in request.GET:
-        if 'declaration_data' in request.session:
-            del request.session['declaration_data']
-        if 'generated_declaration' in request.session:
-            del request.session['generated_declaration']
-        if 'declaration_saved' in request.session:
-            del request.session['declaration_saved']
+        for key in ('declaration_data', 'generated_declaration', 'declaration_saved'):
+            request.wizard_state.pop(key)
     return redirect('step1')
 
 
-def step1_identification(request):
+async def _pending_recaptcha(request):
+    """
+    Verifica el reCAPTCHA de un POST del wizard sin ocupar un hilo mientras
+    responde Google. None si no hace falta (deshabilitado, botón "atrás" o
+    ya verificado en esta sesión).
+    """
+    if request.method != 'POST' or 'back' in request.POST or not settings.RECAPTCHA_ENABLED:
+        return None
+    if await request.wizard_state.aget('recaptcha_verified_step1', False):
+        return None
+    return await averify_recaptcha(
+        request.POST.get('g-recaptcha-response'), request.META.get('REMOTE_ADDR'),
+        asgi=isinstance(request, ASGIRequest),
+    )
+
+
+async def step1_identification(request):
     """Step 1: Diagnostic checklist"""
+    verification = await _pending_recaptcha(request)
+    return await sync_to_async(_step1_identification)(request, verification)
+
+
+def _step1_identification(request, verification):
     data = get_session_data(request)
     current_lang = get_language()
+    catalog = get_catalog(current_lang)
 
     if request.method == 'POST':
-        # Verificar reCAPTCHA si está habilitado
-        from django.conf import settings
-        from ..utils import verify_recaptcha
-
+        # Resultado del reCAPTCHA (verificado en step1_identification si estaba pendiente)
         if settings.RECAPTCHA_ENABLED:
-            # Verificar si ya fue validado en esta sesión
-            if not request.session.get('recaptcha_verified_step1', False):
-                recaptcha_response = request.POST.get('g-recaptcha-response')
-                remote_ip = request.META.get('REMOTE_ADDR')
-
-                verification = verify_recaptcha(recaptcha_response, remote_ip)
-
+            if verification is not None:
                 # Log para debug
                 import logging
                 logger = logging.getLogger(__name__)
                 logger.error(f"reCAPTCHA verification: {verification}")
-                logger.error(f"reCAPTCHA response: {recaptcha_response}")
-                logger.error(f"Remote IP: {remote_ip}")
+                logger.error(f"reCAPTCHA response: {request.POST.get('g-recaptcha-response')}")
+                logger.error(f"Remote IP: {request.META.get('REMOTE_ADDR')}")
 
                 if not verification['success']:
                     # reCAPTCHA falló
@@ -110,14 +205,14 @@ def step1_identification(request):
                     messages.error(request, error_msg)
                     return render(request, 'core/step1_identification.html', {
                         'step': 0,
-                        'steps_labels': get_translated_steps_labels(current_lang),
-                        'checklist': get_translated_checklist(current_lang),
+                        'steps_labels': catalog.steps_labels,
+                        'checklist': catalog.checklist,
                         'selected_ids': data.get('selected_checklist_ids', []),
-                        'glossary': get_translated_glossary(current_lang),
+                        'glossary': catalog.glossary,
                     })
 
                 # Marcar como verificado en la sesión
-                request.session['recaptcha_verified_step1'] = True
+                request.wizard_state.set('recaptcha_verified_step1', True)
 
         # Get selected checklist items
         selected_ids = request.POST.getlist('checklist')
@@ -137,10 +232,10 @@ def step1_identification(request):
 
     context = {
         'step': 0,
-        'steps_labels': get_translated_steps_labels(current_lang),
-        'checklist': get_translated_checklist(current_lang),
+        'steps_labels': catalog.steps_labels,
+        'checklist': catalog.checklist,
         'selected_ids': data.get('selected_checklist_ids', []),
-        'glossary': get_translated_glossary(current_lang),
+        'glossary': catalog.glossary,
         'presets': PRESETS,
     }
     return render(request, 'core/step1_identification.html', context)
@@ -150,6 +245,7 @@ def step2_usage_type(request):
     """Step 2: Usage type classification"""
     data = get_session_data(request)
     current_lang = get_language()
+    catalog = get_catalog(current_lang)
 
     if request.method == 'POST':
         # Check if user wants to go back
@@ -167,38 +263,35 @@ def step2_usage_type(request):
 
     context = {
         'step': 1,
-        'steps_labels': get_translated_steps_labels(current_lang),
-        'usage_types_list': get_translated_usage_types(current_lang),
+        'steps_labels': catalog.steps_labels,
+        'usage_types_list': catalog.usage_types,
         'selected_types': data.get('usage_types', []),
         'custom_usage_type': data.get('custom_usage_type', ''),
-        'glossary': get_translated_glossary(current_lang),
+        'glossary': catalog.glossary,
         'presets': PRESETS,
     }
     return render(request, 'core/step2_usage_type.html', context)
 
 
-def step3_details(request):
+async def step3_details(request):
     """Step 3: Detailed information"""
+    verification = await _pending_recaptcha(request)
+    return await sync_to_async(_step3_details)(request, verification)
+
+
+def _step3_details(request, verification):
     data = get_session_data(request)
     current_lang = get_language()
+    catalog = get_catalog(current_lang)
 
     if request.method == 'POST':
         # Check if user wants to go back
         if 'back' in request.POST:
             return redirect('step2')
 
-        # Verificar reCAPTCHA si está habilitado y no fue verificado en paso 1
-        from django.conf import settings
-        from ..utils import verify_recaptcha
-
+        # reCAPTCHA si no fue verificado en paso 1 (verificado en step3_details)
         if settings.RECAPTCHA_ENABLED:
-            # Verificar si ya fue validado en paso 1
-            if not request.session.get('recaptcha_verified_step1', False):
-                recaptcha_response = request.POST.get('g-recaptcha-response')
-                remote_ip = request.META.get('REMOTE_ADDR')
-
-                verification = verify_recaptcha(recaptcha_response, remote_ip)
-
+            if verification is not None:
                 # Log para debug
                 import logging
                 logger = logging.getLogger(__name__)
@@ -215,14 +308,14 @@ def step3_details(request):
                     # Volver a renderizar el formulario con los datos ingresados
                     context = {
                         'step': 2,
-                        'steps_labels': get_translated_steps_labels(current_lang),
+                        'steps_labels': catalog.steps_labels,
                         'data': data,
-                        'content_use_modes': get_translated_content_modes(current_lang),
-                        'review_levels': get_translated_review_levels(current_lang),
-                        'licenses': CC_LICENSES,
+                        'content_use_modes': catalog.content_modes,
+                        'review_levels': catalog.review_levels,
+                        'licenses': catalog.licenses,
                         'months': MONTHS_ES,
                         'years': range(2023, 2027),
-                        'glossary': get_translated_glossary(current_lang),
+                        'glossary': catalog.glossary,
                         'presets': PRESETS,
                         'ai_tools_catalog': AI_TOOLS_CATALOG,
                         'field_limits': FIELD_LIMITS,
@@ -275,18 +368,18 @@ def step3_details(request):
 
     context = {
         'step': 2,
-        'steps_labels': get_translated_steps_labels(current_lang),
+        'steps_labels': catalog.steps_labels,
         'data': data,
-        'content_use_modes': get_translated_content_modes(current_lang),
-        'review_levels': get_translated_review_levels(current_lang),
-        'licenses': CC_LICENSES,
+        'content_use_modes': catalog.content_modes,
+        'review_levels': catalog.review_levels,
+        'licenses': catalog.licenses,
         'months': MONTHS_ES,
         'years': range(2023, 2027),
-        'glossary': get_translated_glossary(current_lang),
+        'glossary': catalog.glossary,
         'presets': PRESETS,
         'ai_tools_catalog': AI_TOOLS_CATALOG,
         'field_limits': FIELD_LIMITS,
-        'recaptcha_verified': request.session.get('recaptcha_verified_step1', False),
+        'recaptcha_verified': request.wizard_state.get('recaptcha_verified_step1', False),
     }
     return render(request, 'core/step3_details.html', context)
 
@@ -296,60 +389,48 @@ def step4_output(request):
     """Step 4: Display and download declaration"""
     data = get_session_data(request)
     current_lang = get_language()
+    catalog = get_catalog(current_lang)
 
     # Create Declaration object (but don't save yet)
-    declaration = Declaration(
-        selected_checklist_ids=data.get('selected_checklist_ids', []),
-        usage_types=data.get('usage_types', []),
-        custom_usage_type=data.get('custom_usage_type', ''),
-        ai_tool_name=data['ai_tool']['name'],
-        ai_tool_version=data['ai_tool']['version'],
-        ai_tool_provider=data['ai_tool']['provider'],
-        ai_tool_date_month=data['ai_tool']['date_month'],
-        ai_tool_date_year=data['ai_tool']['date_year'],
-        specific_purpose=data.get('specific_purpose', ''),
-        prompts=data.get('prompts', []),
-        content_use_modes=data.get('content_use_modes', []),
-        custom_content_use_mode=data.get('custom_content_use_mode', ''),
-        content_use_context=data.get('content_use_context', ''),
-        human_review_level=data['human_review']['level'],
-        reviewer_name=data['human_review']['reviewer_name'],
-        reviewer_role=data['human_review']['reviewer_role'],
-        license=data.get('license', 'None')
-    )
-
-    # Generate ID for display
-    declaration.declaration_id = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
-
-    # Generate text and hash
-    text_output = generate_declaration_text(declaration, None, current_lang)
-    hash_value = compute_hash(text_output)
-    declaration.validation_hash = hash_value
-
-    # Generate final outputs
-    text_output = generate_declaration_text(declaration, hash_value, current_lang)
-    json_output = generate_declaration_json(declaration, hash_value, current_lang)
-
-    # Guardar en sesión para guardado posterior opcional
-    request.session['generated_declaration'] = {
-        'declaration_id': declaration.declaration_id,
-        'validation_hash': hash_value,
-        'text_output': text_output,
-        'json_output': json_output,
-    }
-    request.session.modified = True
+    declaration = declaration_from_data(data)
+    data_digest = wizard_data_digest(data)
+
+    generated = get_generated_declaration(request)
+    if generated and generated.get('data_digest') == data_digest and generated.get('lang') == current_lang:
+        # Recarga sin cambios: mismo artefacto (mismo ID, sin escribir la sesión)
+        declaration.declaration_id = generated['declaration_id']
+        declaration.created_at = datetime.fromisoformat(generated['created_at'])
+        declaration.validation_hash = hash_value = generated['validation_hash']
+        text_output = generated['text_output']
+        json_output = generated['json_output']
+    else:
+        # ID definitivo (se muestra aquí y se conserva al guardar o descargar)
+        declaration.declaration_id = allocate_identifier(DECLARATION)
+        # Fecha de generación para el JSON (mostrado aquí y servido en la descarga)
+        declaration.created_at = timezone.now()
+
+        # Generate text and hash in a single pass
+        ir = build_declaration_ir(declaration)
+        text_output, hash_value = generate_signed_declaration_text(ir, current_lang)
+        declaration.validation_hash = hash_value
+
+        # Generate final outputs
+        json_output = generate_declaration_json(ir, hash_value, current_lang)
+
+        # Guardar en sesión para guardado posterior opcional
+        store_generated_declaration(request, declaration, text_output, json_output, current_lang, data_digest)
 
     # Verificar si ya se guardó anteriormente
-    is_saved = request.session.get('declaration_saved', False)
+    is_saved = request.wizard_state.get('declaration_saved', False)
 
     context = {
         'step': 3,
-        'steps_labels': get_translated_steps_labels(current_lang),
+        'steps_labels': catalog.steps_labels,
         'declaration': declaration,
         'text_output': text_output,
         'json_output': json_output,
         'hash': hash_value,
-        'glossary': get_translated_glossary(current_lang),
+        'glossary': catalog.glossary,
         'presets': PRESETS,
         'is_saved': is_saved,
     }
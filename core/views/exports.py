@@ -0,0 +1,57 @@
+"""
+Vista de exportación masiva (solo personal del admin).
+"""
+from datetime import date
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import StreamingHttpResponse, HttpResponseBadRequest
+from django.views.decorators.http import require_http_methods
+
+from ..exports import (
+    EXPORT_KINDS,
+    EXPORT_FORMATS,
+    get_export_queryset,
+    iter_export_rows,
+    iter_encoded,
+)
+
+CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+@require_http_methods(["GET"])
+@staff_member_required
+def export_data(request, kind):
+    """
+    Exporta declaraciones o firmantes en streaming.
+
+    Parámetros GET: format (jsonl|csv), gzip (1), since/until (AAAA-MM-DD),
+    min_id/max_id (pk), lang (idioma del JSON de declaraciones)
+    """
+    fmt = request.GET.get('format', 'jsonl')
+    if kind not in EXPORT_KINDS or fmt not in EXPORT_FORMATS:
+        return HttpResponseBadRequest('Tipo o formato de exportación no válido')
+
+    try:
+        filters = {
+            'since': date.fromisoformat(request.GET['since']) if request.GET.get('since') else None,
+            'until': date.fromisoformat(request.GET['until']) if request.GET.get('until') else None,
+            'min_id': int(request.GET['min_id']) if request.GET.get('min_id') else None,
+            'max_id': int(request.GET['max_id']) if request.GET.get('max_id') else None,
+        }
+    except ValueError:
+        return HttpResponseBadRequest('Filtros de fecha o id no válidos')
+
+    compress = request.GET.get('gzip') in ('1', 'true')
+    queryset = get_export_queryset(kind, **filters)
+    lines = iter_export_rows(kind, queryset, fmt, request.GET.get('lang', 'es'))
+
+    filename = f"{kind}.{fmt}{'.gz' if compress else ''}"
+    response = StreamingHttpResponse(
+        iter_encoded(lines, compress=compress),
+        content_type='application/gzip' if compress else CONTENT_TYPES[fmt],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
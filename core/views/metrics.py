@@ -0,0 +1,31 @@
+"""
+Endpoint de métricas en formato Prometheus (`/metrics`).
+"""
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_http_methods
+
+from ..metrics import exposition
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+@require_http_methods(["GET"])
+def prometheus_metrics(request):
+    """
+    Métricas agregadas de todos los workers (`core/metrics.py`).
+
+    Solo con METRICS_ENABLED; si METRICS_TOKEN está definido exige la cabecera
+    `Authorization: Bearer <token>`.
+    """
+    if not settings.METRICS_ENABLED:
+        raise Http404
+
+    token = settings.METRICS_TOKEN
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        response = HttpResponse('No autorizado', status=401, content_type='text/plain; charset=utf-8')
+        response['WWW-Authenticate'] = 'Bearer'
+        return response
+
+    return HttpResponse(exposition(), content_type=CONTENT_TYPE)
@@ -1,48 +1,125 @@
 """
 Vistas para búsqueda y verificación de declaraciones.
 """
+from django.db.models import Q
 from django.shortcuts import render
 from django.views.decorators.http import require_http_methods
 from django.utils.translation import get_language
 
-from ..models import Declaration
-from ..utils import (
-    generate_declaration_text,
-    generate_declaration_json,
-)
-from ..translations import get_translated_glossary
+from ..fulltext import search_declarations
+from ..models import Declaration, normalize_lookup
+from ..render_cache import get_rendered_declaration
+from ..catalogs import get_catalog
+
+# Prefijos abreviados (como los hashes cortos de git)
+MIN_PREFIX_LENGTH = 6
+PREFIX_MATCH_LIMIT = 10
+LOOKUP_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+def prefix_upper_bound(prefix):
+    """
+    Cota superior exclusiva del rango [prefix, bound) que contiene todos los
+    valores que empiezan con `prefix`. Se incrementa el último carácter dentro
+    del alfabeto (con acarreo), de modo que el orden es el mismo en collations
+    binarias y de idioma. Retorna None si no hay cota (prefijo de solo 'Z').
+    """
+    chars = list(prefix)
+    while chars:
+        position = LOOKUP_ALPHABET.index(chars[-1])
+        if position + 1 < len(LOOKUP_ALPHABET):
+            chars[-1] = LOOKUP_ALPHABET[position + 1]
+            return ''.join(chars)
+        chars.pop()
+    return None
+
+
+def _prefix_filter(field, prefix):
+    """Filtro de rango indexado equivalente a `field LIKE 'prefix%'`"""
+    bound = prefix_upper_bound(prefix)
+    condition = Q(**{f'{field}__gte': prefix})
+    if bound:
+        condition &= Q(**{f'{field}__lt': bound})
+    return condition
+
+
+def resolve_declaration_query(query):
+    """
+    Resuelve un hash o ID completo o abreviado.
+
+    Returns:
+        (declaration, candidates): la declaración si la coincidencia es única
+        (exacta o por prefijo), y en caso de ambigüedad la lista de hasta
+        PREFIX_MATCH_LIMIT + 1 candidatas (el elemento extra indica que hay más).
+    """
+    lookup = normalize_lookup(query)
+    if not lookup:
+        return None, []
+
+    # Coincidencia exacta: una consulta por igualdad sobre las columnas indexadas;
+    # el hash tiene prioridad sobre el ID
+    matches = list(
+        Declaration.objects.filter(Q(hash_lookup=lookup) | Q(id_lookup=lookup))[:2]
+    )
+    if matches:
+        return next((d for d in matches if d.hash_lookup == lookup), matches[0]), []
+
+    if len(lookup) < MIN_PREFIX_LENGTH or any(c not in LOOKUP_ALPHABET for c in lookup):
+        return None, []
+
+    # Prefijo: rangos sobre los índices (sin ORDER BY para que el LIMIT corte el recorrido)
+    candidates = list(
+        Declaration.objects
+        .filter(_prefix_filter('hash_lookup', lookup) | _prefix_filter('id_lookup', lookup))
+        .order_by()[:PREFIX_MATCH_LIMIT + 1]
+    )
+    if len(candidates) == 1:
+        return candidates[0], []
+    candidates.sort(key=lambda d: d.created_at, reverse=True)
+    return None, candidates
 
 
 @require_http_methods(["GET", "POST"])
 def search_declaration(request):
-    """Página de búsqueda de declaraciones por hash o ID"""
+    """Página de búsqueda de declaraciones por hash o ID, o por contenido (?q=)"""
     current_lang = get_language()
 
     context = {
-        'glossary': get_translated_glossary(current_lang),
+        'glossary': get_catalog(current_lang).glossary,
         'result': None,
         'not_found': False,
-        'query': ''
+        'candidates': [],
+        'more_candidates': False,
+        'query': '',
+        'text_query': '',
+        'text_results': None,
     }
 
+    # Búsqueda de texto completo (GET, ordenada por relevancia y paginada)
+    text_query = request.GET.get('q', '').strip()
+    if text_query:
+        try:
+            page = int(request.GET.get('page', 1))
+        except ValueError:
+            page = 1
+        context['text_query'] = text_query
+        context['text_results'] = search_declarations(text_query, page=page)
+
     if request.method == 'POST':
         query = request.POST.get('query', '').strip()
         context['query'] = query
 
         if query:
-            # Buscar por hash o ID
+            # Buscar por hash o ID, completo o abreviado
             try:
-                # Intentar buscar por hash
-                declaration = Declaration.objects.filter(validation_hash__iexact=query).first()
-
-                # Si no se encuentra, intentar por ID
-                if not declaration:
-                    declaration = Declaration.objects.filter(declaration_id__iexact=query).first()
+                declaration, candidates = resolve_declaration_query(query)
 
                 if declaration:
                     context['result'] = declaration
-                    context['text_output'] = generate_declaration_text(declaration, declaration.validation_hash, current_lang)
-                    context['json_output'] = generate_declaration_json(declaration, declaration.validation_hash, current_lang)
+                    context['text_output'], context['json_output'] = get_rendered_declaration(declaration, current_lang)
+                elif candidates:
+                    context['candidates'] = candidates[:PREFIX_MATCH_LIMIT]
+                    context['more_candidates'] = len(candidates) > PREFIX_MATCH_LIMIT
                 else:
                     context['not_found'] = True
             except Exception as e:
@@ -59,15 +136,14 @@ def view_declaration(request, declaration_id):
     try:
         declaration = Declaration.objects.get(declaration_id=declaration_id)
 
-        text_output = generate_declaration_text(declaration, declaration.validation_hash, current_lang)
-        json_output = generate_declaration_json(declaration, declaration.validation_hash, current_lang)
+        text_output, json_output = get_rendered_declaration(declaration, current_lang)
 
         context = {
             'declaration': declaration,
             'text_output': text_output,
             'json_output': json_output,
             'hash': declaration.validation_hash,
-            'glossary': get_translated_glossary(current_lang),
+            'glossary': get_catalog(current_lang).glossary,
         }
         return render(request, 'core/view_declaration.html', context)
     except Declaration.DoesNotExist:
@@ -1,16 +1,68 @@
 """
 Vistas del módulo de firmantes del compromiso ético de IA.
 """
+from django.core.cache import cache
+from django.db import IntegrityError
 from django.shortcuts import render, get_object_or_404
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.utils.translation import get_language
+from django.urls import reverse
+from urllib.parse import urlencode
 import json as json_lib
 import traceback
 
-from ..models import Signer
-from ..translations import get_translated_glossary
+from ..models import Signer, Counter, COUNTRY_FLAGS
+from ..pagination import keyset_page
+from ..fulltext import search_signers
+from ..catalogs import get_catalog
+
+
+SIGNERS_PAGE_SIZE = 50
+
+# Columnas que usa signers_list.html
+SIGNERS_LIST_FIELDS = (
+    'full_name', 'affiliation', 'discipline', 'country', 'orcid', 'orcid_verified',
+    'declaration', 'hash_short', 'created_at',
+)
+
+# Mensajes de error por restricción única violada
+DUPLICATE_SIGNER_ERRORS = {
+    'email': 'Este correo electrónico ya está registrado',
+    'orcid': 'Este ORCID ya está registrado',
+}
+
+# Sugerencias de búsqueda mientras se escribe (api/firmantes/buscar/)
+SIGNER_SUGGEST_LIMIT = 10
+SIGNER_DISCIPLINES_CACHE_KEY = 'signers:public_disciplines'
+SIGNER_DISCIPLINES_CACHE_TIMEOUT = 600
+
+
+def _directory_filters(params):
+    """Filtros del directorio (país, disciplina, ORCID verificado) desde los parámetros GET"""
+    filters = {}
+    if params.get('country'):
+        filters['country'] = params['country']
+    if params.get('discipline'):
+        filters['discipline'] = params['discipline']
+    if params.get('verified') == '1':
+        filters['orcid_verified'] = True
+    return filters
+
+
+def _public_disciplines():
+    """Disciplinas presentes en el directorio público (cacheadas: evita un DISTINCT por visita)"""
+    return cache.get_or_set(
+        SIGNER_DISCIPLINES_CACHE_KEY,
+        lambda: list(
+            Signer.objects.filter(public_listing=True)
+            .order_by('discipline')
+            .values_list('discipline', flat=True)
+            .distinct()
+        ),
+        SIGNER_DISCIPLINES_CACHE_TIMEOUT,
+    )
 
 
 @ensure_csrf_cookie
@@ -19,27 +71,28 @@ def signer_register(request):
     current_lang = get_language()
 
     context = {
-        'glossary': get_translated_glossary(current_lang),
+        'glossary': get_catalog(current_lang).glossary,
     }
     return render(request, 'core/signer_register.html', context)
 
 
 @require_http_methods(["POST"])
-def signer_create(request):
-    """API endpoint para crear un nuevo firmante"""
+async def signer_create(request):
+    """API endpoint para crear un nuevo firmante (async: no ocupa un hilo mientras espera a reCAPTCHA)"""
     try:
         # Obtener datos del cuerpo de la petición
         data = json_lib.loads(request.body)
 
         # Verificar reCAPTCHA si está habilitado
         from django.conf import settings
-        from ..utils import verify_recaptcha
+        from django.core.handlers.asgi import ASGIRequest
+        from ..utils import averify_recaptcha
 
         if settings.RECAPTCHA_ENABLED:
             recaptcha_token = data.get('recaptchaToken')
             remote_ip = request.META.get('REMOTE_ADDR')
 
-            verification = verify_recaptcha(recaptcha_token, remote_ip)
+            verification = await averify_recaptcha(recaptcha_token, remote_ip, asgi=isinstance(request, ASGIRequest))
 
             if not verification['success']:
                 error_msg = 'Verificación reCAPTCHA fallida. Por favor intenta de nuevo.'
@@ -60,25 +113,11 @@ def signer_create(request):
                     'error': f'El campo {field} es requerido'
                 }, status=400)
 
-        # Verificar si el email ya existe
-        if Signer.objects.filter(email=data['email']).exists():
-            return JsonResponse({
-                'success': False,
-                'error': 'Este correo electrónico ya está registrado'
-            }, status=400)
-
-        # Verificar si el ORCID ya existe
-        if Signer.objects.filter(orcid=data['orcid']).exists():
-            return JsonResponse({
-                'success': False,
-                'error': 'Este ORCID ya está registrado'
-            }, status=400)
-
         # Crear nuevo firmante
         signer = Signer(
             full_name=data['fullName'],
-            email=data['email'],
-            orcid=data['orcid'],
+            email=data['email'].strip(),
+            orcid=data['orcid'].strip().upper(),
             affiliation=data['affiliation'],
             affiliation_ror_id=data.get('affiliationRorId', ''),
             discipline=data['discipline'],
@@ -91,7 +130,18 @@ def signer_create(request):
             public_listing=data.get('publicListing', True)
         )
 
-        signer.save()
+        # Un solo INSERT: los duplicados de email/ORCID los detectan las
+        # restricciones únicas de la base de datos (sin consultas previas ni carreras)
+        try:
+            await signer.asave()
+        except IntegrityError as exc:
+            field = Signer.duplicate_field(exc)
+            if field is None:
+                raise
+            return JsonResponse({
+                'success': False,
+                'error': DUPLICATE_SIGNER_ERRORS[field]
+            }, status=400)
 
         # Preparar respuesta con datos generados
         response_data = {
@@ -126,11 +176,11 @@ def signer_verify(request, hash_short):
     current_lang = get_language()
 
     try:
-        signer = get_object_or_404(Signer, hash_short=hash_short)
+        signer = get_object_or_404(Signer, hash_short=hash_short.lower())
 
         context = {
             'signer': signer,
-            'glossary': get_translated_glossary(current_lang),
+            'glossary': get_catalog(current_lang).glossary,
         }
         return render(request, 'core/signer_verify.html', context)
 
@@ -143,12 +193,76 @@ def signers_list(request):
     """Lista pública de firmantes (solo los que aceptaron listado público)"""
     current_lang = get_language()
 
-    # Obtener solo firmantes que aceptaron listado público
-    signers = Signer.objects.filter(public_listing=True).order_by('-created_at')
+    query = request.GET.get('q', '').strip()
+    filters = _directory_filters(request.GET)
 
     context = {
-        'signers': signers,
-        'total_signers': signers.count(),
-        'glossary': get_translated_glossary(current_lang),
+        'query': query,
+        'filters': {
+            'country': filters.get('country', ''),
+            'discipline': filters.get('discipline', ''),
+            'verified': filters.get('orcid_verified', False),
+        },
+        # Parámetros activos para conservar la búsqueda en los enlaces de paginación
+        'filter_query': urlencode({
+            key: value for key, value in request.GET.items()
+            if key in ('q', 'country', 'discipline', 'verified') and value
+        }),
+        'countries': list(COUNTRY_FLAGS),
+        'disciplines': _public_disciplines(),
+        # Contador desnormalizado (evita COUNT(*) en cada visita)
+        'total_signers': Counter.get_value(Counter.PUBLIC_SIGNERS),
+        'glossary': get_catalog(current_lang).glossary,
     }
+
+    if query:
+        # Búsqueda por nombre, afiliación o disciplina (índice FTS5 / trigramas)
+        try:
+            page_number = int(request.GET.get('page', 1))
+        except ValueError:
+            page_number = 1
+        results = search_signers(query, filters, page=page_number, page_size=SIGNERS_PAGE_SIZE, fields=SIGNERS_LIST_FIELDS)
+        context.update({
+            'signers': results['items'],
+            'search_page': results,
+        })
+    else:
+        # Paginación por keyset sobre (created_at, id), solo columnas usadas por la plantilla
+        page = keyset_page(
+            Signer.objects.filter(public_listing=True, **filters).only(*SIGNERS_LIST_FIELDS),
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+            page_size=SIGNERS_PAGE_SIZE,
+        )
+        context.update({
+            'signers': page['items'],
+            'next_cursor': page['next_cursor'],
+            'prev_cursor': page['prev_cursor'],
+        })
+
     return render(request, 'core/signers_list.html', context)
+
+
+@require_http_methods(["GET"])
+def signer_search(request):
+    """API de sugerencias del directorio público mientras se escribe"""
+    results = search_signers(
+        request.GET.get('q', ''),
+        _directory_filters(request.GET),
+        page_size=SIGNER_SUGGEST_LIMIT,
+        fields=SIGNERS_LIST_FIELDS,
+    )
+    return JsonResponse({
+        'results': [
+            {
+                'fullName': signer.full_name,
+                'affiliation': signer.affiliation,
+                'discipline': signer.discipline,
+                'country': signer.country or None,
+                'orcidVerified': signer.orcid_verified,
+                'hashShort': signer.hash_short,
+                'verificationUrl': reverse('signer_verify', args=[signer.hash_short]),
+            }
+            for signer in results['items']
+        ],
+    })
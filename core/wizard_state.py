@@ -0,0 +1,168 @@
+"""
+Estado del wizard de declaraciones (pasos 1-4)
+
+Las vistas del wizard leen y escriben su estado en `request.wizard_state`
+(`WizardStateMiddleware`) en lugar de `request.session`. Según
+WIZARD_STATE_STORAGE:
+  - 'session' (por defecto): el estado vive en la sesión de Django, como antes.
+  - 'signed': el estado viaja en una cookie firmada (HMAC con SECRET_KEY) y
+    comprimida con zlib (`django.core.signing`), sin escribir la tabla de
+    sesiones en cada paso. Si el token supera WIZARD_STATE_MAX_BYTES se guarda
+    en la sesión (clave `wizard_state`) y la cookie se elimina.
+
+En modo 'signed' la declaración generada en el paso 4 se guarda como un
+registro compacto (ID, hash, fecha e idioma) y las descargas la vuelven a
+renderizar a partir de los datos del wizard.
+"""
+from django.conf import settings
+from django.core import signing
+from django.utils.deprecation import MiddlewareMixin
+
+SESSION = 'session'
+SIGNED = 'signed'
+
+TOKEN_SALT = 'core.wizard_state'
+# Clave de la sesión donde se guarda el estado que no cabe en la cookie
+SESSION_FALLBACK_KEY = 'wizard_state'
+
+
+class SessionWizardState:
+    """Estado del wizard en la sesión de Django"""
+
+    signed = False
+
+    def __init__(self, request):
+        self.session = request.session
+
+    def get(self, key, default=None):
+        return self.session.get(key, default)
+
+    async def aget(self, key, default=None):
+        return await self.session.aget(key, default)
+
+    def set(self, key, value):
+        self.session[key] = value
+
+    async def aset(self, key, value):
+        await self.session.aset(key, value)
+
+    def pop(self, key, default=None):
+        return self.session.pop(key, default)
+
+    def persist(self, response):
+        """La sesión se guarda en SessionMiddleware"""
+
+
+class SignedWizardState:
+    """Estado del wizard en una cookie firmada y comprimida (con respaldo en la sesión)"""
+
+    signed = True
+
+    def __init__(self, request):
+        self.request = request
+        self.modified = False
+        self.from_session = False
+        self._data = None
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = self._load()
+        return self._data
+
+    def _load(self):
+        token = self.request.COOKIES.get(settings.WIZARD_STATE_COOKIE_NAME)
+        if token:
+            try:
+                return signing.loads(token, salt=TOKEN_SALT, max_age=settings.SESSION_COOKIE_AGE)
+            except signing.BadSignature:
+                pass
+        # Sin token válido: el estado puede estar en la sesión por el límite de tamaño
+        # (sin cookie de sesión no se consulta la base de datos)
+        if settings.SESSION_COOKIE_NAME in self.request.COOKIES:
+            stored = self.request.session.get(SESSION_FALLBACK_KEY)
+            if stored:
+                self.from_session = True
+                return dict(stored)
+        return {}
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    async def aget(self, key, default=None):
+        return self.get(key, default)
+
+    def set(self, key, value):
+        self.data[key] = value
+        self.modified = True
+
+    async def aset(self, key, value):
+        self.set(key, value)
+
+    def pop(self, key, default=None):
+        if key not in self.data:
+            return default
+        self.modified = True
+        return self.data.pop(key)
+
+    def _set_cookie(self, response, value):
+        # Cookie de sesión del navegador; la firma caduca a los SESSION_COOKIE_AGE segundos
+        response.set_cookie(
+            settings.WIZARD_STATE_COOKIE_NAME,
+            value,
+            path=settings.SESSION_COOKIE_PATH,
+            domain=settings.SESSION_COOKIE_DOMAIN,
+            secure=settings.SESSION_COOKIE_SECURE,
+            httponly=True,
+            samesite=settings.SESSION_COOKIE_SAMESITE,
+        )
+
+    def _delete_cookie(self, response):
+        if settings.WIZARD_STATE_COOKIE_NAME in self.request.COOKIES:
+            response.delete_cookie(
+                settings.WIZARD_STATE_COOKIE_NAME,
+                path=settings.SESSION_COOKIE_PATH,
+                domain=settings.SESSION_COOKIE_DOMAIN,
+                samesite=settings.SESSION_COOKIE_SAMESITE,
+            )
+
+    def persist(self, response):
+        """Escribe el estado modificado en la cookie o, si no cabe, en la sesión"""
+        if not self.modified:
+            return
+
+        token = signing.dumps(self.data, salt=TOKEN_SALT, compress=True) if self.data else ''
+        if len(token) <= settings.WIZARD_STATE_MAX_BYTES:
+            if token:
+                self._set_cookie(response, token)
+            else:
+                self._delete_cookie(response)
+            if self.from_session:
+                self.request.session.pop(SESSION_FALLBACK_KEY, None)
+        else:
+            # Demasiado grande para una cookie: respaldo en la sesión
+            self.request.session[SESSION_FALLBACK_KEY] = self.data
+            self._delete_cookie(response)
+
+
+def wizard_state_for(request):
+    """Almacén del estado del wizard según WIZARD_STATE_STORAGE"""
+    if settings.WIZARD_STATE_STORAGE == SIGNED:
+        return SignedWizardState(request)
+    return SessionWizardState(request)
+
+
+class WizardStateMiddleware(MiddlewareMixin):
+    """
+    Asigna `request.wizard_state` y guarda los cambios en la respuesta.
+    Debe ir después de SessionMiddleware (usa la sesión como respaldo).
+    """
+
+    def process_request(self, request):
+        request.wizard_state = wizard_state_for(request)
+
+    def process_response(self, request, response):
+        state = getattr(request, 'wizard_state', None)
+        if state is not None:
+            state.persist(response)
+        return response
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+"""
+Benchmark de carga WSGI (gunicorn) vs ASGI (uvicorn) con reCAPTCHA lento
+Uso: python scripts/benchmark_asgi.py [--requests N] [--concurrency N] [--delay S] [--workers N] [--threads N]
+
+Levanta el servidor simulado de reCAPTCHA (scripts/recaptcha_stub.py) con una
+latencia de --delay segundos y, sobre una base SQLite temporal, compara:
+  - WSGI: gunicorn con --workers procesos de --threads hilos (gthread),
+  - ASGI: uvicorn con --workers procesos (vistas async + httpx),
+enviando N registros de firmantes (api/firmar/) con --concurrency clientes
+simultáneos. Reporta solicitudes por segundo, latencias p50/p99 y errores.
+
+Requiere gunicorn, uvicorn y httpx (requirements.txt).
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmark_common import free_port, migrate, percentile, server_env, start_server
+from recaptcha_stub import start_stub
+
+SIGNER_URL = '/es/api/firmar/'
+FORM_URL = '/es/firmar/'
+
+
+def recaptcha_env(db_path, stub_url):
+    return server_env(
+        db_path,
+        RECAPTCHA_ENABLED='True',
+        RECAPTCHA_SECRET_KEY='stub',
+        RECAPTCHA_VERIFY_URL=stub_url,
+        RECAPTCHA_READ_TIMEOUT='10',
+        # Cada solicitud usa un token nuevo: sin caché ni circuit breaker
+        RECAPTCHA_TOKEN_TTL='0',
+        RECAPTCHA_BREAKER_THRESHOLD='1000000',
+    )
+
+
+def server_command(kind, port, workers, threads):
+    if kind == 'WSGI':
+        return [
+            shutil.which('gunicorn') or 'gunicorn', 'config.wsgi:application',
+            '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+            '--threads', str(threads), '--worker-class', 'gthread', '--log-level', 'warning',
+        ]
+    return [
+        sys.executable, '-m', 'uvicorn', 'config.asgi:application',
+        '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers),
+        '--log-level', 'warning', '--no-access-log',
+    ]
+
+
+async def run_load(base_url, label, total, concurrency):
+    """Registra `total` firmantes con `concurrency` clientes; retorna (latencias ms, errores, segundos)"""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await client.get(FORM_URL)
+        csrf = client.cookies['csrftoken']
+        queue = asyncio.Queue()
+        for i in range(total):
+            queue.put_nowait(i)
+        latencies, errors = [], []
+
+        async def user():
+            while not queue.empty():
+                i = queue.get_nowait()
+                payload = {
+                    'fullName': f"Firmante {label} {i}",
+                    'email': f"{label.lower()}{i}@example.org",
+                    'orcid': f"0000-{label[0] == 'W':04d}-{i // 10000:04d}-{i % 10000:04d}",
+                    'affiliation': 'Universidad de Ejemplo',
+                    'discipline': 'Investigador',
+                    'recaptchaToken': f"token-{label}-{i}",
+                }
+                start = time.perf_counter()
+                try:
+                    response = await client.post(SIGNER_URL, json=payload, headers={'X-CSRFToken': csrf})
+                    if response.status_code != 200:
+                        errors.append(response.status_code)
+                except httpx.HTTPError as e:
+                    errors.append(type(e).__name__)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+        return latencies, errors, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--delay', type=float, default=0.2, help='Latencia simulada de reCAPTCHA (segundos)')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4, help='Hilos por worker WSGI')
+    args = parser.parse_args()
+
+    stub = start_stub(delay=args.delay)
+    tmpdir = tempfile.TemporaryDirectory()
+    env = recaptcha_env(os.path.join(tmpdir.name, 'benchmark.sqlite3'), stub.url)
+    migrate(env)
+
+    results = {}
+    try:
+        for kind in ('WSGI', 'ASGI'):
+            port = free_port()
+            process, base_url = start_server(server_command(kind, port, args.workers, args.threads), port, env, FORM_URL)
+            try:
+                results[kind] = asyncio.run(run_load(base_url, kind, args.requests, args.concurrency))
+            finally:
+                process.terminate()
+                process.wait()
+    finally:
+        stub.shutdown()
+        tmpdir.cleanup()
+
+    print(f"\n{'='*78}")
+    print(f"REGISTRO DE FIRMANTES ({args.requests} solicitudes, {args.concurrency} concurrentes, "
+          f"reCAPTCHA {args.delay * 1000:.0f} ms)")
+    print(f"WSGI: gunicorn {args.workers}×{args.threads} hilos   ASGI: uvicorn {args.workers} workers")
+    print(f"{'='*78}")
+    print(f"{'Servidor':<10}{'Solicitudes/s':>16}{'p50 (ms)':>12}{'p99 (ms)':>12}{'Errores':>10}")
+    for kind, (latencies, errors, elapsed) in results.items():
+        print(f"{kind:<10}{len(latencies) / elapsed:>16.1f}{statistics.median(latencies):>12.1f}"
+              f"{percentile(latencies, 0.99):>12.1f}{len(errors):>10}")
+    print(f"{'='*78}\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+"""
+Microbenchmark de los catálogos de etiquetas precompilados
+Uso: python scripts/benchmark_catalogs.py [--iterations N]
+
+Compara la resolución de etiquetas por render tal como se hacía antes
+(reconstruir listas traducidas con get_translated_* y recorrerlas linealmente)
+con las tablas inmutables de core.catalogs. Reporta tiempo y memoria
+asignada por render en cada idioma de LANGUAGES.
+"""
+
+import argparse
+import os
+import sys
+import timeit
+import tracemalloc
+import django
+
+# Setup Django
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.conf import settings
+
+from core.catalogs import get_catalog
+from core.constants import CONTENT_USE_MODES, CC_LICENSES
+from core.translations import (
+    get_translation,
+    get_translated_review_levels,
+    get_translated_content_modes,
+    get_translated_checklist,
+)
+from benchmark_render import sample_declarations
+
+
+def resolve_labels_legacy(declaration, lang):
+    """Resolución de etiquetas previa a los catálogos (listas nuevas en cada render)"""
+    usage_labels = []
+    for ut in declaration.usage_types:
+        if ut == 'other':
+            usage_labels.append(declaration.custom_usage_type or get_translation('usage_other', lang))
+        else:
+            key = 'writing' if ut == 'writing-support' else ut
+            usage_labels.append(get_translation(f'usage_{key}', lang))
+
+    review_level = None
+    for rl in get_translated_review_levels(lang):
+        if rl['level'] == declaration.human_review_level:
+            review_level = rl
+
+    license_label = declaration.license
+    for lic in CC_LICENSES:
+        if lic['value'] == declaration.license:
+            license_label = lic['label']
+
+    translated_modes = get_translated_content_modes(lang)
+    spanish_modes = list(CONTENT_USE_MODES)
+    content_modes = []
+    for mode in declaration.content_use_modes:
+        if mode == 'Otro' or mode == translated_modes[5]:
+            content_modes.append(declaration.custom_content_use_mode or translated_modes[5])
+        elif mode in spanish_modes:
+            content_modes.append(translated_modes[spanish_modes.index(mode)])
+        else:
+            content_modes.append(mode)
+
+    questions = []
+    checklist = get_translated_checklist(lang)
+    for item_id in declaration.selected_checklist_ids:
+        for item in checklist:
+            if item['id'] == item_id:
+                questions.append(item['q'])
+
+    return usage_labels, review_level, license_label, content_modes, questions
+
+
+def resolve_labels_catalog(declaration, lang):
+    """Resolución de etiquetas con las tablas precompiladas"""
+    catalog = get_catalog(lang)
+    usage_labels = [catalog.usage_label(ut, declaration.custom_usage_type) for ut in declaration.usage_types]
+    review_level = catalog.review_level(declaration.human_review_level)
+    license_label = catalog.license_label(declaration.license)
+    content_modes = [
+        catalog.content_mode_label(mode, declaration.custom_content_use_mode)
+        for mode in declaration.content_use_modes
+    ]
+    questions = [
+        q for q in map(catalog.checklist_question, declaration.selected_checklist_ids) if q is not None
+    ]
+    return usage_labels, review_level, license_label, content_modes, questions
+
+
+def peak_allocation(func, declarations, lang):
+    """Pico de memoria asignada por render (tracemalloc), promedio en bytes"""
+    tracemalloc.start()
+    total = 0
+    for declaration in declarations:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        func(declaration, lang)
+        _, peak = tracemalloc.get_traced_memory()
+        total += peak - baseline
+    tracemalloc.stop()
+    return total / len(declarations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=5000, help='Renders por declaración e idioma')
+    args = parser.parse_args()
+
+    declarations = sample_declarations()
+    languages = [code for code, _ in settings.LANGUAGES]
+
+    print(f"\n{'='*80}")
+    print(f"MICROBENCHMARK DE CATÁLOGOS ({len(declarations)} declaraciones x {args.iterations} iteraciones)")
+    print(f"{'='*80}")
+    print(f"{'Idioma':<8}{'Antes (µs)':>12}{'Catálogo (µs)':>15}{'Mejora':>9}{'Antes (B)':>13}{'Catálogo (B)':>15}")
+
+    for lang in languages:
+        for declaration in declarations:
+            legacy = resolve_labels_legacy(declaration, lang)
+            compiled = resolve_labels_catalog(declaration, lang)
+            if legacy[0] != compiled[0] or legacy[2:] != compiled[2:] or \
+                    (legacy[1] or {}).get('label') != (compiled[1] or {}).get('label'):
+                print(f"✗ Etiquetas distintas para {declaration.declaration_id} en '{lang}'")
+                sys.exit(1)
+
+        old = timeit.timeit(
+            lambda: [resolve_labels_legacy(d, lang) for d in declarations], number=args.iterations
+        )
+        new = timeit.timeit(
+            lambda: [resolve_labels_catalog(d, lang) for d in declarations], number=args.iterations
+        )
+        per_render = args.iterations * len(declarations)
+        old_alloc = peak_allocation(resolve_labels_legacy, declarations, lang)
+        new_alloc = peak_allocation(resolve_labels_catalog, declarations, lang)
+        print(
+            f"{lang:<8}{old / per_render * 1e6:>12.2f}{new / per_render * 1e6:>15.2f}{old / new:>8.1f}x"
+            f"{old_alloc:>13.0f}{new_alloc:>15.0f}"
+        )
+
+    print(f"{'='*80}")
+    print("Memoria: pico de bytes asignados durante un render (tracemalloc).\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Utilidades compartidas por los benchmarks y la prueba de carga de scripts/
+
+- setup_django() y test_databases(): Django en proceso sobre una base de datos
+  de prueba temporal (como manage.py test).
+- STEP1_FORM, STEP2_FORM, STEP3_FORM y complete_wizard(): datos de los pasos
+  1-3 del wizard.
+- percentile(): percentil de una lista de latencias.
+- server_env(), migrate() y start_server(): servidores (gunicorn/uvicorn) en un
+  puerto libre sobre una base SQLite temporal.
+
+Los scripts lo importan como `from benchmark_common import ...` (el directorio
+del script está en sys.path al ejecutarlo con `python scripts/<script>.py`).
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+STEP1_FORM = {'checklist': ['q1', 'q3']}
+STEP2_FORM = {'usage_types': ['draft', 'analysis'], 'custom_usage_type': ''}
+STEP3_FORM = {
+    'ai_tool_name': 'ChatGPT', 'ai_tool_version': 'GPT-4o', 'ai_tool_provider': 'OpenAI',
+    'ai_tool_date_month': '5', 'ai_tool_date_year': '2025',
+    'specific_purpose': 'Redacción y revisión del capítulo de resultados.',
+    'prompt_0': 'Mejora la redacción del siguiente párrafo.',
+    'prompt_1': 'Sugiere tres títulos alternativos.',
+    'content_use_modes': ['Otro'], 'content_use_context': 'Tesis doctoral.',
+    'human_review_level': '3', 'reviewer_name': 'Ana Pérez', 'reviewer_role': 'Directora',
+    'license': 'CC BY 4.0',
+}
+
+
+def setup_django():
+    """Configura Django con config.settings (llamar antes de importar modelos o vistas)"""
+    import django
+
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    django.setup()
+
+
+@contextmanager
+def test_databases():
+    """Crea las bases de datos de prueba al entrar y las elimina al salir"""
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        yield
+    finally:
+        runner.teardown_databases(old_config)
+
+
+def complete_wizard(client, step3=None):
+    """Envía los pasos 1-3 del wizard con el cliente de pruebas"""
+    client.post('/es/paso1/', STEP1_FORM)
+    client.post('/es/paso2/', STEP2_FORM)
+    return client.post('/es/paso3/', step3 or STEP3_FORM)
+
+
+def percentile(values, fraction):
+    """Percentil por rango más cercano (fraction entre 0 y 1)"""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def server_env(db_path, **overrides):
+    """Entorno de un servidor de benchmark sobre la base SQLite `db_path`"""
+    env = dict(os.environ)
+    env.update({
+        'DJANGO_SETTINGS_MODULE': 'config.settings',
+        'DB_ENGINE': 'sqlite',
+        'SQLITE_PATH': db_path,
+        'DEBUG': 'False',
+        'IDENTIFIER_KEY': 'benchmark',
+        'ALLOWED_HOSTS': '127.0.0.1',
+    })
+    env.update(overrides)
+    return env
+
+
+def migrate(env):
+    """Aplica las migraciones a la base del entorno"""
+    subprocess.run([sys.executable, 'manage.py', 'migrate', '--verbosity', '0'], cwd=BASE_DIR, env=env, check=True)
+
+
+def start_server(command, port, env, ready_path='/es/paso1/', timeout=30):
+    """
+    Lanza el servidor y espera a que `ready_path` responda 200.
+    Retorna (proceso, URL base); termina el proceso si no responde a tiempo.
+    """
+    import httpx
+
+    process = subprocess.Popen(command, cwd=BASE_DIR, env=env)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(base_url + ready_path, timeout=1).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"El servidor no respondió en {timeout} s: {' '.join(command)}")
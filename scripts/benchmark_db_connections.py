@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+"""
+Costo de conexión a la base de datos por solicitud y escrituras concurrentes en SQLite
+Uso: python scripts/benchmark_db_connections.py [--requests N] [--threads N] [--writes N]
+
+Compara configuraciones de la base de datos, cada una en un proceso aparte
+(los ajustes se leen del entorno) sobre una base de prueba temporal:
+  - SQLite: sin el perfil de producción (journal DELETE, synchronous FULL,
+    transacciones DEFERRED, sin mmap, conexión nueva por solicitud), con los
+    pragmas pero sin conexiones persistentes, y el perfil completo,
+  - PostgreSQL (DB_ENGINE=postgresql y las variables DB_* habituales):
+    conexión nueva por solicitud, conexiones persistentes y pool de psycopg 3
+    (si psycopg_pool está instalado).
+
+Para el costo de conexión simula --requests solicitudes con las señales
+request_started/request_finished (las que abren y cierran las conexiones en
+Django) y una consulta por solicitud; reporta el tiempo por solicitud y las
+conexiones abiertas. En SQLite, además, --threads hilos hacen --writes
+transacciones de lectura y escritura cada uno sobre la misma fila y se
+cuentan los errores "database is locked".
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SQLITE_CONFIGS = [
+    ('sin perfil', {
+        'DB_CONN_MAX_AGE': '0', 'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL',
+        'SQLITE_MMAP_SIZE': '0', 'SQLITE_TRANSACTION_MODE': '',
+    }),
+    ('pragmas, sin persistencia', {'DB_CONN_MAX_AGE': '0'}),
+    ('perfil de producción', {}),
+]
+POSTGRESQL_CONFIGS = [
+    ('conexión por solicitud', {'DB_CONN_MAX_AGE': '0', 'DB_POOL': 'False'}),
+    ('conexiones persistentes', {'DB_POOL': 'False'}),
+    ('pool de psycopg', {'DB_POOL': 'True'}),
+]
+
+
+def child(args):
+    """Mide la configuración del entorno y escribe el resultado en JSON"""
+    sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    import django
+    django.setup()
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    from django.core.signals import request_finished, request_started
+    from django.db import OperationalError, connection, connections, transaction
+    from django.db.backends.signals import connection_created
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import setup_test_environment
+
+    from core.models import Counter
+
+    if connection.vendor == 'sqlite':
+        # Base en archivo (la base en memoria no se comparte entre hilos)
+        connection.settings_dict['TEST']['NAME'] = args.sqlite_path
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    opened = []
+    connection_created.connect(lambda sender, connection, **kwargs: opened.append(connection.alias), weak=False)
+    result = {}
+    try:
+        Counter.objects.create(key='benchmark', value=0)
+        connections.close_all()
+
+        # Ciclo de una solicitud: close_old_connections en request_started y request_finished
+        times = []
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            request_started.send(sender=None)
+            Counter.get_value('benchmark')
+            request_finished.send(sender=None)
+            times.append(time.perf_counter() - start)
+        result['request_ms'] = statistics.median(times) * 1000
+        result['connections'] = len(opened)
+
+        if connection.vendor == 'sqlite':
+            def writer(_):
+                done = locked = 0
+                try:
+                    for _ in range(args.writes):
+                        try:
+                            # Lectura y escritura en la misma transacción (p. ej. get() y save())
+                            with transaction.atomic():
+                                value = Counter.objects.get(key='benchmark').value
+                                Counter.objects.filter(key='benchmark').update(value=value + 1)
+                            done += 1
+                        except OperationalError as exc:
+                            if 'locked' not in str(exc):
+                                raise
+                            locked += 1
+                    return done, locked
+                finally:
+                    connections.close_all()
+
+            Counter.objects.filter(key='benchmark').update(value=0)
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.threads) as pool:
+                outcomes = list(pool.map(writer, range(args.threads)))
+            elapsed = time.perf_counter() - start
+            done = sum(d for d, _ in outcomes)
+            result.update({
+                'writes_per_s': done / elapsed,
+                'locked': sum(lost for _, lost in outcomes),
+                'consistent': Counter.get_value('benchmark') == done,
+            })
+    finally:
+        connections.close_all()
+        runner.teardown_databases(old_config)
+    print(json.dumps(result))
+
+
+def run_config(args, overrides, sqlite_path):
+    env = dict(os.environ, RECAPTCHA_ENABLED='False', **overrides)
+    command = [
+        sys.executable, os.path.abspath(__file__), '--child', '--sqlite-path', sqlite_path,
+        '--requests', str(args.requests), '--threads', str(args.threads), '--writes', str(args.writes),
+    ]
+    process = subprocess.run(command, cwd=BASE_DIR, env=env, capture_output=True, text=True)
+    if process.returncode != 0:
+        return None, process.stderr.strip().splitlines()[-1]
+    return json.loads(process.stdout.strip().splitlines()[-1]), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000, help='Solicitudes simuladas por configuración')
+    parser.add_argument('--threads', type=int, default=8, help='Hilos escritores (SQLite)')
+    parser.add_argument('--writes', type=int, default=200, help='Transacciones por hilo (SQLite)')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--sqlite-path', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+        return
+
+    postgresql = os.environ.get('DB_ENGINE') == 'postgresql'
+    configs = POSTGRESQL_CONFIGS if postgresql else SQLITE_CONFIGS
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for number, (label, overrides) in enumerate(configs):
+            sqlite_path = os.path.join(tmpdir, f'benchmark-{number}.sqlite3')
+            results.append((label, *run_config(args, overrides, sqlite_path)))
+
+    print(f"\n{'='*78}")
+    print(f"CONEXIONES A LA BASE DE DATOS ({'PostgreSQL' if postgresql else 'SQLite'}, "
+          f"{args.requests} solicitudes simuladas)")
+    print(f"{'='*78}")
+    print(f"{'Configuración':<30}{'ms/solicitud':>14}{'Conexiones':>12}")
+    for label, result, error in results:
+        if result is None:
+            print(f"{label:<30}  no disponible: {error}")
+            continue
+        print(f"{label:<30}{result['request_ms']:>14.3f}{result['connections']:>12}")
+
+    if not postgresql:
+        print(f"\nEscrituras concurrentes ({args.threads} hilos × {args.writes} transacciones de lectura y escritura)")
+        print(f"{'Configuración':<30}{'Escrituras/s':>14}{'Bloqueos':>12}{'Contador':>12}")
+        for label, result, _ in results:
+            if result is not None:
+                print(f"{label:<30}{result['writes_per_s']:>14.0f}{result['locked']:>12}"
+                      f"{'correcto' if result['consistent'] else 'ERROR':>12}")
+    print(f"{'='*78}\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+"""
+Agregación de métricas entre workers de gunicorn y costo de medir
+Uso: python scripts/benchmark_metrics.py [--requests N] [--concurrency N] [--workers N]
+
+Sobre una base SQLite temporal levanta gunicorn con --workers procesos, primero
+sin métricas y después con METRICS_ENABLED (METRICS_DIR temporal), y envía N
+solicitudes repartidas entre los pasos 1 y 3 y el directorio de firmantes con --concurrency clientes simultáneos. Reporta solicitudes por
+segundo y latencia p50/p99 en ambos casos, y comprueba que varias lecturas de
+/metrics (atendidas por workers distintos) suman exactamente las solicitudes
+enviadas.
+
+Requiere gunicorn y httpx (requirements.txt).
+"""
+
+import argparse
+import os
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from benchmark_common import free_port, migrate, percentile, server_env, start_server
+
+FLUSH_INTERVAL = 0.5
+REQUESTS = [
+    ('step1', '/es/paso1/'),
+    ('step3', '/es/paso3/'),
+    ('signers_list', '/es/firmantes/'),
+]
+
+
+def metrics_env(db_path, metrics_dir):
+    return server_env(
+        db_path,
+        RECAPTCHA_ENABLED='False',
+        SERVER_TIMING_SAMPLE_RATE='0',
+        METRICS_ENABLED='True' if metrics_dir else 'False',
+        METRICS_DIR=metrics_dir or '',
+        METRICS_FLUSH_INTERVAL=str(FLUSH_INTERVAL),
+    )
+
+
+def gunicorn_command(port, workers):
+    return [
+        shutil.which('gunicorn') or 'gunicorn', 'config.wsgi:application',
+        '--bind', f'127.0.0.1:{port}', '--workers', str(workers), '--log-level', 'warning',
+    ]
+
+
+def run_load(base_url, total, concurrency):
+    """Envía `total` solicitudes; retorna (latencias ms, solicitudes por vista, segundos)"""
+    def send(i):
+        view, path = REQUESTS[i % len(REQUESTS)]
+        # Un cliente por solicitud: conexiones nuevas repartidas entre los workers
+        with httpx.Client(base_url=base_url, timeout=30) as client:
+            start = time.perf_counter()
+            response = client.get(path)
+            return view, response.status_code, (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(send, range(total)))
+    elapsed = time.perf_counter() - start
+    sent = {}
+    for view, status, _ in results:
+        sent[(view, str(status))] = sent.get((view, str(status)), 0) + 1
+    return [r[2] for r in results], sent, elapsed
+
+
+def scraped_requests(base_url):
+    """Solicitudes por (vista, estado) según /metrics"""
+    text = httpx.get(base_url + '/metrics', timeout=10).text
+    counts = {}
+    for labels, value in re.findall(r'^declarador_http_requests_total\{(.*)\} (\S+)$', text, re.M):
+        fields = dict(re.findall(r'(\w+)="([^"]*)"', labels))
+        if fields['view'] != 'metrics':
+            key = (fields['view'], fields['status'])
+            counts[key] = counts.get(key, 0) + int(float(value))
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=600)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.TemporaryDirectory()
+    db_path = os.path.join(tmpdir.name, 'benchmark.sqlite3')
+    metrics_dir = os.path.join(tmpdir.name, 'metrics')
+    migrate(metrics_env(db_path, None))
+
+    results, scrapes = {}, []
+    try:
+        for label, directory in (('sin métricas', None), ('con métricas', metrics_dir)):
+            port = free_port()
+            process, base_url = start_server(gunicorn_command(port, args.workers), port, metrics_env(db_path, directory))
+            try:
+                # Calentamiento fuera de la medición y del conteo
+                run_load(base_url, args.workers * len(REQUESTS), args.concurrency)
+                if directory:
+                    # Conteos del calentamiento, que se restan de los finales
+                    time.sleep(FLUSH_INTERVAL * 3)
+                    before = scraped_requests(base_url)
+                results[label] = run_load(base_url, args.requests, args.concurrency)
+                if directory:
+                    time.sleep(FLUSH_INTERVAL * 3)
+                    scrapes = [
+                        {key: value - before.get(key, 0) for key, value in scraped_requests(base_url).items()}
+                        for _ in range(args.workers * 2)
+                    ]
+            finally:
+                process.terminate()
+                process.wait()
+    finally:
+        tmpdir.cleanup()
+
+    print(f"\n{'='*78}")
+    print(f"MÉTRICAS ENTRE WORKERS (gunicorn {args.workers} workers, {args.requests} solicitudes, "
+          f"{args.concurrency} concurrentes)")
+    print(f"{'='*78}")
+    print(f"{'Configuración':<16}{'Solicitudes/s':>16}{'p50 (ms)':>12}{'p99 (ms)':>12}")
+    for label, (latencies, _, elapsed) in results.items():
+        print(f"{label:<16}{len(latencies) / elapsed:>16.1f}{statistics.median(latencies):>12.2f}"
+              f"{percentile(latencies, 0.99):>12.2f}")
+
+    sent = results['con métricas'][1]
+    consistent = all(scrape == scrapes[0] for scrape in scrapes)
+    print(f"\n{'Vista':<22}{'Estado':>8}{'Enviadas':>10}{'En /metrics':>14}")
+    ok = consistent and sum(scrapes[0].values()) == sum(sent.values())
+    for key in sorted(sent):
+        reported = scrapes[0].get(key, 0)
+        ok = ok and reported == sent[key]
+        print(f"{key[0]:<22}{key[1]:>8}{sent[key]:>10}{reported:>14}")
+    print(f"\nLecturas de /metrics idénticas: {'sí' if consistent else 'no'} ({len(scrapes)} lecturas)")
+    print(f"{'='*78}\n")
+    if not ok:
+        print("✗ /metrics no refleja todas las solicitudes enviadas")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
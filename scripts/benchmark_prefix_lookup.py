@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+"""
+Benchmark de la búsqueda de declaraciones por prefijo (hash o ID abreviado)
+Uso: python scripts/benchmark_prefix_lookup.py [--declarations N] [--repeat N]
+
+Crea una base de datos de prueba temporal con N declaraciones sintéticas,
+verifica los casos de prefijo único, ambiguo y sin coincidencias de
+`resolve_declaration_query` y mide el tiempo de cada tipo de consulta.
+"""
+
+import argparse
+import os
+import sys
+import time
+import django
+
+# Setup Django
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+import hashlib
+
+from django.db import connection
+from django.db.models import Q
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+
+from core.models import Declaration
+from core.views.search import (
+    LOOKUP_ALPHABET, MIN_PREFIX_LENGTH, PREFIX_MATCH_LIMIT,
+    prefix_upper_bound, resolve_declaration_query,
+)
+
+
+def declaration_id_for(i):
+    """ID de 8 caracteres en base 36, distinto para cada i"""
+    chars = []
+    for _ in range(8):
+        i, digit = divmod(i, len(LOOKUP_ALPHABET))
+        chars.append(LOOKUP_ALPHABET[digit])
+    return ''.join(reversed(chars))
+
+
+def seed_declarations(total, batch_size=5000):
+    """Inserta declaraciones sintéticas con bulk_create (sin pasar por save())"""
+    for start in range(0, total, batch_size):
+        batch = []
+        for i in range(start, min(start + batch_size, total)):
+            validation_hash = hashlib.sha256(str(i).encode()).hexdigest()[:16].upper()
+            declaration_id = declaration_id_for(i * 7919 + 1)
+            batch.append(Declaration(
+                declaration_id=declaration_id,
+                validation_hash=validation_hash,
+                # bulk_create no llama a save(): las columnas normalizadas se asignan aquí
+                hash_lookup=validation_hash,
+                id_lookup=declaration_id,
+                usage_types=['redaccion'],
+                ai_tool_name='Herramienta',
+                ai_tool_date_month=1,
+                ai_tool_date_year=2025,
+                specific_purpose='Benchmark',
+            ))
+        Declaration.objects.bulk_create(batch)
+
+
+def timed(func, repeat):
+    """Mejor tiempo de `repeat` ejecuciones en milisegundos"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def check_cases():
+    """Verifica la resolución de prefijos; retorna las consultas de ejemplo por caso"""
+    assert prefix_upper_bound('ABC') == 'ABD'
+    assert prefix_upper_bound('AB9') == 'ABA'
+    assert prefix_upper_bound('AZZ') == 'B'
+    assert prefix_upper_bound('ZZ') is None
+
+    sample = Declaration.objects.order_by('pk').first()
+
+    # Dos hashes que comparten un prefijo de al menos MIN_PREFIX_LENGTH caracteres
+    hashes = sorted(Declaration.objects.values_list('hash_lookup', flat=True))
+    shared = next(
+        (a for a, b in zip(hashes, hashes[1:]) if a[:MIN_PREFIX_LENGTH] == b[:MIN_PREFIX_LENGTH]),
+        None,
+    )
+
+    cases = {
+        'Hash exacto': sample.validation_hash,
+        'Hash exacto (minúsculas)': sample.validation_hash.lower(),
+        'ID exacto': sample.declaration_id,
+        'Prefijo único de hash': sample.validation_hash[:12],
+        'Prefijo único de ID': sample.declaration_id[:7],
+        'Sin coincidencias': 'ZZZZZZZZ',
+        'Prefijo demasiado corto': sample.validation_hash[:MIN_PREFIX_LENGTH - 1],
+    }
+
+    for label in ('Hash exacto', 'Hash exacto (minúsculas)', 'ID exacto'):
+        declaration, candidates = resolve_declaration_query(cases[label])
+        assert declaration.pk == sample.pk and not candidates, label
+
+    for label in ('Prefijo único de hash', 'Prefijo único de ID'):
+        prefix = cases[label]
+        expected = Declaration.objects.filter(
+            Q(hash_lookup__startswith=prefix) | Q(id_lookup__startswith=prefix)
+        ).count()
+        declaration, candidates = resolve_declaration_query(prefix)
+        if expected == 1:
+            assert declaration.pk == sample.pk and not candidates, label
+        else:
+            assert declaration is None and len(candidates) == min(expected, PREFIX_MATCH_LIMIT + 1), label
+
+    for label in ('Sin coincidencias', 'Prefijo demasiado corto'):
+        declaration, candidates = resolve_declaration_query(cases[label])
+        assert declaration is None and not candidates, label
+
+    if shared:
+        prefix = shared[:MIN_PREFIX_LENGTH]
+        expected = Declaration.objects.filter(hash_lookup__startswith=prefix).count()
+        declaration, candidates = resolve_declaration_query(prefix)
+        assert declaration is None, 'Prefijo ambiguo'
+        assert len(candidates) == min(expected, PREFIX_MATCH_LIMIT + 1), 'Prefijo ambiguo'
+        assert all(c.hash_lookup.startswith(prefix) for c in candidates), 'Prefijo ambiguo'
+        cases['Prefijo ambiguo de hash'] = prefix.lower()
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--declarations', type=int, default=200_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        print(f"Creando {args.declarations} declaraciones sintéticas...")
+        seed_declarations(args.declarations)
+
+        cases = check_cases()
+        print("✓ Casos de prefijo único, ambiguo y sin coincidencias verificados")
+
+        print(f"\n{'='*78}")
+        print(f"BÚSQUEDA POR PREFIJO ({args.declarations} declaraciones)")
+        print(f"{'='*78}")
+        print(f"{'Caso':<28}{'Consulta':<20}{'Consultas SQL':>14}{'Tiempo (ms)':>16}")
+
+        for label, query in cases.items():
+            with CaptureQueriesContext(connection) as captured:
+                resolve_declaration_query(query)
+            elapsed = timed(lambda: resolve_declaration_query(query), args.repeat)
+            print(f"{label:<28}{query:<20}{len(captured):>14}{elapsed:>16.3f}")
+
+        print(f"{'='*78}\n")
+    finally:
+        runner.teardown_databases(old_config)
+
+
+if __name__ == '__main__':
+    main()
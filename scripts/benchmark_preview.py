@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+"""
+Benchmark de la vista previa en tiempo real (api/preview/)
+Uso: python scripts/benchmark_preview.py [--keystrokes N] [--repeats N]
+
+Simula la edición del paso 3 (escribir el propósito letra por letra y eventos
+que no cambian los datos, como volver a elegir el mismo mes) con una sesión
+completa, sobre una base de datos de prueba temporal. Compara:
+  - sin memoización: el cliente no envía If-None-Match y la caché de renders
+    se vacía antes de cada solicitud (equivale a la vista anterior),
+  - memoizada: el cliente envía el ETag de lo que muestra; el servidor responde
+    304 o solo las secciones cambiadas.
+Reporta tiempo por solicitud, bytes de respuesta y distribución de respuestas.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import django
+
+# Setup Django
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.core.cache import cache
+from django.test import Client
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment
+
+from core.constants import CONTENT_USE_MODES
+
+PREVIEW_URL = '/es/api/preview/'
+PURPOSE = 'Redacción de la introducción y revisión de la bibliografía del capítulo 2. '
+
+
+def session_data():
+    """Datos de los pasos 1 y 2 más detalles completos del paso 3"""
+    return {
+        'selected_checklist_ids': ['q1', 'q3', 'q6'],
+        'usage_types': ['draft', 'coding', 'analysis'],
+        'custom_usage_type': '',
+        'ai_tool': {'name': 'ChatGPT', 'version': 'GPT-4o', 'provider': 'OpenAI', 'date_month': 5, 'date_year': 2025},
+        'specific_purpose': '',
+        'prompts': [{'id': str(n), 'description': f'Instrucción de ejemplo número {n}.'} for n in range(4)],
+        'content_use_modes': list(CONTENT_USE_MODES)[:2],
+        'custom_content_use_mode': '',
+        'content_use_context': 'Capítulo 4 de la tesis doctoral.',
+        'human_review': {'level': 3, 'reviewer_name': 'Ana Pérez', 'reviewer_role': 'Directora de tesis'},
+        'license': 'CC BY 4.0',
+    }
+
+
+def edit_events(keystrokes, repeats):
+    """Cuerpos de solicitud del paso 3: letras del propósito intercaladas con eventos sin cambios"""
+    events = []
+    text = (PURPOSE * (keystrokes // len(PURPOSE) + 1))[:keystrokes]
+    for i in range(1, keystrokes + 1):
+        events.append({'specific_purpose': text[:i], 'ai_tool': {'date_month': 5}})
+        if repeats and i % max(1, keystrokes // repeats) == 0:
+            events.append({'specific_purpose': text[:i], 'ai_tool': {'date_month': 5}})
+    return events
+
+
+def run(client, events, memoized):
+    """Envía los eventos; retorna (latencias ms, bytes, {estado: conteo})"""
+    latencies, sizes, statuses = [], [], {}
+    etag = None
+    for body in events:
+        headers = {}
+        if memoized and etag:
+            headers['HTTP_IF_NONE_MATCH'] = etag
+        else:
+            cache.clear()
+        start = time.perf_counter()
+        response = client.post(PREVIEW_URL, data=json.dumps(body), content_type='application/json', **headers)
+        latencies.append((time.perf_counter() - start) * 1000)
+        sizes.append(len(response.content))
+        if response.status_code == 200:
+            kind = 'parcial' if response.json()['partial'] else 'completa'
+            etag = response['ETag']
+        elif response.status_code == 304:
+            kind = '304'
+        else:
+            print(f"✗ Respuesta inesperada {response.status_code}: {response.content[:200]!r}")
+            sys.exit(1)
+        statuses[kind] = statuses.get(kind, 0) + 1
+    return latencies, sizes, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--keystrokes', type=int, default=400, help='Letras escritas en el propósito')
+    parser.add_argument('--repeats', type=int, default=100, help='Eventos sin cambios intercalados')
+    args = parser.parse_args()
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        client = Client()
+        client.get('/es/paso3/')
+        session = client.session
+        session['declaration_data'] = session_data()
+        session.save()
+
+        events = edit_events(args.keystrokes, args.repeats)
+        # Calentamiento (traducciones, catálogos, sesión)
+        run(client, events[:20], memoized=False)
+
+        results = {
+            'Sin memoización': run(client, events, memoized=False),
+            'Memoizada (ETag)': run(client, events, memoized=True),
+        }
+    finally:
+        runner.teardown_databases(old_config)
+
+    print(f"\n{'='*86}")
+    print(f"VISTA PREVIA DEL PASO 3 ({len(events)} solicitudes: {args.keystrokes} letras + eventos sin cambios)")
+    print(f"{'='*86}")
+    print(f"{'Modo':<20}{'Media ms':>10}{'p50 ms':>10}{'Bytes/sol.':>12}{'Bytes total':>14}  Respuestas")
+    for label, (latencies, sizes, statuses) in results.items():
+        summary = ', '.join(f"{kind}: {count}" for kind, count in sorted(statuses.items()))
+        print(f"{label:<20}{statistics.mean(latencies):>10.3f}{statistics.median(latencies):>10.3f}"
+              f"{statistics.mean(sizes):>12.0f}{sum(sizes):>14}  {summary}")
+    print(f"{'='*86}\n")
+
+
+if __name__ == '__main__':
+    main()
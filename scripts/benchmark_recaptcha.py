@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+"""
+Benchmark y verificación del cliente de reCAPTCHA (core/recaptcha.py) sin conexión
+Uso: python scripts/benchmark_recaptcha.py [--requests N] [--delay S]
+
+Levanta el servidor simulado de scripts/recaptcha_stub.py y compara:
+  - una solicitud nueva por verificación (`requests.post`) contra la sesión
+    persistente del cliente (latencia y conexiones abiertas),
+  - la caché de tokens ya verificados,
+  - el circuit breaker con la API lenta, en las políticas 'closed' y 'open',
+    y su recuperación tras el tiempo de espera.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import django
+
+# Setup Django
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+import requests
+from django.core.cache import cache
+from django.test.utils import override_settings
+
+from core.recaptcha import CLOSED, OPEN, RecaptchaClient
+from recaptcha_stub import start_stub
+
+
+def timed_calls(func, count):
+    """Latencias en ms de `count` llamadas"""
+    latencies = []
+    for i in range(count):
+        start = time.perf_counter()
+        func(i)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(label, latencies, connections):
+    print(f"{label:<34}{statistics.mean(latencies):>10.2f}{statistics.median(latencies):>10.2f}"
+          f"{max(latencies):>10.2f}{connections:>14}")
+
+
+def compare_pooling(count, delay):
+    server = start_stub(delay=delay)
+    print(f"\n{'='*78}")
+    print(f"VERIFICACIÓN DE TOKENS ({count} solicitudes, latencia simulada {delay * 1000:.0f} ms)")
+    print(f"{'='*78}")
+    print(f"{'Cliente':<34}{'Media ms':>10}{'p50 ms':>10}{'Máx ms':>10}{'Conexiones':>14}")
+
+    latencies = timed_calls(
+        lambda i: requests.post(server.url, data={'secret': 'stub', 'response': f"token-{i}"}, timeout=5).json(),
+        count,
+    )
+    report('requests.post (sin pool)', latencies, server.connections)
+
+    before = server.connections
+    client = RecaptchaClient(verify_url=server.url, token_ttl=0)
+    latencies = timed_calls(lambda i: client.verify(f"token-{i}"), count)
+    report('RecaptchaClient (sesión + pool)', latencies, server.connections - before)
+    assert server.connections - before == 1, "La sesión debe reutilizar una sola conexión"
+    print(f"{'='*78}")
+    metrics = client.metrics()
+    print(f"Métricas del cliente: {metrics['outcomes']} latencia {metrics['latency_ms']}")
+    server.shutdown()
+
+
+def check_token_cache():
+    server = start_stub()
+    client = RecaptchaClient(verify_url=server.url, token_ttl=60)
+    first = client.verify('token-cache', '10.0.0.1')
+    second = client.verify('token-cache', '10.0.0.1')
+    other_ip = client.verify('token-cache', '10.0.0.2')
+    rejected = client.verify('fail-token')
+    assert first['success'] and not first.get('cached')
+    assert second['success'] and second.get('cached')
+    assert other_ip['success'] and not other_ip.get('cached')
+    assert not rejected['success'] and rejected['error_codes'] == ['invalid-input-response']
+    assert server.requests == 3, server.requests
+    print("✓ Caché de tokens: el reenvío del mismo token no consulta la API")
+    server.shutdown()
+
+
+def check_breaker(policy):
+    # API más lenta que el timeout de lectura: cada llamada falla por timeout
+    server = start_stub(delay=0.3)
+    client = RecaptchaClient(
+        verify_url=server.url, timeout=(0.5, 0.1), token_ttl=0,
+        failure_policy=policy, breaker_threshold=3, breaker_cooldown=0.5,
+    )
+    failures = [client.verify(f"token-{i}") for i in range(3)]
+    assert client.breaker.state == OPEN
+    start = time.perf_counter()
+    short_circuit = client.verify('token-open')
+    elapsed = (time.perf_counter() - start) * 1000
+    assert elapsed < 5, f"Con el circuito abierto la respuesta debe ser inmediata ({elapsed:.1f} ms)"
+
+    expected = policy == 'open'
+    assert all(result['success'] is expected for result in failures + [short_circuit])
+    if policy == 'closed':
+        assert short_circuit['error_codes'] == ['circuit-open']
+    assert server.requests == 3, "Con el circuito abierto no se llama a la API"
+
+    # La API se recupera: tras el cooldown una solicitud de prueba cierra el circuito
+    server.delay = 0
+    time.sleep(0.6)
+    recovered = client.verify('token-recovered')
+    assert recovered['success'] and not recovered.get('degraded')
+    assert client.breaker.state == CLOSED
+    print(f"✓ Circuit breaker (política '{policy}'): abre tras 3 fallos, responde en "
+          f"{elapsed:.2f} ms y se cierra al recuperarse la API; métricas {client.metrics()['outcomes']}")
+    server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--delay', type=float, default=0.0, help='Latencia simulada de la API (segundos)')
+    args = parser.parse_args()
+
+    with override_settings(RECAPTCHA_SECRET_KEY='stub'):
+        cache.clear()
+        compare_pooling(args.requests, args.delay)
+        check_token_cache()
+        check_breaker('closed')
+        check_breaker('open')
+    print()
+
+
+if __name__ == '__main__':
+    main()
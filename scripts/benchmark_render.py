@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+"""
+Benchmark del renderizado de declaraciones
+Uso: python scripts/benchmark_render.py [--iterations N]
+
+Compara el camino anterior (renderizar sin hash, calcular hash y volver a
+renderizar con hash) con el renderizado en una sola pasada de
+generate_signed_declaration_text, en todos los idiomas de LANGUAGES.
+"""
+
+import argparse
+import sys
+import timeit
+
+from benchmark_common import setup_django
+
+setup_django()
+
+from django.conf import settings
+
+from core.constants import PRESETS, CONTENT_USE_MODES
+from core.models import Declaration
+from core.utils import (
+    compute_hash,
+    generate_declaration_text,
+    generate_signed_declaration_text,
+)
+
+
+def sample_declarations():
+    """Declaraciones realistas: una por cada preset más una con todos los campos"""
+    declarations = []
+    for i, preset in enumerate(PRESETS):
+        data = preset['data']
+        declarations.append(Declaration(
+            declaration_id=f"BENCH{i:03d}",
+            selected_checklist_ids=['q1', 'q3', 'q6'],
+            usage_types=data['usage_types'],
+            ai_tool_name='ChatGPT',
+            ai_tool_version='GPT-4o',
+            ai_tool_provider='OpenAI',
+            ai_tool_date_month=5,
+            ai_tool_date_year=2025,
+            specific_purpose=data['specific_purpose'],
+            prompts=[
+                {'id': '0', 'description': 'Mejora la redacción del siguiente párrafo manteniendo el tono académico.'},
+                {'id': '1', 'description': 'Sugiere tres títulos alternativos para el capítulo de resultados.'},
+            ],
+            content_use_modes=data['content_use_modes'],
+            content_use_context='Capítulo 4 de la tesis doctoral, secciones de discusión.',
+            human_review_level=min(data['human_review_level'], 5),
+            reviewer_name='Ana Pérez',
+            reviewer_role=data['reviewer_role'],
+            license='CC BY 4.0',
+        ))
+
+    declarations.append(Declaration(
+        declaration_id='BENCHFUL',
+        selected_checklist_ids=['q1', 'q2', 'q3', 'q4', 'q5', 'q6', 'q7'],
+        usage_types=['draft', 'coding', 'analysis', 'other'],
+        custom_usage_type='Generación de figuras y diagramas de flujo',
+        ai_tool_name='Claude',
+        ai_tool_version='Claude 3.5 Sonnet',
+        ai_tool_provider='Anthropic',
+        ai_tool_date_month=11,
+        ai_tool_date_year=2024,
+        specific_purpose='Redacción de la introducción, scripts de análisis estadístico en R y revisión de la bibliografía.',
+        prompts=[{'id': str(n), 'description': f'Instrucción de ejemplo número {n} para el asistente.'} for n in range(6)],
+        content_use_modes=list(CONTENT_USE_MODES),
+        custom_content_use_mode='Adaptado a la plantilla de la revista',
+        content_use_context='Artículo enviado a revista indexada.',
+        human_review_level=5,
+        reviewer_name='Comité editorial',
+        reviewer_role='Revisor externo',
+        license='CC BY-NC 4.0',
+    ))
+    return declarations
+
+
+def render_two_pass(declaration, lang):
+    """Camino anterior: render sin hash, hash y render completo con hash"""
+    text = generate_declaration_text(declaration, None, lang)
+    hash_value = compute_hash(text)
+    return generate_declaration_text(declaration, hash_value, lang), hash_value
+
+
+def render_single_pass(declaration, lang):
+    """Camino nuevo: cuerpo una vez, hash y pie de registro"""
+    return generate_signed_declaration_text(declaration, lang)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=2000, help='Renders por declaración e idioma')
+    args = parser.parse_args()
+
+    declarations = sample_declarations()
+    languages = [code for code, _ in settings.LANGUAGES]
+
+    print(f"\n{'='*72}")
+    print(f"BENCHMARK DE RENDERIZADO ({len(declarations)} declaraciones x {args.iterations} iteraciones)")
+    print(f"{'='*72}")
+    print(f"{'Idioma':<8}{'Dos pasadas (µs)':>20}{'Una pasada (µs)':>20}{'Mejora':>12}")
+
+    for lang in languages:
+        # Los textos y hashes deben ser idénticos byte a byte
+        for declaration in declarations:
+            if render_two_pass(declaration, lang) != render_single_pass(declaration, lang):
+                print(f"✗ Salida distinta para {declaration.declaration_id} en '{lang}'")
+                sys.exit(1)
+
+        old = timeit.timeit(
+            lambda: [render_two_pass(d, lang) for d in declarations], number=args.iterations
+        )
+        new = timeit.timeit(
+            lambda: [render_single_pass(d, lang) for d in declarations], number=args.iterations
+        )
+        per_render = args.iterations * len(declarations)
+        old_us = old / per_render * 1e6
+        new_us = new / per_render * 1e6
+        print(f"{lang:<8}{old_us:>20.1f}{new_us:>20.1f}{old / new:>11.2f}x")
+
+    print(f"{'='*72}\n")
+
+
+if __name__ == '__main__':
+    main()
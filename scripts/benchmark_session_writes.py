@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+Escrituras de sesión por declaración completada con cada backend de sesiones
+Uso: python scripts/benchmark_session_writes.py [--runs N] [--refreshes N]
+
+Completa el wizard con el cliente de pruebas de Django (base de datos de prueba
+temporal, reCAPTCHA deshabilitado): pasos 1-4 con recargas del paso 4, ida y
+vuelta entre pasos sin cambios, descargas y guardado. Compara:
+  - django.contrib.sessions.backends.db (backend anterior),
+  - core.sessions escribiendo directamente en la base (SESSION_WRITE_BEHIND_DELAY=0),
+  - core.sessions con escritura diferida (las escrituras pendientes se vuelcan
+    al final de cada recorrido).
+Reporta INSERT/UPDATE sobre la tabla de sesiones por declaración, y verifica
+que las recargas y la navegación sin cambios no escriben en la base.
+"""
+
+import argparse
+import statistics
+import sys
+import time
+
+from benchmark_common import STEP3_FORM, complete_wizard, setup_django, test_databases
+
+setup_django()
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from core import sessions
+
+BACKENDS = [
+    ('db (anterior)', {'SESSION_ENGINE': 'django.contrib.sessions.backends.db'}),
+    ('core.sessions', {'SESSION_ENGINE': 'core.sessions', 'SESSION_WRITE_BEHIND_DELAY': 0}),
+    # Retraso largo: el hilo no vuelca durante el recorrido, se vuelca al final
+    ('core.sessions diferida', {'SESSION_ENGINE': 'core.sessions', 'SESSION_WRITE_BEHIND_DELAY': 600}),
+]
+
+
+def session_writes(queries):
+    return sum(
+        1 for query in queries.captured_queries
+        if 'django_session' in query['sql'] and query['sql'].lstrip().upper().startswith(('INSERT', 'UPDATE'))
+    )
+
+
+def wizard_run(refreshes):
+    """Un recorrido; retorna (escrituras totales, escrituras en recargas/navegación, segundos)"""
+    client = Client()
+    start = time.perf_counter()
+    # Contextos consecutivos (no anidados: al salir de uno se reactiva reset_queries)
+    with CaptureQueriesContext(connection) as wizard:
+        client.get('/es/paso1/')
+        complete_wizard(client)
+        first = client.get('/es/paso4/')
+
+    with CaptureQueriesContext(connection) as navigation:
+        for _ in range(refreshes):
+            again = client.get('/es/paso4/')
+            if again.context['declaration'].declaration_id != first.context['declaration'].declaration_id:
+                print("✗ La recarga del paso 4 cambió el ID de la declaración")
+                sys.exit(1)
+        for url in ('/es/paso3/', '/es/paso2/', '/es/paso3/', '/es/paso4/'):
+            client.get(url)
+        client.post('/es/paso3/', STEP3_FORM)  # enviar el paso 3 sin cambios
+        client.get('/es/paso4/')
+        client.get('/es/descargar/texto/')
+        client.get('/es/descargar/json/')
+
+    with CaptureQueriesContext(connection) as save:
+        if client.post('/es/api/guardar/').status_code != 200:
+            print("✗ No se pudo guardar la declaración")
+            sys.exit(1)
+        sessions.flush_pending()
+    elapsed = time.perf_counter() - start
+    writes = [session_writes(queries) for queries in (wizard, navigation, save)]
+    return sum(writes), writes[1], elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=30)
+    parser.add_argument('--refreshes', type=int, default=3, help='Recargas del paso 4 por recorrido')
+    args = parser.parse_args()
+
+    results = {}
+    with test_databases():
+        for label, overrides in BACKENDS:
+            with override_settings(RECAPTCHA_ENABLED=False, **overrides):
+                wizard_run(args.refreshes)  # calentamiento
+                results[label] = [wizard_run(args.refreshes) for _ in range(args.runs)]
+
+    print(f"\n{'='*80}")
+    print(f"ESCRITURAS DE SESIÓN POR DECLARACIÓN ({args.runs} recorridos, {args.refreshes} recargas del paso 4)")
+    print(f"{'='*80}")
+    print(f"{'Backend':<26}{'Escrituras/declaración':>24}{'En navegación':>16}{'ms/recorrido':>14}")
+    for label, runs in results.items():
+        print(f"{label:<26}{statistics.mean(r[0] for r in runs):>24.1f}"
+              f"{statistics.mean(r[1] for r in runs):>16.1f}{statistics.mean(r[2] for r in runs) * 1000:>14.1f}")
+    print(f"{'='*80}\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+"""
+Benchmark del directorio público de firmantes
+Uso: python scripts/benchmark_signers_list.py [--signers N] [--repeat N]
+
+Crea una base de datos de prueba temporal con N firmantes sintéticos y mide
+el tiempo de la vista /firmantes/ en distintas profundidades de página
+(paginación por keyset), comparado con la paginación por OFFSET, y el de la
+búsqueda del directorio (sugerencias mientras se escribe y filtros).
+"""
+
+import argparse
+import os
+import sys
+import time
+import django
+
+# Setup Django
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from datetime import timedelta
+
+from django.test import Client
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment
+from django.utils import timezone
+
+from core.fulltext import rebuild_signer_index, search_signers
+from core.models import Signer, Counter
+from core.pagination import encode_cursor, keyset_page
+from core.views.signers import SIGNERS_PAGE_SIZE, SIGNERS_LIST_FIELDS, SIGNER_SUGGEST_LIMIT
+
+FIRST_NAMES = ['José', 'María', 'João', 'Ana', 'Luis', 'Conceição', 'Andrés', 'Inês', 'Pedro', 'Lucía']
+LAST_NAMES = ['Muñoz', 'González', 'Pérez', 'Araújo', 'Fernández', 'Gómez', 'Simões', 'Rodríguez', 'Núñez', 'Silva']
+AFFILIATIONS = ['Universidad de Chile', 'Universidade de São Paulo', 'Universidad de los Andes', 'Universidade do Porto']
+DISCIPLINES = ['Académico', 'Investigador', 'Técnico', 'Estudiante']
+COUNTRIES = ['Chile', 'Brasil', 'Colombia', 'Portugal', 'México']
+
+SEARCH_QUERIES = [
+    ('jo', {}),
+    ('muno', {}),
+    ('gonzalez', {}),
+    ('maria perez', {}),
+    ('sao paulo', {'orcid_verified': True}),
+    ('andres', {'country': 'Chile'}),
+    ('conceicao simoes', {'discipline': 'Investigador'}),
+]
+
+
+def seed_signers(total, batch_size=5000):
+    """Inserta firmantes sintéticos con bulk_create (sin pasar por save())"""
+    now = timezone.now()
+    for start in range(0, total, batch_size):
+        batch = []
+        for i in range(start, min(start + batch_size, total)):
+            batch.append(Signer(
+                signer_id=f"S{i:09d}",
+                validation_hash=f"{i:064x}",
+                hash_short=f"{i:08x}",
+                full_name=f"{FIRST_NAMES[i % 10]} {LAST_NAMES[i // 10 % 10]} {LAST_NAMES[i // 100 % 10]} {i}",
+                email=f"firmante{i}@example.org",
+                orcid=f"0000-0000-{i // 10000:04d}-{i % 10000:04d}",
+                affiliation=AFFILIATIONS[i % len(AFFILIATIONS)],
+                discipline=DISCIPLINES[i % len(DISCIPLINES)],
+                country=COUNTRIES[i % len(COUNTRIES)],
+                orcid_verified=i % 3 == 0,
+                public_listing=i % 20 != 0,
+                created_at=now - timedelta(seconds=i),
+            ))
+        Signer.objects.bulk_create(batch)
+    # bulk_create no dispara señales: recalcular el contador y el índice de búsqueda
+    Counter.recount_public_signers()
+    rebuild_signer_index(Signer.objects.all())
+
+
+def timed(func, repeat):
+    """Mejor tiempo de `repeat` ejecuciones en milisegundos"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--signers', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        print(f"Creando {args.signers} firmantes sintéticos...")
+        seed_signers(args.signers)
+
+        public = Signer.objects.filter(public_listing=True)
+        total_pages = (Counter.get_value(Counter.PUBLIC_SIGNERS) + SIGNERS_PAGE_SIZE - 1) // SIGNERS_PAGE_SIZE
+        depths = sorted({1, 10, 100, total_pages // 2, total_pages})
+
+        client = Client()
+        print(f"\n{'='*72}")
+        print(f"DIRECTORIO DE FIRMANTES ({args.signers} firmantes, {total_pages} páginas)")
+        print(f"{'='*72}")
+        print(f"{'Página':>8}{'Vista completa (ms)':>22}{'Consulta keyset (ms)':>22}{'OFFSET (ms)':>14}")
+
+        for page in depths:
+            offset = (page - 1) * SIGNERS_PAGE_SIZE
+            url = '/es/firmantes/'
+            cursor = None
+            if offset:
+                # Cursor del último registro de la página anterior
+                cursor = encode_cursor(public.order_by('-created_at', '-pk')[offset - 1])
+                url += f'?after={cursor}'
+
+            view_ms = timed(lambda: client.get(url), args.repeat)
+            keyset_ms = timed(
+                lambda: keyset_page(public.only(*SIGNERS_LIST_FIELDS), after=cursor, page_size=SIGNERS_PAGE_SIZE),
+                args.repeat,
+            )
+            offset_ms = timed(
+                lambda: list(public.only(*SIGNERS_LIST_FIELDS).order_by('-created_at', '-pk')[offset:offset + SIGNERS_PAGE_SIZE]),
+                args.repeat,
+            )
+            print(f"{page:>8}{view_ms:>22.2f}{keyset_ms:>22.2f}{offset_ms:>14.2f}")
+
+        print(f"{'='*72}\n")
+
+        print(f"{'='*72}")
+        print("BÚSQUEDA EN EL DIRECTORIO")
+        print(f"{'='*72}")
+        print(f"{'Consulta':<20}{'Filtros':<28}{'Sugerencias (ms)':>18}{'Vista (ms)':>12}")
+        for query, filters in SEARCH_QUERIES:
+            suggest_ms = timed(
+                lambda: search_signers(query, filters, page_size=SIGNER_SUGGEST_LIMIT, fields=SIGNERS_LIST_FIELDS),
+                args.repeat,
+            )
+            params = {'q': query, **{k: ('1' if v is True else v) for k, v in filters.items()}}
+            params = {('verified' if k == 'orcid_verified' else k): v for k, v in params.items()}
+            view_ms = timed(lambda: client.get('/es/firmantes/', params), args.repeat)
+            label = ', '.join(f"{k}={v}" for k, v in filters.items()) or '-'
+            print(f"{query:<20}{label:<28}{suggest_ms:>18.2f}{view_ms:>12.2f}")
+        print(f"{'='*72}\n")
+    finally:
+        runner.teardown_databases(old_config)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+"""
+Sobrecarga de la instrumentación Server-Timing por vista
+Uso: python scripts/benchmark_timing.py [--requests N] [--budget F]
+
+Con el cliente de pruebas de Django (base de datos de prueba temporal,
+reCAPTCHA deshabilitado) mide el tiempo por solicitud de las vistas del wizard,
+la vista previa y el directorio de firmantes sin instrumentación
+(SERVER_TIMING_SAMPLE_RATE=0) y midiendo todas las solicitudes (tasa 1.0).
+Reporta la sobrecarga relativa, la tasa de muestreo a la que llega el
+controlador adaptativo con el presupuesto dado y el desglose de una solicitud
+(cabecera Server-Timing) de cada vista.
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import time
+
+from benchmark_common import complete_wizard, setup_django, test_databases
+
+setup_django()
+
+from django.test import Client
+from django.test.utils import override_settings
+
+PREVIEW_BODY = json.dumps({'specific_purpose': 'Redacción del capítulo de resultados.'})
+
+REQUESTS = [
+    ('paso1', lambda c: c.get('/es/paso1/')),
+    ('paso3', lambda c: c.get('/es/paso3/')),
+    ('paso4', lambda c: c.get('/es/paso4/')),
+    ('preview', lambda c: c.post('/es/api/preview/', PREVIEW_BODY, content_type='application/json')),
+    ('firmantes', lambda c: c.get('/es/firmantes/')),
+]
+
+
+def wizard_client():
+    """Cliente con el wizard completado (el middleware se carga con los ajustes vigentes)"""
+    client = Client()
+    complete_wizard(client)
+    return client
+
+
+def measure(client, requests):
+    """Mediana del tiempo (s) por solicitud de cada vista"""
+    results = {}
+    for label, make_request in REQUESTS:
+        make_request(client)  # calentamiento
+        times = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            make_request(client)
+            times.append(time.perf_counter() - start)
+        results[label] = statistics.median(times)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200, help='Solicitudes por vista y configuración')
+    parser.add_argument('--budget', type=float, default=0.02, help='SERVER_TIMING_OVERHEAD_BUDGET')
+    args = parser.parse_args()
+
+    # Las líneas de log no forman parte de la medición
+    logging.getLogger('core.timing').setLevel(logging.WARNING)
+
+    with test_databases():
+        with override_settings(RECAPTCHA_ENABLED=False, SERVER_TIMING_SAMPLE_RATE=0.0):
+            baseline = measure(wizard_client(), args.requests)
+        with override_settings(RECAPTCHA_ENABLED=False, SERVER_TIMING_SAMPLE_RATE=1.0,
+                               SERVER_TIMING_OVERHEAD_BUDGET=args.budget):
+            client = wizard_client()
+            instrumented = measure(client, args.requests)
+            breakdown = {label: make_request(client).get('Server-Timing', '') for label, make_request in REQUESTS}
+            # El primer middleware es ServerTimingMiddleware (envuelto por convert_exception_to_response)
+            middleware = getattr(client.handler._middleware_chain, '__wrapped__', None)
+            final_rate = middleware.controller.rate if hasattr(middleware, 'controller') else None
+
+    print(f"\n{'='*78}")
+    print(f"SOBRECARGA DE SERVER-TIMING ({args.requests} solicitudes por vista, mediana)")
+    print(f"{'='*78}")
+    print(f"{'Vista':<12}{'Sin medir (ms)':>16}{'Midiendo (ms)':>16}{'Sobrecarga':>14}")
+    for label in baseline:
+        overhead = instrumented[label] / baseline[label] - 1
+        print(f"{label:<12}{baseline[label] * 1000:>16.2f}{instrumented[label] * 1000:>16.2f}{overhead:>13.1%}")
+    if final_rate is not None:
+        print(f"\nTasa de muestreo tras el recorrido (presupuesto {args.budget:.1%}): {final_rate:.3f}")
+    print("\nDesglose (Server-Timing):")
+    for label, header in breakdown.items():
+        print(f"  {label:<10} {header}")
+    print(f"{'='*78}\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""
+Escrituras en la base de datos por recorrido del wizard según WIZARD_STATE_STORAGE
+Uso: python scripts/benchmark_wizard_state.py [--runs N] [--purpose-length N]
+
+Recorre los pasos 1-4 y las descargas con el cliente de pruebas de Django
+(base de datos de prueba temporal, reCAPTCHA deshabilitado) en los modos
+'session' y 'signed', y cuenta las escrituras en la tabla de sesiones, el
+tamaño de la cookie del estado y el tiempo por recorrido. Verifica además que
+las descargas coinciden con lo mostrado en el paso 4 en ambos modos.
+"""
+
+import argparse
+import statistics
+import sys
+import time
+
+from benchmark_common import STEP1_FORM, STEP2_FORM, STEP3_FORM, setup_django, test_databases
+
+setup_django()
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+
+def step3_form(purpose_length):
+    purpose = ('Redacción y revisión del capítulo de resultados. ' * (purpose_length // 48 + 1))[:purpose_length]
+    return {**STEP3_FORM, 'specific_purpose': purpose}
+
+
+def wizard_run(purpose_length):
+    """Un recorrido completo; retorna (escrituras de sesión, bytes de la cookie, segundos)"""
+    client = Client()
+    start = time.perf_counter()
+    with CaptureQueriesContext(connection) as queries:
+        client.get('/es/paso1/')
+        client.post('/es/paso1/', STEP1_FORM)
+        client.get('/es/paso2/')
+        client.post('/es/paso2/', STEP2_FORM)
+        client.get('/es/paso3/')
+        client.post('/es/paso3/', step3_form(purpose_length))
+        step4 = client.get('/es/paso4/')
+        text = client.get('/es/descargar/texto/')
+        json_file = client.get('/es/descargar/json/')
+    elapsed = time.perf_counter() - start
+
+    if text.status_code != 200 or json_file.status_code != 200:
+        print(f"✗ Descargas no disponibles ({text.status_code}, {json_file.status_code})")
+        sys.exit(1)
+    if text.content.decode() != step4.context['text_output'] or json_file.content.decode() != step4.context['json_output']:
+        print("✗ Las descargas no coinciden con el paso 4")
+        sys.exit(1)
+
+    writes = sum(
+        1 for query in queries.captured_queries
+        if 'django_session' in query['sql'] and not query['sql'].lstrip().upper().startswith('SELECT')
+    )
+    cookie = client.cookies.get(settings.WIZARD_STATE_COOKIE_NAME)
+    return writes, len(cookie.value) if cookie else 0, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--purpose-length', type=int, default=300, help='Caracteres del propósito (paso 3)')
+    args = parser.parse_args()
+
+    results = {}
+    with test_databases():
+        for mode in ('session', 'signed'):
+            with override_settings(WIZARD_STATE_STORAGE=mode, RECAPTCHA_ENABLED=False):
+                wizard_run(args.purpose_length)  # calentamiento
+                results[mode] = [wizard_run(args.purpose_length) for _ in range(args.runs)]
+
+    print(f"\n{'='*78}")
+    print(f"ESTADO DEL WIZARD ({args.runs} recorridos, propósito de {args.purpose_length} caracteres, "
+          f"límite {settings.WIZARD_STATE_MAX_BYTES} B)")
+    print(f"{'='*78}")
+    print(f"{'Modo':<10}{'Escrituras/recorrido':>22}{'Cookie (bytes)':>16}{'ms/recorrido':>16}")
+    for mode, runs in results.items():
+        print(f"{mode:<10}{statistics.mean(r[0] for r in runs):>22.1f}{max(r[1] for r in runs):>16}"
+              f"{statistics.mean(r[2] for r in runs) * 1000:>16.1f}")
+    print(f"{'='*78}\n")
+
+
+if __name__ == '__main__':
+    main()
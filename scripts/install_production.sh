@@ -55,6 +55,9 @@ if [ -z "$SECRET_KEY" ]; then
     SECRET_KEY=$(python3 -c 'from django.core.management.utils import get_random_secret_key; print(get_random_secret_key())')
 fi
 
+# Clave de los IDs públicos (fija: no cambiarla después de la instalación)
+IDENTIFIER_KEY=$(python3 -c 'import secrets; print(secrets.token_urlsafe(48))')
+
 # Paso 1: Actualizar sistema
 log_info "Actualizando sistema..."
 apt update
@@ -127,6 +130,7 @@ log_info "Creando archivo de configuración..."
 cat > $PROJECT_DIR/.env <<EOF
 DEBUG=False
 SECRET_KEY=$SECRET_KEY
+IDENTIFIER_KEY=$IDENTIFIER_KEY
 ALLOWED_HOSTS=$DOMAIN,www.$DOMAIN
 
 DB_ENGINE=postgresql
@@ -0,0 +1,326 @@
+#!/usr/bin/env python
+"""
+Prueba de carga en proceso del flujo completo (wizard, vista previa, descargas,
+búsqueda y firmantes)
+Uso: python scripts/load_test.py [--users N] [--concurrency N] [--transport wsgi|asgi]
+                                 [--preview-burst N] [--recaptcha-delay S]
+                                 [--output ARCHIVO] [--compare ARCHIVO] [--max-regression F]
+
+Cada usuario virtual recorre, con el cliente de pruebas de Django (WSGI, un hilo
+por usuario concurrente) o con la aplicación ASGI en proceso (AsyncClient, una
+tarea por usuario concurrente):
+  - los pasos 1-4 del wizard, con una ráfaga de --preview-burst llamadas a
+    api/preview/ mientras escribe el propósito (con If-None-Match, como el navegador),
+  - las descargas de texto y JSON, el guardado de la declaración, la búsqueda por
+    hash abreviado y por contenido y la vista de la declaración,
+  - el registro como firmante, su verificación pública y el directorio de firmantes.
+
+reCAPTCHA se verifica contra el servidor simulado (scripts/recaptcha_stub.py) con
+--recaptcha-delay segundos de latencia. La base es una base de prueba temporal:
+SQLite en archivo (para que los hilos compartan datos) o PostgreSQL con
+DB_ENGINE=postgresql y las variables DB_* habituales.
+
+Reporta solicitudes por segundo y latencias p50/p95/p99 por endpoint y guarda los
+resultados en JSON (por defecto benchmarks/load_test-<versión>-<transporte>-<base>.json).
+Con --compare compara el p95 de cada endpoint con un resultado anterior y termina
+con error si alguno empeora más de --max-regression.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmark_common import (
+    BASE_DIR, STEP1_FORM, STEP2_FORM, STEP3_FORM, percentile, setup_django, test_databases,
+)
+
+setup_django()
+
+import django
+from django.conf import settings
+from django.db import connection, connections
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+
+from core.recaptcha import reset_client
+from recaptcha_stub import start_stub
+
+PURPOSE = 'Redacción y revisión del capítulo de resultados de la tesis sobre aprendizaje automático.'
+
+
+class Recorder:
+    """Latencias (ms) y errores por endpoint"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+
+    def add(self, label, status, elapsed):
+        self.latencies.setdefault(label, []).append(elapsed * 1000)
+        if status >= 400:
+            self.errors[label] = self.errors.get(label, 0) + 1
+
+
+def user_requests(user, preview_burst):
+    """
+    Solicitudes de un usuario virtual, en orden: (etiqueta, método, url, opciones).
+    Las que dependen de respuestas anteriores se completan con el estado del usuario.
+    """
+    yield 'step1', 'get', '/es/paso1/', {}
+    yield 'step1', 'post', '/es/paso1/', {'data': {**STEP1_FORM, 'g-recaptcha-response': f'token-{user}-1'}}
+    yield 'step2', 'get', '/es/paso2/', {}
+    yield 'step2', 'post', '/es/paso2/', {'data': STEP2_FORM}
+    yield 'step3', 'get', '/es/paso3/', {}
+    # Ráfaga de la vista previa: el propósito crece como al escribir
+    for i in range(1, preview_burst + 1):
+        purpose = PURPOSE[:len(PURPOSE) * i // preview_burst]
+        yield 'preview_declaration', 'post', '/es/api/preview/', {
+            'data': json.dumps({**STEP3_FORM, 'specific_purpose': purpose}),
+            'content_type': 'application/json', 'etag': True,
+        }
+    yield 'step3', 'post', '/es/paso3/', {'data': {
+        **STEP3_FORM, 'specific_purpose': f'{PURPOSE} ({user})', 'g-recaptcha-response': f'token-{user}-3'}}
+    yield 'step4', 'get', '/es/paso4/', {'step4': True}
+    yield 'download_text', 'get', '/es/descargar/texto/', {}
+    yield 'download_json', 'get', '/es/descargar/json/', {}
+    yield 'save_declaration', 'post', '/es/api/guardar/', {'save': True}
+    yield 'search', 'post', '/es/buscar/', {'search_hash': True}
+    yield 'search', 'get', '/es/buscar/', {'data': {'q': 'resultados'}}
+    yield 'view_declaration', 'get', None, {'view_declaration': True}
+    yield 'signer_register', 'get', '/es/firmar/', {}
+    yield 'signer_create', 'post', '/es/api/firmar/', {
+        'data': json.dumps({
+            'fullName': f'Firmante {user}', 'email': f'firmante{user}@example.org',
+            'orcid': f'0000-0002-{user // 10000:04d}-{user % 10000:04d}',
+            'affiliation': 'Universidad de Ejemplo', 'discipline': 'Investigador', 'country': 'Chile',
+            'recaptchaToken': f'token-{user}-signer',
+        }),
+        'content_type': 'application/json', 'signer': True,
+    }
+    yield 'signer_verify', 'get', None, {'signer_verify': True}
+    yield 'signers_list', 'get', '/es/firmantes/', {}
+    yield 'signers_list', 'get', '/es/firmantes/', {'data': {'q': 'Universidad'}}
+
+
+def prepare(url, options, ctx):
+    """Argumentos del cliente de pruebas para una solicitud, según el estado del usuario"""
+    kwargs = {key: options[key] for key in ('data', 'content_type') if key in options}
+    if options.get('etag') and ctx.get('etag'):
+        kwargs['headers'] = {'If-None-Match': ctx['etag']}
+    if options.get('search_hash'):
+        kwargs['data'] = {'query': ctx.get('validation_hash', '')[:8]}
+    if options.get('view_declaration'):
+        url = f"/es/declaracion/{ctx.get('declaration_id', 'X')}/"
+    if options.get('signer_verify'):
+        url = f"/es/v/{ctx.get('hash_short', 'x')}/"
+    return url, kwargs
+
+
+def remember(options, response, ctx):
+    """Guarda en el estado del usuario lo que necesitan las solicitudes siguientes"""
+    if options.get('etag') and response.has_header('ETag'):
+        ctx['etag'] = response['ETag']
+    if options.get('save') and response.status_code == 200:
+        ctx['declaration_id'] = response.json()['declaration_id']
+    if options.get('signer') and response.status_code == 200:
+        ctx['hash_short'] = response.json()['signer']['hashShort']
+    if options.get('step4') and response.status_code == 200:
+        ctx['validation_hash'] = response.context['declaration'].validation_hash
+
+
+def wsgi_user(user, preview_burst, recorder):
+    client, ctx = Client(), {}
+    try:
+        for label, method, url, options in user_requests(user, preview_burst):
+            url, kwargs = prepare(url, options, ctx)
+            start = time.perf_counter()
+            response = getattr(client, method)(url, **kwargs)
+            recorder.add(label, response.status_code, time.perf_counter() - start)
+            remember(options, response, ctx)
+    finally:
+        connections.close_all()
+
+
+async def asgi_user(user, preview_burst, recorder):
+    client, ctx = AsyncClient(), {}
+    for label, method, url, options in user_requests(user, preview_burst):
+        url, kwargs = prepare(url, options, ctx)
+        start = time.perf_counter()
+        response = await getattr(client, method)(url, **kwargs)
+        recorder.add(label, response.status_code, time.perf_counter() - start)
+        remember(options, response, ctx)
+
+
+def run(transport, users, concurrency, first_user, preview_burst, recorder):
+    """Ejecuta `users` usuarios virtuales; retorna los segundos transcurridos"""
+    start = time.perf_counter()
+    if transport == 'wsgi':
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(lambda user: wsgi_user(user, preview_burst, recorder),
+                          range(first_user, first_user + users)))
+    else:
+        async def main():
+            queue = asyncio.Queue()
+            for user in range(first_user, first_user + users):
+                queue.put_nowait(user)
+
+            async def worker():
+                while not queue.empty():
+                    await asgi_user(queue.get_nowait(), preview_burst, recorder)
+
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+        asyncio.run(main())
+    return time.perf_counter() - start
+
+
+def summarize(recorder, elapsed):
+    endpoints = {}
+    for label, latencies in sorted(recorder.latencies.items()):
+        endpoints[label] = {
+            'requests': len(latencies),
+            'errors': recorder.errors.get(label, 0),
+            'rps': round(len(latencies) / elapsed, 2),
+            'mean_ms': round(statistics.mean(latencies), 2),
+            'p50_ms': round(percentile(latencies, 0.50), 2),
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+            'p99_ms': round(percentile(latencies, 0.99), 2),
+        }
+    total = sum(e['requests'] for e in endpoints.values())
+    return {
+        'requests': total,
+        'errors': sum(e['errors'] for e in endpoints.values()),
+        'elapsed_s': round(elapsed, 3),
+        'rps': round(total / elapsed, 2),
+    }, endpoints
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, max_regression):
+    """Imprime el p95 contra el resultado anterior; retorna los endpoints que empeoraron"""
+    baseline = json.loads(Path(baseline_path).read_text())
+    print(f"\nComparación con {baseline_path} (versión {baseline.get('version')}, {baseline.get('git_commit')})")
+    if baseline.get('config') != results['config']:
+        print("⚠ El resultado anterior usó otra configuración:", json.dumps(baseline.get('config'), ensure_ascii=False))
+    print(f"{'Endpoint':<22}{'p95 antes':>12}{'p95 ahora':>12}{'Cambio':>10}")
+    regressions = []
+    for label, current in results['endpoints'].items():
+        previous = baseline['endpoints'].get(label)
+        if not previous or not previous['p95_ms']:
+            continue
+        change = current['p95_ms'] / previous['p95_ms'] - 1
+        marker = '  ✗' if change > max_regression else ''
+        if marker:
+            regressions.append(label)
+        print(f"{label:<22}{previous['p95_ms']:>12.2f}{current['p95_ms']:>12.2f}{change:>+10.1%}{marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100, help='Usuarios virtuales (recorridos completos)')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--transport', choices=('wsgi', 'asgi'), default='wsgi')
+    parser.add_argument('--preview-burst', type=int, default=12, help='Llamadas a api/preview/ por usuario')
+    parser.add_argument('--recaptcha-delay', type=float, default=0.05, help='Latencia simulada de reCAPTCHA (s)')
+    parser.add_argument('--output', help='Archivo JSON de resultados')
+    parser.add_argument('--compare', help='Resultado anterior (JSON) con el que comparar el p95')
+    parser.add_argument('--max-regression', type=float, default=0.25,
+                        help='Empeoramiento máximo del p95 aceptado con --compare (fracción)')
+    args = parser.parse_args()
+
+    # El paso 1 registra cada verificación reCAPTCHA como error (depuración)
+    logging.getLogger('core.views.declarations').setLevel(logging.CRITICAL)
+
+    db = connection.settings_dict
+    tmpdir = None
+    if connection.vendor == 'sqlite':
+        # Base en archivo (la base en memoria no se comparte entre hilos)
+        tmpdir = tempfile.TemporaryDirectory()
+        db['TEST']['NAME'] = os.path.join(tmpdir.name, 'load_test.sqlite3')
+        db['OPTIONS']['timeout'] = 30
+
+    stub = start_stub(delay=args.recaptcha_delay)
+    recorder = Recorder()
+    try:
+        with test_databases(), override_settings(RECAPTCHA_ENABLED=True, RECAPTCHA_SECRET_KEY='stub',
+                                                 RECAPTCHA_VERIFY_URL=stub.url, RECAPTCHA_TOKEN_TTL=0):
+            reset_client()
+            run(args.transport, 1, 1, args.users, args.preview_burst, Recorder())  # calentamiento
+            elapsed = run(args.transport, args.users, args.concurrency, 0, args.preview_burst, recorder)
+        reset_client()
+    finally:
+        stub.shutdown()
+        if tmpdir:
+            tmpdir.cleanup()
+
+    total, endpoints = summarize(recorder, elapsed)
+    version = (BASE_DIR / 'VERSION').read_text().strip()
+    results = {
+        'version': version,
+        'git_commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'config': {
+            'transport': args.transport,
+            'database': connection.vendor,
+            'users': args.users,
+            'concurrency': args.concurrency,
+            'preview_burst': args.preview_burst,
+            'recaptcha_delay_s': args.recaptcha_delay,
+            'session_engine': settings.SESSION_ENGINE,
+            'wizard_state_storage': settings.WIZARD_STATE_STORAGE,
+        },
+        'total': total,
+        'endpoints': endpoints,
+    }
+
+    print(f"\n{'='*88}")
+    print(f"PRUEBA DE CARGA {args.transport.upper()} / {connection.vendor} ({args.users} usuarios, "
+          f"{args.concurrency} concurrentes, reCAPTCHA {args.recaptcha_delay * 1000:.0f} ms)")
+    print(f"{'='*88}")
+    print(f"{'Endpoint':<22}{'Solicitudes':>12}{'Sol./s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'Errores':>10}")
+    for label, stats in endpoints.items():
+        print(f"{label:<22}{stats['requests']:>12}{stats['rps']:>9.1f}{stats['p50_ms']:>10.2f}"
+              f"{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}{stats['errors']:>10}")
+    print(f"{'-'*88}")
+    print(f"{'Total':<22}{total['requests']:>12}{total['rps']:>9.1f}{'':>30}{total['errors']:>10}")
+    print(f"{'='*88}")
+
+    output = Path(args.output) if args.output else (
+        BASE_DIR / 'benchmarks' / f'load_test-{version}-{args.transport}-{connection.vendor}.json')
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2, ensure_ascii=False) + '\n')
+    print(f"Resultados guardados en {output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.max_regression)
+        if regressions:
+            print(f"\n✗ p95 peor en más de {args.max_regression:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+    if total['errors']:
+        print(f"\n✗ {total['errors']} respuestas con error")
+        sys.exit(1)
+    print()
+
+
+if __name__ == '__main__':
+    main()
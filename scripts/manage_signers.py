@@ -152,40 +152,27 @@ def stats():
 
 
 def export_csv():
-    """Exporta firmantes a CSV"""
-    import csv
+    """Exporta firmantes a CSV (en streaming, sin cargar la tabla en memoria)"""
     from datetime import datetime
+    from core.exports import get_export_queryset, iter_export_rows
 
-    signers = Signer.objects.all()
+    signers = get_export_queryset('signers')
 
-    if not signers:
+    if not signers.exists():
         print("No hay firmantes para exportar.")
         return
 
     filename = f"firmantes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
 
+    count = 0
     with open(filename, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            'Nombre', 'Email', 'ORCID', 'Afiliación', 'Disciplina',
-            'País', 'Hash', 'Verificado', 'Público', 'Fecha'
-        ])
-
-        for signer in signers:
-            writer.writerow([
-                signer.full_name,
-                signer.email,
-                signer.orcid,
-                signer.affiliation,
-                signer.discipline,
-                signer.country or '',
-                signer.hash_short,
-                'Sí' if signer.orcid_verified else 'No',
-                'Sí' if signer.public_listing else 'No',
-                signer.created_at.strftime('%d/%m/%Y %H:%M')
-            ])
-
-    print(f"✓ Exportados {signers.count()} firmante(s) a: {filename}")
+        for line in iter_export_rows('signers', signers, 'csv'):
+            f.write(line)
+            count += 1
+
+    # La primera línea es el encabezado
+    print(f"✓ Exportados {count - 1} firmante(s) a: {filename}")
+    print("  Para exportaciones grandes o con filtros usa: python manage.py export_data signers --format csv")
 
 
 def show_menu():
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+Servidor local que simula la API siteverify de reCAPTCHA (pruebas sin conexión)
+Uso: python scripts/recaptcha_stub.py [--port 8765] [--delay S] [--error-rate F]
+
+Responde como https://www.google.com/recaptcha/api/siteverify:
+  - tokens que empiezan con "fail" -> success: false (invalid-input-response),
+  - cualquier otro token           -> success: true.
+--delay agrega latencia a cada respuesta y --error-rate responde 503 a esa
+fracción de solicitudes. Mantiene las conexiones abiertas (HTTP/1.1), así que
+también sirve para comprobar la reutilización del pool de conexiones.
+
+Para usarlo con el servidor de desarrollo:
+    RECAPTCHA_VERIFY_URL=http://127.0.0.1:8765/recaptcha/api/siteverify \\
+    RECAPTCHA_SECRET_KEY=stub python manage.py runserver
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+VERIFY_PATH = '/recaptcha/api/siteverify'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Sin Nagle: cabeceras y cuerpo en conexiones persistentes no esperan el ACK retardado
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # El cliente cortó por timeout (pruebas del circuit breaker)
+            self.close_connection = True
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        form = parse_qs(self.rfile.read(length).decode())
+        with self.server.lock:
+            self.server.requests += 1
+
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        if self.path != VERIFY_PATH:
+            self._send(404, {'error': 'not found'})
+            return
+        if self.server.error_rate and random.random() < self.server.error_rate:
+            self._send(503, {'error': 'unavailable'})
+            return
+
+        token = form.get('response', [''])[0]
+        if token.startswith('fail'):
+            self._send(200, {'success': False, 'error-codes': ['invalid-input-response']})
+        else:
+            self._send(200, {
+                'success': True,
+                'challenge_ts': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'hostname': 'localhost',
+            })
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def start_stub(port=0, delay=0.0, error_rate=0.0, verbose=False):
+    """Inicia el servidor en un hilo; retorna el servidor (server.url, .requests, .connections)"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubHandler)
+    server.daemon_threads = True
+    server.delay = delay
+    server.error_rate = error_rate
+    server.verbose = verbose
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.connections = 0
+    server.url = f"http://127.0.0.1:{server.server_address[1]}{VERIFY_PATH}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay', type=float, default=0.0, help='Segundos de latencia por respuesta')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fracción de respuestas 503')
+    args = parser.parse_args()
+
+    server = start_stub(args.port, args.delay, args.error_rate, verbose=True)
+    print(f"reCAPTCHA simulado en {server.url} (Ctrl+C para detener)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
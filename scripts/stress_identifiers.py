@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""
+Prueba multiproceso del asignador de identificadores (core/identifiers.py)
+Uso: python scripts/stress_identifiers.py [--processes N] [--ids N] [--saves N]
+
+Lanza N procesos (fork, como los workers de gunicorn con --preload) que
+asignan IDs en paralelo contra la misma base de datos de prueba, además de
+guardar declaraciones y firmantes reales. El proceso padre reserva un bloque
+antes del fork para comprobar que los hijos no lo heredan. Verifica que:
+  - ningún ID se repite entre procesos ni entre tipos de registro,
+  - todos los IDs tienen 8 caracteres base32 y carácter de control válido,
+  - los contadores avanzan por bloques (pocas escrituras por ID asignado).
+
+Usa una base de datos de prueba temporal (SQLite en archivo para que los
+procesos compartan datos, o PostgreSQL con DB_ENGINE=postgresql).
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import django
+
+# Setup Django
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.conf import settings
+from django.db import connection, connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+
+from core.identifiers import COUNTER_KEYS, DECLARATION, SIGNER, allocate_identifier, is_valid_identifier
+from core.models import Counter, Declaration, Signer
+
+
+def worker(args):
+    """Asigna `ids` IDs de declaración y guarda `saves` declaraciones y firmantes"""
+    number, ids, saves = args
+    try:
+        allocated = [allocate_identifier(DECLARATION) for _ in range(ids)]
+        for i in range(saves):
+            declaration = Declaration(
+                usage_types=['redaccion'],
+                ai_tool_name='Herramienta',
+                ai_tool_date_month=1,
+                ai_tool_date_year=2025,
+                specific_purpose='Prueba de concurrencia',
+            )
+            declaration.save()
+            signer = Signer(
+                full_name=f"Firmante {number}-{i}",
+                email=f"p{number}-{i}@example.org",
+                orcid=f"0000-{number:04d}-{i // 10000:04d}-{i % 10000:04d}",
+                affiliation='Universidad de Ejemplo',
+                discipline='Investigador',
+            )
+            signer.save()
+            allocated += [declaration.declaration_id, signer.signer_id]
+        return allocated
+    finally:
+        connections.close_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--ids', type=int, default=5000, help='IDs asignados por proceso')
+    parser.add_argument('--saves', type=int, default=50, help='Declaraciones y firmantes guardados por proceso')
+    args = parser.parse_args()
+
+    db = connection.settings_dict
+    tmpdir = None
+    if connection.vendor == 'sqlite':
+        # Base en archivo (la base en memoria no se comparte entre procesos)
+        tmpdir = tempfile.TemporaryDirectory()
+        db['TEST']['NAME'] = os.path.join(tmpdir.name, 'stress.sqlite3')
+        db['OPTIONS']['timeout'] = 30
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        # Bloque reservado por el padre antes del fork: los hijos deben descartarlo
+        with CaptureQueriesContext(connection) as reserve:
+            parent_ids = [allocate_identifier(DECLARATION)]
+        connections.close_all()
+
+        start = time.perf_counter()
+        context = multiprocessing.get_context('fork')
+        with context.Pool(args.processes) as pool:
+            results = pool.map(worker, [(n, args.ids, args.saves) for n in range(args.processes)])
+        elapsed = time.perf_counter() - start
+
+        allocated = parent_ids + [value for result in results for value in result]
+        duplicates = len(allocated) - len(set(allocated))
+        invalid = [value for value in allocated if not is_valid_identifier(value)]
+        counters = dict(Counter.objects.filter(key__in=COUNTER_KEYS.values()).values_list('key', 'value'))
+        stored = Declaration.objects.count() + Signer.objects.count()
+
+        print(f"\n{'='*72}")
+        print(f"ASIGNACIÓN DE IDs ({args.processes} procesos, bloques de {settings.IDENTIFIER_BLOCK_SIZE})")
+        print(f"{'='*72}")
+        print(f"IDs asignados:             {len(allocated)} ({len(allocated) / elapsed:.0f} IDs/s)")
+        print(f"Registros guardados:       {stored}")
+        print(f"Consultas 1ª reserva:      {len(reserve)}")
+        for namespace, key in COUNTER_KEYS.items():
+            print(f"Contador {namespace:<17}{counters.get(key, 0)}")
+        print(f"Ejemplos:                  {', '.join(allocated[1:6])}")
+        print(f"{'='*72}\n")
+
+        assert duplicates == 0, f"{duplicates} IDs repetidos"
+        assert not invalid, f"IDs inválidos: {invalid[:5]}"
+        assert stored == 2 * args.processes * args.saves
+        # Cada proceso reserva bloques completos: a lo sumo uno parcial por tipo
+        block = settings.IDENTIFIER_BLOCK_SIZE
+        blocks = lambda values: -(-values // block) * block
+        assert counters[COUNTER_KEYS[DECLARATION]] == block + args.processes * blocks(args.ids + args.saves)
+        assert counters[COUNTER_KEYS[SIGNER]] == args.processes * blocks(args.saves)
+        print("✓ Sin IDs repetidos entre procesos; todos con carácter de control válido")
+    finally:
+        runner.teardown_databases(old_config)
+        if tmpdir:
+            tmpdir.cleanup()
+
+
+if __name__ == '__main__':
+    main()
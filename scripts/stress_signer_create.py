@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+"""
+Prueba de concurrencia del registro de firmantes (api/firmar/)
+Uso: python scripts/stress_signer_create.py [--requests N] [--workers N] [--unique N]
+
+Envía N registros en paralelo desde varios hilos, repitiendo a propósito
+emails y ORCID (solo --unique valores distintos, con variaciones de
+mayúsculas y espacios; algunos registros repiten solo el email o solo el
+ORCID). Verifica que:
+  - no hay dos firmantes con el mismo email u ORCID normalizado,
+  - cada duplicado recibe el mensaje de error habitual (400, no 500),
+  - la creación ejecuta un solo INSERT, precedido solo por la sonda de
+    prefijo del hash corto (una consulta por rango indexada).
+
+Usa una base de datos de prueba temporal (SQLite en archivo para que los
+hilos compartan datos, o PostgreSQL con DB_ENGINE=postgresql).
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import django
+
+# Setup Django
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ['RECAPTCHA_ENABLED'] = 'False'
+django.setup()
+
+from collections import Counter as Tally
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection, connections
+from django.db.models.functions import Lower, Trim, Upper
+from django.test import Client
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+
+from core.models import Signer
+from core.views.signers import DUPLICATE_SIGNER_ERRORS
+
+URL = '/es/api/firmar/'
+
+
+def payload(i, unique):
+    """
+    Registro i: email y ORCID se repiten cada `unique` registros, con otra
+    capitalización; uno de cada tres repite solo el email y otro solo el ORCID.
+    """
+    key = i % unique
+    email = f"firmante{key}@example.org"
+    orcid = f"0000-0000-{key // 10000:04d}-{key % 10000:04d}"
+    if i % 3 == 1:
+        email = f"otro{i}@example.org"
+    elif i % 3 == 2:
+        orcid = f"0000-0001-{i // 10000:04d}-{i % 10000:04d}"
+    return {
+        'fullName': f"Firmante {i}",
+        'email': email.upper() if i % 2 else f"  {email} ",
+        'orcid': orcid,
+        'affiliation': 'Universidad de Ejemplo',
+        'discipline': 'Investigador',
+        'country': 'Chile',
+    }
+
+
+def register(i, unique):
+    client = Client()
+    try:
+        response = client.post(URL, json.dumps(payload(i, unique)), content_type='application/json')
+        return response.status_code, response.json().get('error')
+    finally:
+        connections.close_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--unique', type=int, default=50, help='Emails/ORCID distintos')
+    args = parser.parse_args()
+
+    db = connection.settings_dict
+    tmpdir = None
+    if connection.vendor == 'sqlite':
+        # Base en archivo (la base en memoria no se comparte entre hilos)
+        tmpdir = tempfile.TemporaryDirectory()
+        db['TEST']['NAME'] = os.path.join(tmpdir.name, 'stress.sqlite3')
+        db['OPTIONS']['timeout'] = 30
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    try:
+        # Consultas de un registro nuevo y de un duplicado
+        with CaptureQueriesContext(connection) as created:
+            Client().post(URL, json.dumps(payload(args.unique, args.unique + 1)), content_type='application/json')
+        with CaptureQueriesContext(connection) as duplicate:
+            Client().post(URL, json.dumps(payload(args.unique, args.unique + 1)), content_type='application/json')
+        Signer.objects.all().delete()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            results = list(pool.map(lambda i: register(i, args.unique), range(args.requests)))
+        elapsed = time.perf_counter() - start
+
+        statuses = Tally(status for status, _ in results)
+        errors = Tally(error for status, error in results if status != 200)
+        total = Signer.objects.count()
+        distinct_emails = Signer.objects.annotate(key=Lower(Trim('email'))).values('key').distinct().count()
+        distinct_orcids = Signer.objects.annotate(key=Upper(Trim('orcid'))).values('key').distinct().count()
+
+        print(f"\n{'='*72}")
+        print(f"REGISTRO CONCURRENTE ({args.requests} solicitudes, {args.workers} hilos, {args.unique} únicos)")
+        print(f"{'='*72}")
+        print(f"Tiempo total:              {elapsed:.2f} s ({args.requests / elapsed:.0f} solicitudes/s)")
+        print(f"Respuestas por estado:     {dict(statuses)}")
+        for error, count in errors.items():
+            print(f"  {count:>5} × {error}")
+        print(f"Firmantes creados:         {total}")
+        print(f"Consultas por registro:    {len(created)} "
+              f"({sum(q['sql'].startswith('SELECT') for q in created.captured_queries)} SELECT)")
+        print(f"Consultas por duplicado:   {len(duplicate)}")
+        print(f"{'='*72}\n")
+
+        assert distinct_emails == total, "Hay emails duplicados"
+        assert distinct_orcids == total, "Hay ORCID duplicados"
+        assert statuses[200] == total, "Cada respuesta exitosa debe corresponder a un firmante"
+        assert statuses[500] == 0, "Ningún duplicado debe terminar en error 500"
+        assert set(errors) <= set(DUPLICATE_SIGNER_ERRORS.values())
+        print("✓ Sin duplicados; cada repetición recibió el mensaje de error esperado")
+    finally:
+        runner.teardown_databases(old_config)
+        if tmpdir:
+            tmpdir.cleanup()
+
+
+if __name__ == '__main__':
+    main()